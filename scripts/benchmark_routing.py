@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Benchmark the collection-route planner on synthetic cities.
+
+Generates bins around Copenhagen in two layouts:
+- uniform: bins spread evenly over a square
+- clustered: bins in Gaussian neighbourhoods (like real housing blocks)
+
+For each size it compares the nearest-neighbour construction alone with the
+full heuristic (2-opt, Or-opt, relocate) and reports time, route count and
+total distance.
+
+Usage:
+    python scripts/benchmark_routing.py
+    python scripts/benchmark_routing.py --sizes 500 2000 5000 --capacity 60
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+
+from simulated_city.config import SimulationLocationConfig
+from simulated_city.routing import distance_matrix, plan_collection, solve_cvrp
+
+CENTRE = (55.6761, 12.5683)  # (lat, lon)
+SPAN_DEG = 0.12  # about 13 km north-south
+
+
+def synthetic_city(n: int, layout: str, rng: np.random.Generator):
+    if layout == "uniform":
+        lat = CENTRE[0] + rng.uniform(-SPAN_DEG / 2, SPAN_DEG / 2, n)
+        lon = CENTRE[1] + rng.uniform(-SPAN_DEG, SPAN_DEG, n)
+    else:
+        centres = rng.uniform(-0.5, 0.5, (max(1, n // 200), 2)) * (SPAN_DEG, 2 * SPAN_DEG)
+        pick = rng.integers(0, len(centres), n)
+        lat = CENTRE[0] + centres[pick, 0] + rng.normal(0, 0.004, n)
+        lon = CENTRE[1] + centres[pick, 1] + rng.normal(0, 0.008, n)
+    locations = tuple(SimulationLocationConfig(f"bin-{i}", float(a), float(o)) for i, (a, o) in enumerate(zip(lat, lon)))
+    fill = rng.integers(70, 101, n)
+    return locations, fill
+
+
+def nearest_neighbour_distance(locations, fill, capacity: float) -> float:
+    from simulated_city.geo import transform_arrays
+
+    lat = [CENTRE[0]] + [loc.lat for loc in locations]
+    lon = [CENTRE[1]] + [loc.lon for loc in locations]
+    x, y = transform_arrays(lon, lat, from_crs="EPSG:4326", to_crs="EPSG:25832", backend="builtin")
+    dist = distance_matrix(x, y)
+    demand = np.concatenate([[0.0], np.asarray(fill) / 100.0])
+    routes = solve_cvrp(dist, demand, capacity, improve=False)
+    return sum(float(dist[np.r_[0, r], np.r_[r, 0]].astype(np.float64).sum()) for r in routes)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    parser.add_argument("--capacity", type=float, default=40.0, help="truck capacity in full bins")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'layout':<10} {'bins':>6} {'routes':>7} {'NN km':>9} {'final km':>9} {'gain':>6} {'time s':>7}")
+    for layout in ("uniform", "clustered"):
+        for n in args.sizes:
+            locations, fill = synthetic_city(n, layout, rng)
+            baseline = nearest_neighbour_distance(locations, fill, args.capacity)
+            started = time.perf_counter()
+            plan = plan_collection(locations, fill, depot=CENTRE, threshold_pct=0, capacity=args.capacity)
+            elapsed = time.perf_counter() - started
+            gain = 1 - plan.distance_m / baseline
+            print(
+                f"{layout:<10} {n:>6} {len(plan.routes):>7} {baseline / 1000:>9.1f} "
+                f"{plan.distance_m / 1000:>9.1f} {gain:>6.1%} {elapsed:>7.2f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
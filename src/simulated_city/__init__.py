@@ -4,34 +4,65 @@ This package intentionally keeps only workshop-agnostic helpers:
 - YAML/.env configuration loading (see :mod:`simulated_city.config`)
 - MQTT connection helpers (see :mod:`simulated_city.mqtt`)
 
-Simulation logic is meant to be implemented by students during the workshop.
+Simulation logic is meant to be implemented by students during the workshop
+(an optional reference engine lives in :mod:`simulated_city.simulation`).
+
+The re-exported names below are loaded lazily: `import simulated_city` is
+cheap, and e.g. `from simulated_city import load_config` only imports the
+config module (not MQTT or geo).
 """
 
-from .config import AppConfig, MqttConfig, load_config
-from .geo import (
-	EPSG_25832,
-	EPSG_3857,
-	epsg25832_to_webmercator,
-	transform_many,
-	transform_xy,
-	webmercator_to_epsg25832,
-	wgs2utm,
-	utm2wgs,
-)
-from .mqtt import MqttConnector, MqttPublisher
-
-__all__ = [
-	"AppConfig",
-	"MqttConfig",
-	"load_config",
-	"EPSG_25832",
-	"EPSG_3857",
-	"transform_xy",
-	"transform_many",
-	"webmercator_to_epsg25832",
-	"epsg25832_to_webmercator",
-	"wgs2utm",
-	"utm2wgs",
-	"MqttConnector",
-	"MqttPublisher",
-]
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+# name -> submodule that defines it
+_LAZY_EXPORTS = {
+	"AppConfig": "config",
+	"MqttConfig": "config",
+	"load_config": "config",
+	"reload_config": "config",
+	"watch_config": "config",
+	"EPSG_25832": "geo",
+	"EPSG_3857": "geo",
+	"transform_xy": "geo",
+	"transform_many": "geo",
+	"transform_arrays": "geo",
+	"webmercator_to_epsg25832": "geo",
+	"epsg25832_to_webmercator": "geo",
+	"wgs2utm": "geo",
+	"utm2wgs": "geo",
+	"MqttConnector": "mqtt",
+	"MqttPublisher": "mqtt",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+if TYPE_CHECKING:  # pragma: no cover - for type checkers and IDEs only
+	from .config import AppConfig, MqttConfig, load_config, reload_config, watch_config
+	from .geo import (
+		EPSG_25832,
+		EPSG_3857,
+		epsg25832_to_webmercator,
+		transform_arrays,
+		transform_many,
+		transform_xy,
+		webmercator_to_epsg25832,
+		wgs2utm,
+		utm2wgs,
+	)
+	from .mqtt import MqttConnector, MqttPublisher
+
+
+def __getattr__(name: str):
+	module_name = _LAZY_EXPORTS.get(name)
+	if module_name is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+	globals()[name] = value  # cache: later lookups skip __getattr__
+	return value
+
+
+def __dir__() -> list[str]:
+	return sorted(set(globals()) | set(__all__))
@@ -1,14 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
+import logging
 import os
 from pathlib import Path
+import threading
 from typing import Any
 
 from dotenv import load_dotenv
 import yaml
 
+logger = logging.getLogger(__name__)
+
+# libyaml's C loader is much faster than the pure-Python one; fall back if missing.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Environment variables that select the active MQTT profiles.
+_PROFILE_ENV_VARS = ("SIMCITY_MQTT_PROFILE", "MQTT_PROFILE", "SIMCITY_MQTT_PROFILES")
+
+# Caches used by load_config(). Configs are frozen dataclasses; load_config()
+# copies the one mutable field (`mqtt_configs`) before handing them out.
+_MAX_CACHED_CONFIGS = 32
+_dotenv_loaded = False
+_resolved_paths: dict[tuple[str, str], Path] = {}
+_yaml_cache: dict[str, tuple[tuple, dict[str, Any]]] = {}
+_config_cache: dict[tuple, AppConfig] = {}
+
 
 @dataclass(frozen=True, slots=True)
 class MqttConfig:
@@ -77,13 +96,142 @@ def _parse_utc_datetime(value: Any) -> datetime:
     return dt.astimezone(timezone.utc)
 
 
-def load_config(path: str | Path = "config.yaml") -> AppConfig:
+def load_config(path: str | Path = "config.yaml", *, cache: bool = True) -> AppConfig:
+    """Load `config.yaml` (plus `.env`) into an `AppConfig`.
+
+    Results are cached: calling this again skips reading and parsing until the
+    file (path, mtime or size) or a relevant environment variable changes.
+    Each call returns its own copy, so changing `mqtt_configs` in one place
+    doesn't affect other callers. Pass `cache=False` to always re-read, or use
+    `reload_config()`.
+
+    With caching, `.env` is read only on the first call in a process; later
+    edits to it are picked up by `reload_config()` (or `cache=False`) only.
+    """
+    global _dotenv_loaded
     # Load a local .env if present (it is gitignored by default).
     # This makes workshop setup easier while keeping secrets out of git.
-    load_dotenv(override=False)
+    if not cache or not _dotenv_loaded:
+        load_dotenv(override=False)
+        _dotenv_loaded = True
+
+    if not cache:
+        return _build_app_config(_load_yaml_dict(_resolve_default_config_path(path)))
+
+    resolved_path = _resolve_config_path_cached(path)
+    file_key = _file_key(resolved_path)
+    cached_yaml = _yaml_cache.get(file_key[0])
+    if cached_yaml is not None and cached_yaml[0] == file_key:
+        data = cached_yaml[1]
+    else:
+        data = _load_yaml_dict(resolved_path)
+        _yaml_cache[file_key[0]] = (file_key, data)
+
+    key = (file_key, _env_key(data))
+    cfg = _config_cache.get(key)
+    if cfg is None:
+        cfg = _build_app_config(data)
+        if len(_config_cache) >= _MAX_CACHED_CONFIGS:
+            _config_cache.clear()
+        _config_cache[key] = cfg
+    # The cached instance is shared; hand out a copy of its only mutable part.
+    return replace(cfg, mqtt_configs=dict(cfg.mqtt_configs))
+
+
+def reload_config(path: str | Path = "config.yaml") -> AppConfig:
+    """Forget all cached configuration, re-read `.env` and `config.yaml`.
 
-    resolved_path = _resolve_default_config_path(path)
-    data = _load_yaml_dict(resolved_path)
+    Variables that are already set in the environment are not overwritten by `.env`.
+    """
+    global _dotenv_loaded
+    clear_config_cache()
+    _dotenv_loaded = False
+    return load_config(path)
+
+
+def clear_config_cache() -> None:
+    """Drop cached paths, parsed YAML and `AppConfig` objects."""
+    _resolved_paths.clear()
+    _yaml_cache.clear()
+    _config_cache.clear()
+
+
+class ConfigWatcher:
+    """Poll a config file and swap in a new `AppConfig` when it changes.
+
+    Read the current value from `watcher.config`. `on_change(new_config)` is
+    called from the watcher thread. If the edited file is invalid (e.g. saved
+    halfway), the error is logged and the previous config stays active.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "config.yaml",
+        *,
+        interval_s: float = 1.0,
+        on_change: Callable[[AppConfig], None] | None = None,
+    ):
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        self.path = path
+        self.interval_s = interval_s
+        self.on_change = on_change
+        self.config = load_config(path)
+        self._file_key = _file_key(_resolve_config_path_cached(path))
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch_loop, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def check(self) -> bool:
+        """Reload now if the file changed. Returns True if a new config was swapped in."""
+        file_key = _file_key(_resolve_config_path_cached(self.path))
+        if file_key == self._file_key:
+            return False
+        self._file_key = file_key
+        try:
+            cfg = load_config(self.path)
+        except Exception:
+            logger.exception(f"Ignoring invalid config change in {file_key[0]}")
+            return False
+        if cfg == self.config:
+            return False
+        self.config = cfg
+        if self.on_change is not None:
+            self.on_change(cfg)
+        return True
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __enter__(self) -> ConfigWatcher:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _watch_loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Error while checking config file for changes")
+
+
+def watch_config(
+    path: str | Path = "config.yaml",
+    *,
+    interval_s: float = 1.0,
+    on_change: Callable[[AppConfig], None] | None = None,
+) -> ConfigWatcher:
+    """Start a :class:`ConfigWatcher` (opt-in live reloading of `config.yaml`)."""
+    return ConfigWatcher(path, interval_s=interval_s, on_change=on_change)
+
+
+def _build_app_config(data: dict[str, Any]) -> AppConfig:
     active_profiles = _get_active_profiles(data)
     mqtt_config_dicts = _load_mqtt_configs(data, active_profiles)
     simulation = data.get("simulation")
@@ -340,13 +488,51 @@ def _parse_simulation_config(raw: Any) -> SimulationConfig | None:
     )
 
 
+def _file_key(path: Path) -> tuple:
+    """(absolute path, mtime_ns, size) of a config file; None stats if missing."""
+    absolute = str(path.absolute())
+    try:
+        st = path.stat()
+    except OSError:
+        return (absolute, None, None)
+    return (absolute, st.st_mtime_ns, st.st_size)
+
+
+def _env_key(data: dict[str, Any]) -> tuple:
+    """Values of every environment variable that influences the config built from `data`."""
+    names = set(_PROFILE_ENV_VARS)
+    raw = data.get("mqtt")
+    if isinstance(raw, dict):
+        profiles = raw.get("profiles")
+        sections = [raw, *profiles.values()] if isinstance(profiles, dict) else [raw]
+        for section in sections:
+            if isinstance(section, dict):
+                for key in ("username_env", "password_env"):
+                    if section.get(key):
+                        names.add(str(section[key]))
+    return tuple((name, os.environ.get(name)) for name in sorted(names))
+
+
+def _resolve_config_path_cached(path: str | Path) -> Path:
+    # The parent-directory search costs one exists() per directory level, so
+    # remember where the file was found (per working directory).
+    key = (str(path), os.getcwd())
+    found = _resolved_paths.get(key)
+    if found is not None and found.exists():
+        return found
+    found = _resolve_default_config_path(path)
+    if found.exists():
+        _resolved_paths[key] = found
+    return found
+
+
 def _load_yaml_dict(path: str | Path) -> dict[str, Any]:
     p = Path(path)
     if not p.exists():
         return {}
 
     content = p.read_text(encoding="utf-8")
-    loaded = yaml.safe_load(content)
+    loaded = yaml.load(content, Loader=_YAML_LOADER)
     if loaded is None:
         return {}
     if not isinstance(loaded, dict):
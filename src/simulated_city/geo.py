@@ -14,26 +14,47 @@ Dependency note:
 This module uses `pyproj` for accurate CRS transforms. The dependency is kept
 optional so the template stays lightweight.
 
+For the three CRSs used in the workshop (EPSG:4326, EPSG:25832, EPSG:3857)
+there is also a built-in engine (`backend="builtin"`) that needs no pyproj:
+closed-form Transverse Mercator (Krüger series) and spherical Web Mercator.
+
 Install with:
 
     pip install -e ".[geo]"
 """
 
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Iterable
+import math
+import os
+import threading
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Iterable
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 EPSG_3857 = "EPSG:3857"
 EPSG_25832 = "EPSG:25832"
 EPSG_4326 = "EPSG:4326"
 
+BACKEND_PYPROJ = "pyproj"
+BACKEND_BUILTIN = "builtin"
+
 
-def wgs2utm(lat: float, lon: float) -> tuple[float, float]:
+def wgs2utm(
+        lat: float, lon: float, *, backend: str = BACKEND_PYPROJ, cache: bool | TransformCache = False
+) -> tuple[float, float]:
         """Convert WGS84 latitude/longitude to EPSG:25832 (UTM32) meters.
 
         Parameters
         - lat, lon: WGS84 latitude/longitude in degrees
 
+        - backend: "pyproj" (default) or "builtin" (no pyproj needed)
+        - cache: memoize the result (see :class:`TransformCache`)
+
         Returns
         - (easting, northing) in meters (EPSG:25832)
 
@@ -42,42 +63,67 @@ def wgs2utm(lat: float, lon: float) -> tuple[float, float]:
             (lon, lat), which is why this calls :func:`transform_xy` with (lon, lat).
         """
 
-        easting, northing = transform_xy(lon, lat, from_crs=EPSG_4326, to_crs=EPSG_25832)
+        easting, northing = transform_xy(
+                lon, lat, from_crs=EPSG_4326, to_crs=EPSG_25832, backend=backend, cache=cache
+        )
         return easting, northing
 
 
-def utm2wgs(easting: float, northing: float) -> tuple[float, float]:
+def utm2wgs(
+        easting: float, northing: float, *, backend: str = BACKEND_PYPROJ, cache: bool | TransformCache = False
+) -> tuple[float, float]:
         """Convert EPSG:25832 (UTM32) meters to WGS84 latitude/longitude.
 
         Returns
         - (lat, lon) in degrees (EPSG:4326)
         """
 
-        lon, lat = transform_xy(easting, northing, from_crs=EPSG_25832, to_crs=EPSG_4326)
+        lon, lat = transform_xy(
+                easting, northing, from_crs=EPSG_25832, to_crs=EPSG_4326, backend=backend, cache=cache
+        )
         return lat, lon
 
 
-def webmercator_to_epsg25832(x: float, y: float) -> tuple[float, float]:
+def webmercator_to_epsg25832(x: float, y: float, *, backend: str = BACKEND_PYPROJ) -> tuple[float, float]:
     """Convert a point from EPSG:3857 (Web Mercator) to EPSG:25832."""
 
-    return transform_xy(x, y, from_crs=EPSG_3857, to_crs=EPSG_25832)
+    return transform_xy(x, y, from_crs=EPSG_3857, to_crs=EPSG_25832, backend=backend)
 
 
-def epsg25832_to_webmercator(easting: float, northing: float) -> tuple[float, float]:
+def epsg25832_to_webmercator(easting: float, northing: float, *, backend: str = BACKEND_PYPROJ) -> tuple[float, float]:
     """Convert a point from EPSG:25832 to EPSG:3857 (Web Mercator)."""
 
-    return transform_xy(easting, northing, from_crs=EPSG_25832, to_crs=EPSG_3857)
+    return transform_xy(easting, northing, from_crs=EPSG_25832, to_crs=EPSG_3857, backend=backend)
 
 
-def transform_xy(x: float, y: float, *, from_crs: str = EPSG_3857, to_crs: str = EPSG_25832) -> tuple[float, float]:
+def transform_xy(
+    x: float,
+    y: float,
+    *,
+    from_crs: str = EPSG_3857,
+    to_crs: str = EPSG_25832,
+    backend: str = BACKEND_PYPROJ,
+    cache: bool | TransformCache = False,
+) -> tuple[float, float]:
     """Transform a single (x, y) coordinate between two CRS.
 
     Parameters
     - x, y: coordinates in the source CRS
     - from_crs: CRS identifier like "EPSG:3857"
     - to_crs: CRS identifier like "EPSG:25832"
+    - backend: "pyproj" (default, any CRS) or "builtin" (EPSG:4326/25832/3857 only)
+    - cache: True to memoize in the shared :data:`transform_cache`, or a
+      :class:`TransformCache` of your own
     """
 
+    if cache is not False:
+        memo = transform_cache if cache is True else cache
+        return memo.transform_xy(x, y, from_crs=from_crs, to_crs=to_crs, backend=backend)
+
+    if _check_backend(backend) == BACKEND_BUILTIN:
+        tx, ty = _builtin_transform(float(x), float(y), from_crs, to_crs, _MATH)
+        return float(tx), float(ty)
+
     transformer = _get_transformer(from_crs, to_crs)
     tx, ty = transformer.transform(x, y)
     return float(tx), float(ty)
@@ -89,35 +135,535 @@ def transform_many(
     *,
     from_crs: str = EPSG_3857,
     to_crs: str = EPSG_25832,
+    backend: str = BACKEND_PYPROJ,
 ) -> tuple[list[float], list[float]]:
     """Transform many points.
 
     Returns two lists: (xs_out, ys_out).
+
+    Tip: for large batches (thousands of agents per tick) use
+    :func:`transform_arrays`, which avoids building Python lists.
     """
 
-    transformer = _get_transformer(from_crs, to_crs)
-    xs_out: list[float] = []
-    ys_out: list[float] = []
+    in_x: list[float] = []
+    in_y: list[float] = []
     for x, y in zip(xs, ys, strict=False):
-        tx, ty = transformer.transform(x, y)
-        xs_out.append(float(tx))
-        ys_out.append(float(ty))
-    return xs_out, ys_out
+        in_x.append(float(x))
+        in_y.append(float(y))
+    if not in_x:
+        return [], []
+
+    if _check_backend(backend) == BACKEND_BUILTIN:
+        xs_out: list[float] = []
+        ys_out: list[float] = []
+        for x, y in zip(in_x, in_y):
+            tx, ty = _builtin_transform(x, y, from_crs, to_crs, _MATH)
+            xs_out.append(tx)
+            ys_out.append(ty)
+        return xs_out, ys_out
+
+    # One pyproj call for the whole batch is much cheaper than one call per point.
+    transformer = _get_transformer(from_crs, to_crs)
+    tx, ty = transformer.transform(in_x, in_y)
+    return [float(v) for v in tx], [float(v) for v in ty]
+
+
+def transform_arrays(
+    xs: Any,
+    ys: Any,
+    *,
+    from_crs: str = EPSG_3857,
+    to_crs: str = EPSG_25832,
+    out_x: Any = None,
+    out_y: Any = None,
+    backend: str = BACKEND_PYPROJ,
+    workers: int | None = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Transform arrays of points in a single pyproj call (array in, array out).
+
+    Parameters
+    - xs, ys: NumPy arrays or buffer-protocol objects of floats
+      (e.g. `array.array("d", ...)`), same length
+    - out_x, out_y: optional writable float64 buffers to write the results into
+      (e.g. arrays you reuse every simulation tick)
+    - backend: "pyproj" (default) or "builtin" (vectorised NumPy, no pyproj)
+    - workers: split large arrays into this many chunks transformed on a
+      shared thread pool (None = one per CPU core). PROJ and NumPy release
+      the GIL, so this uses several cores.
+
+    Returns
+    - (xs_out, ys_out) as float64 NumPy arrays. When `out_x`/`out_y` are given,
+      the returned arrays are views of those buffers.
+
+    Requires NumPy (installed with the `geo` extra).
+    """
+
+    np = _require_numpy()
+    x = np.asarray(xs, dtype=np.float64)
+    y = np.asarray(ys, dtype=np.float64)
+    if x.shape != y.shape:
+        raise ValueError(f"xs and ys must have the same shape, got {x.shape} and {y.shape}")
+
+    res_x = _output_buffer(np, out_x, x, "out_x")
+    res_y = _output_buffer(np, out_y, y, "out_y")
+    if res_x.size == 0:
+        return res_x, res_y
+    _check_backend(backend)
+
+    n_chunks = min(workers or os.cpu_count() or 1, -(-res_x.size // _MIN_PARALLEL_CHUNK))
+    if n_chunks <= 1:
+        _transform_inplace(np, res_x, res_y, from_crs, to_crs, backend)
+        return res_x, res_y
+
+    # Contiguous views of the output buffers: each thread fills its own slice.
+    flat_x, flat_y = res_x.reshape(-1), res_y.reshape(-1)
+    bounds = np.linspace(0, flat_x.size, n_chunks + 1).astype(int)
+    pool = _thread_pool()
+    futures = [
+        pool.submit(_transform_inplace, np, flat_x[a:b], flat_y[a:b], from_crs, to_crs, backend)
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+    for future in futures:
+        future.result()
+    return res_x, res_y
+
+
+def _transform_inplace(np: Any, x: np.ndarray, y: np.ndarray, from_crs: str, to_crs: str, backend: str) -> None:
+    """Transform float64 arrays `x`, `y` in place."""
+
+    if backend == BACKEND_BUILTIN:
+        tx, ty = _builtin_transform(x, y, from_crs, to_crs, _numpy_math(np))
+        np.copyto(x, tx)
+        np.copyto(y, ty)
+        return
+
+    # `inplace=True` lets PROJ write straight into our buffers, so the only
+    # copy is the one from the inputs into the outputs.
+    _get_transformer(from_crs, to_crs).transform(x, y, inplace=True)
+
+
+# Arrays smaller than this per worker are not worth splitting.
+_MIN_PARALLEL_CHUNK = 20_000
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _thread_pool():
+    """The shared thread pool for `transform_arrays(..., workers=...)`, created on first use."""
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Imported here: concurrent.futures is slow to import and rarely needed.
+            from concurrent.futures import ThreadPoolExecutor
+
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="geo-transform")
+        return _pool
+
+
+def _output_buffer(np: Any, out: Any, values: np.ndarray, name: str) -> np.ndarray:
+    """Copy `values` into a writable float64 array (the caller's `out` if given)."""
+
+    if out is None:
+        return np.array(values, dtype=np.float64, order="C", copy=True)
+
+    res = np.asarray(out)
+    if res.dtype != np.float64 or not res.flags.c_contiguous or not res.flags.writeable:
+        raise ValueError(f"{name} must be a writable, contiguous float64 buffer")
+    if res.shape != values.shape:
+        raise ValueError(f"{name} has shape {res.shape}, expected {values.shape}")
+    np.copyto(res, values)
+    return res
+
+
+def _require_numpy():
+    """Import NumPy lazily with a friendly error message."""
+
+    try:
+        import numpy as np  # type: ignore[import-not-found]
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(
+            "numpy is required for array transforms in simulated_city.geo. "
+            "Install it with `pip install -e \".[geo]\"` (or `pip install numpy`)."
+        ) from e
+    return np
+
+
+# pyproj Transformers carry PROJ state and must not be used by two threads at
+# once, so every thread gets its own (created on first use, then reused).
+_local = threading.local()
+_MAX_TRANSFORMERS_PER_THREAD = 32
 
 
-@lru_cache(maxsize=32)
 def _get_transformer(from_crs: str, to_crs: str):
-    """Return a cached pyproj Transformer.
+    """Return a pyproj Transformer cached for the calling thread.
 
     The `always_xy=True` setting forces consistent axis ordering (x, y).
     """
 
+    cache = getattr(_local, "transformers", None)
+    if cache is None:
+        cache = _local.transformers = OrderedDict()
+    key = (from_crs, to_crs)
+    transformer = cache.get(key)
+    if transformer is None:
+        pyproj = _require_pyproj()
+        transformer = pyproj.Transformer.from_crs(_get_crs(from_crs), _get_crs(to_crs), always_xy=True)
+        cache[key] = transformer
+        if len(cache) > _MAX_TRANSFORMERS_PER_THREAD:
+            cache.popitem(last=False)
+    return transformer
+
+
+@lru_cache(maxsize=32)
+def _get_crs(user_input: str):
+    """Parse a CRS once for all threads (CRS objects are immutable and thread-safe)."""
+
+    return _require_pyproj().CRS.from_user_input(user_input)
+
+
+def _require_pyproj():
+    """Import pyproj lazily with a friendly error message."""
+
     try:
-        from pyproj import CRS, Transformer  # type: ignore[import-not-found]
+        import pyproj  # type: ignore[import-not-found]
     except ModuleNotFoundError as e:
         raise ModuleNotFoundError(
             "pyproj is required for simulated_city.geo coordinate transforms. "
             "Install it with `pip install -e \".[geo]\"` (or `pip install pyproj`)."
         ) from e
+    return pyproj
+
+
+def _check_backend(backend: str) -> str:
+    if backend not in (BACKEND_PYPROJ, BACKEND_BUILTIN):
+        raise ValueError(f"Unknown geo backend {backend!r}. Use {BACKEND_PYPROJ!r} or {BACKEND_BUILTIN!r}.")
+    return backend
+
+
+# --- Result cache ------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class TransformCacheStats:
+    """Snapshot of a :class:`TransformCache`'s counters."""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int  # LRU entries
+    pinned: int  # pinned entries (never evicted)
+
+
+class TransformCache:
+    """Memoize point transforms, keyed on (CRS pair, backend, quantised x, quantised y).
+
+    Static things (bins, stops, buildings) are reprojected with the same input
+    over and over, e.g. every time a map is redrawn. A cache hit is a dict
+    lookup instead of a PROJ call.
+
+    Inputs are rounded to `degree_quantum` (EPSG:4326 input) or `metre_quantum`
+    (projected input) to form the key, so points closer together than that
+    share one result. The defaults (1e-7 degrees, 1 mm) are around a centimetre.
+
+    At most `max_size` recent results are kept (least recently used are
+    evicted first). Entries added with :meth:`pin` are never evicted. Safe to
+    use from several threads.
+    """
+
+    def __init__(self, max_size: int = 100_000, *, degree_quantum: float = 1e-7, metre_quantum: float = 1e-3):
+        if max_size < 0:
+            raise ValueError("max_size must not be negative")
+        if degree_quantum <= 0 or metre_quantum <= 0:
+            raise ValueError("quantum must be positive")
+        self.max_size = max_size
+        self.degree_quantum = degree_quantum
+        self.metre_quantum = metre_quantum
+        self._lru: OrderedDict[tuple, tuple[float, float]] = OrderedDict()
+        self._pinned: dict[tuple, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def transform_xy(
+        self,
+        x: float,
+        y: float,
+        *,
+        from_crs: str = EPSG_3857,
+        to_crs: str = EPSG_25832,
+        backend: str = BACKEND_PYPROJ,
+    ) -> tuple[float, float]:
+        """Like :func:`transform_xy`, served from the cache when possible."""
+
+        key = self._key(x, y, from_crs, to_crs, backend)
+        if key is None:  # NaN / inf: not cacheable
+            return transform_xy(x, y, from_crs=from_crs, to_crs=to_crs, backend=backend)
+        with self._lock:
+            result = self._pinned.get(key)
+            if result is None:
+                result = self._lru.get(key)
+                if result is not None:
+                    self._lru.move_to_end(key)
+            if result is not None:
+                self._hits += 1
+                return result
+            self._misses += 1
+
+        # Transform outside the lock; a concurrent miss on the same key just
+        # computes the same value twice.
+        result = transform_xy(x, y, from_crs=from_crs, to_crs=to_crs, backend=backend)
+        if self.max_size:
+            with self._lock:
+                self._lru[key] = result
+                self._lru.move_to_end(key)
+                while len(self._lru) > self.max_size:
+                    self._lru.popitem(last=False)
+                    self._evictions += 1
+        return result
+
+    def wgs2utm(self, lat: float, lon: float, *, backend: str = BACKEND_PYPROJ) -> tuple[float, float]:
+        """Cached :func:`wgs2utm`."""
+
+        return self.transform_xy(lon, lat, from_crs=EPSG_4326, to_crs=EPSG_25832, backend=backend)
+
+    def utm2wgs(self, easting: float, northing: float, *, backend: str = BACKEND_PYPROJ) -> tuple[float, float]:
+        """Cached :func:`utm2wgs`."""
+
+        lon, lat = self.transform_xy(easting, northing, from_crs=EPSG_25832, to_crs=EPSG_4326, backend=backend)
+        return lat, lon
+
+    def pin(
+        self,
+        xs: Iterable[float],
+        ys: Iterable[float],
+        *,
+        from_crs: str = EPSG_3857,
+        to_crs: str = EPSG_25832,
+        backend: str = BACKEND_PYPROJ,
+    ) -> tuple[list[float], list[float]]:
+        """Precompute a static set of points in one bulk call and keep them cached for good.
+
+        Returns the transformed points, like :func:`transform_many`.
+        """
+
+        in_x = [float(v) for v in xs]
+        in_y = [float(v) for v in ys]
+        out_x, out_y = transform_many(in_x, in_y, from_crs=from_crs, to_crs=to_crs, backend=backend)
+        with self._lock:
+            for x, y, tx, ty in zip(in_x, in_y, out_x, out_y):
+                key = self._key(x, y, from_crs, to_crs, backend)
+                if key is not None:
+                    self._pinned[key] = (tx, ty)
+                    self._lru.pop(key, None)
+        return out_x, out_y
+
+    def clear(self, *, pinned: bool = False) -> None:
+        """Drop cached results (and pinned ones too, if `pinned=True`) and reset the counters."""
+
+        with self._lock:
+            self._lru.clear()
+            if pinned:
+                self._pinned.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> TransformCacheStats:
+        """Return the current counters."""
+
+        with self._lock:
+            return TransformCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._lru),
+                pinned=len(self._pinned),
+            )
+
+    def _key(self, x: float, y: float, from_crs: str, to_crs: str, backend: str) -> tuple | None:
+        x, y = float(x), float(y)
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return None
+        src = str(from_crs).upper()
+        q = self.degree_quantum if src == EPSG_4326 else self.metre_quantum
+        return (src, str(to_crs).upper(), backend, round(x / q), round(y / q))
+
+
+# Shared cache used by `transform_xy(..., cache=True)` (and wgs2utm / utm2wgs).
+transform_cache = TransformCache()
+
+
+# --- Built-in engine (no pyproj) -------------------------------------------
+#
+# The functions below are written against a tiny "math namespace" so the same
+# formulas run on Python floats (`math`) and on NumPy arrays (`numpy`).
+
+_MATH = SimpleNamespace(
+    sin=math.sin,
+    cos=math.cos,
+    tan=math.tan,
+    atan=math.atan,
+    atan2=math.atan2,
+    sinh=math.sinh,
+    cosh=math.cosh,
+    asinh=math.asinh,
+    atanh=math.atanh,
+    sqrt=math.sqrt,
+    hypot=math.hypot,
+    radians=math.radians,
+    degrees=math.degrees,
+)
+
+
+def _numpy_math(np: Any) -> SimpleNamespace:
+    return SimpleNamespace(
+        sin=np.sin,
+        cos=np.cos,
+        tan=np.tan,
+        atan=np.arctan,
+        atan2=np.arctan2,
+        sinh=np.sinh,
+        cosh=np.cosh,
+        asinh=np.arcsinh,
+        atanh=np.arctanh,
+        sqrt=np.sqrt,
+        hypot=np.hypot,
+        radians=np.radians,
+        degrees=np.degrees,
+    )
+
+
+# EPSG:25832 is defined on the GRS80 ellipsoid. (pyproj treats ETRS89 and
+# WGS84 as identical at this accuracy, and so do we.)
+_GRS80_A = 6378137.0
+_GRS80_F = 1 / 298.257222101
+_UTM32_LON0 = 9.0
+_UTM_K0 = 0.9996
+_UTM_FALSE_EASTING = 500000.0
+# EPSG:3857 projects WGS84 lat/lon onto a sphere with the WGS84 semi-major axis.
+_WEBMERCATOR_R = 6378137.0
+
+
+def _krueger_coefficients(a: float, f: float) -> tuple[float, float, tuple[float, ...], tuple[float, ...]]:
+    """Return (e, A, alpha, beta) for the 6th-order Krüger series (Karney 2011)."""
+
+    n = f / (2 - f)
+    n2, n3, n4, n5, n6 = n**2, n**3, n**4, n**5, n**6
+    e = math.sqrt(f * (2 - f))
+    # Rectifying radius.
+    big_a = a / (1 + n) * (1 + n2 / 4 + n4 / 64 + n6 / 256)
+    alpha = (
+        n / 2 - 2 * n2 / 3 + 5 * n3 / 16 + 41 * n4 / 180 - 127 * n5 / 288 + 7891 * n6 / 37800,
+        13 * n2 / 48 - 3 * n3 / 5 + 557 * n4 / 1440 + 281 * n5 / 630 - 1983433 * n6 / 1935360,
+        61 * n3 / 240 - 103 * n4 / 140 + 15061 * n5 / 26880 + 167603 * n6 / 181440,
+        49561 * n4 / 161280 - 179 * n5 / 168 + 6601661 * n6 / 7257600,
+        34729 * n5 / 80640 - 3418889 * n6 / 1995840,
+        212378941 * n6 / 319334400,
+    )
+    beta = (
+        n / 2 - 2 * n2 / 3 + 37 * n3 / 96 - n4 / 360 - 81 * n5 / 512 + 96199 * n6 / 604800,
+        n2 / 48 + n3 / 15 - 437 * n4 / 1440 + 46 * n5 / 105 - 1118711 * n6 / 3870720,
+        17 * n3 / 480 - 37 * n4 / 840 - 209 * n5 / 4480 + 5569 * n6 / 90720,
+        4397 * n4 / 161280 - 11 * n5 / 504 - 830251 * n6 / 7257600,
+        4583 * n5 / 161280 - 108847 * n6 / 3991680,
+        20648693 * n6 / 638668800,
+    )
+    return e, big_a, alpha, beta
+
+
+_TM_E, _TM_A, _TM_ALPHA, _TM_BETA = _krueger_coefficients(_GRS80_A, _GRS80_F)
+
+
+def _conformal_tau(tau: Any, m: SimpleNamespace) -> Any:
+    """Map tan(geodetic latitude) to tan(conformal latitude)."""
+
+    sigma = m.sinh(_TM_E * m.atanh(_TM_E * tau / m.sqrt(1 + tau * tau)))
+    return tau * m.sqrt(1 + sigma * sigma) - sigma * m.sqrt(1 + tau * tau)
+
+
+def _lonlat_to_utm32(lon: Any, lat: Any, m: SimpleNamespace) -> tuple[Any, Any]:
+    lam = m.radians(lon - _UTM32_LON0)
+    taup = _conformal_tau(m.tan(m.radians(lat)), m)
+    cos_lam = m.cos(lam)
+    xip = m.atan2(taup, cos_lam)
+    etap = m.asinh(m.sin(lam) / m.hypot(taup, cos_lam))
+
+    xi = xip
+    eta = etap
+    for j, a_j in enumerate(_TM_ALPHA, start=1):
+        xi = xi + a_j * m.sin(2 * j * xip) * m.cosh(2 * j * etap)
+        eta = eta + a_j * m.cos(2 * j * xip) * m.sinh(2 * j * etap)
+
+    k0_a = _UTM_K0 * _TM_A
+    return _UTM_FALSE_EASTING + k0_a * eta, k0_a * xi
+
+
+def _utm32_to_lonlat(easting: Any, northing: Any, m: SimpleNamespace) -> tuple[Any, Any]:
+    k0_a = _UTM_K0 * _TM_A
+    xi = northing / k0_a
+    eta = (easting - _UTM_FALSE_EASTING) / k0_a
+
+    xip = xi
+    etap = eta
+    for j, b_j in enumerate(_TM_BETA, start=1):
+        xip = xip - b_j * m.sin(2 * j * xi) * m.cosh(2 * j * eta)
+        etap = etap - b_j * m.cos(2 * j * xi) * m.sinh(2 * j * eta)
+
+    sinh_etap = m.sinh(etap)
+    cos_xip = m.cos(xip)
+    taup = m.sin(xip) / m.hypot(sinh_etap, cos_xip)
+    lam = m.atan2(sinh_etap, cos_xip)
+
+    # Invert the conformal latitude with a few Newton steps. A fixed number of
+    # iterations keeps the code branch-free for arrays; 5 is far more than needed.
+    e2 = _TM_E * _TM_E
+    tau = taup
+    for _ in range(5):
+        taui = _conformal_tau(tau, m)
+        tau = tau + (taup - taui) / m.sqrt(1 + taui * taui) * (1 + (1 - e2) * tau * tau) / (
+            (1 - e2) * m.sqrt(1 + tau * tau)
+        )
+
+    return _UTM32_LON0 + m.degrees(lam), m.degrees(m.atan(tau))
+
+
+def _lonlat_to_webmercator(lon: Any, lat: Any, m: SimpleNamespace) -> tuple[Any, Any]:
+    return _WEBMERCATOR_R * m.radians(lon), _WEBMERCATOR_R * m.asinh(m.tan(m.radians(lat)))
+
+
+def _webmercator_to_lonlat(x: Any, y: Any, m: SimpleNamespace) -> tuple[Any, Any]:
+    return m.degrees(x / _WEBMERCATOR_R), m.degrees(m.atan(m.sinh(y / _WEBMERCATOR_R)))
+
+
+def _lonlat_identity(x: Any, y: Any, m: SimpleNamespace) -> tuple[Any, Any]:
+    return x, y
+
+
+_BUILTIN_TO_LONLAT = {
+    EPSG_4326: _lonlat_identity,
+    EPSG_25832: _utm32_to_lonlat,
+    EPSG_3857: _webmercator_to_lonlat,
+}
+_BUILTIN_FROM_LONLAT = {
+    EPSG_4326: _lonlat_identity,
+    EPSG_25832: _lonlat_to_utm32,
+    EPSG_3857: _lonlat_to_webmercator,
+}
+
+
+def _builtin_transform(x: Any, y: Any, from_crs: str, to_crs: str, m: SimpleNamespace) -> tuple[Any, Any]:
+    """Transform with the built-in engine by going through WGS84 lon/lat."""
+
+    src = str(from_crs).upper()
+    dst = str(to_crs).upper()
+    if src not in _BUILTIN_TO_LONLAT or dst not in _BUILTIN_FROM_LONLAT:
+        supported = ", ".join(sorted(_BUILTIN_TO_LONLAT))
+        raise ValueError(
+            f"The builtin geo backend supports {supported} only (got {from_crs} -> {to_crs}). "
+            f"Use backend={BACKEND_PYPROJ!r} for other CRSs."
+        )
+    if src == dst:
+        return x, y
 
-    return Transformer.from_crs(CRS.from_user_input(from_crs), CRS.from_user_input(to_crs), always_xy=True)
+    lon, lat = _BUILTIN_TO_LONLAT[src](x, y, m)
+    return _BUILTIN_FROM_LONLAT[dst](lon, lat, m)
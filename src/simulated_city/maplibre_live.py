@@ -8,20 +8,47 @@ Implementation approach:
   a set of JS methods (addMarker/removeMarker/animateAlongRoute/...)
 - For live updates we add a new JS method `moveMarker` that updates an existing
   marker in-place via `marker.setLngLat([lng, lat])` (or creates it if missing).
+- For many markers per frame, `move_markers()` sends *one* custom widget message
+  per batch. Coordinates travel as a packed little-endian Float64 binary buffer
+  (not JSON), and the list of marker ids is only re-sent when it changes.
+- DOM markers stop scaling after a few thousand points. `update_agents()` draws
+  agents as one GeoJSON source with a circle layer instead, and only sends the
+  per-frame diff (added / moved / removed agents) as binary buffers.
+- Feeds often update faster than the browser draws. `RenderScheduler` buffers
+  updates, keeps the latest position per id, and flushes at most `max_fps`
+  times per second.
+- With `duration_ms=...`, markers glide from their previous to their new
+  position in the browser (`requestAnimationFrame`), so coarse simulation ticks
+  still look smooth without publishing more often.
 
 We avoid patching the installed bundle on disk by generating a patched ESM file
-in a temp directory at runtime and pointing the widget instance at it.
+in a per-user cache directory and pointing the widget instance at it. The copy
+is keyed by a hash of the original bundle, written atomically, and reused
+across kernel restarts.
 
 This keeps workshop code self-contained and works in Jupyter/VS Code notebooks.
 """
 
 from __future__ import annotations
 
+from array import array
+import getpass
+import hashlib
 import importlib.metadata
+import json
+import logging
+import os
 import re
+import stat
+import sys
 import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MarkerBatch = Union[Mapping[str, Tuple[float, float]], Iterable[Tuple[str, Tuple[float, float]]]]
 
 
 def _require_anymap_ts():
@@ -60,39 +87,287 @@ def _inject_renderer_binding(content: str) -> str:
 	return content[: match.start()] + injection + export_block + content[match.end() :]
 
 
-def _patched_maplibre_esm_path() -> Path:
-	"""Return a Path to a patched `maplibre.js` ESM file.
+def _pack_marker_batch(positions: MarkerBatch) -> Tuple[List[str], bytes]:
+	"""Split a marker batch into ids and interleaved little-endian float64 `lng, lat` bytes."""
+	items = positions.items() if isinstance(positions, Mapping) else positions
+	ids: List[str] = []
+	coords = array("d")
+	for marker_id, (lng, lat) in items:
+		ids.append(str(marker_id))
+		coords.append(float(lng))
+		coords.append(float(lat))
+	if sys.byteorder != "little":  # pragma: no cover
+		coords.byteswap()
+	return ids, coords.tobytes()
+
+
+class _AgentLayerState:
+	"""Python-side mirror of one agent layer; turns full frames into diffs.
+
+	Each agent id gets a numeric slot (reused after removal). A diff is sent as
+	JSON `{"added": [ids...]}` plus five little-endian binary buffers: added slots
+	(uint32), added coords (float64 lng/lat pairs), moved slots, moved coords and
+	removed slots.
+	"""
+
+	def __init__(self, name: str, paint: Dict[str, object]):
+		self.name = name
+		self.paint = paint
+		self.slots: Dict[str, int] = {}
+		self.coords = array("d")
+		self.free: List[int] = []
+		self.seq = 0
+		self.needs_reset = True
+
+	def diff(self, positions: MarkerBatch, *, remove_missing: bool = True) -> Optional[Tuple[dict, List[bytes]]]:
+		"""Apply `positions` and return `(content, buffers)`, or None if nothing changed."""
+		items = positions.items() if isinstance(positions, Mapping) else positions
+		added_ids: List[str] = []
+		added_slots, added_xy = array("I"), array("d")
+		moved_slots, moved_xy = array("I"), array("d")
+		seen = set() if remove_missing else None
+
+		coords = self.coords
+		for marker_id, (lng, lat) in items:
+			marker_id = str(marker_id)
+			lng, lat = float(lng), float(lat)
+			if seen is not None:
+				seen.add(marker_id)
+			slot = self.slots.get(marker_id)
+			if slot is None:
+				slot = self._new_slot(marker_id)
+				added_ids.append(marker_id)
+				added_slots.append(slot)
+				added_xy.extend((lng, lat))
+			elif coords[2 * slot] != lng or coords[2 * slot + 1] != lat:
+				moved_slots.append(slot)
+				moved_xy.extend((lng, lat))
+			coords[2 * slot] = lng
+			coords[2 * slot + 1] = lat
+
+		removed_slots = array("I")
+		if seen is not None and len(seen) != len(self.slots):
+			removed_slots = self._remove([marker_id for marker_id in self.slots if marker_id not in seen])
+		return self._message(added_ids, added_slots, added_xy, moved_slots, moved_xy, removed_slots)
+
+	def remove(self, ids: Iterable[str]) -> Optional[Tuple[dict, List[bytes]]]:
+		"""Forget `ids` and return the diff that removes them."""
+		removed_slots = self._remove([str(marker_id) for marker_id in ids if str(marker_id) in self.slots])
+		return self._message([], array("I"), array("d"), array("I"), array("d"), removed_slots)
+
+	def _new_slot(self, marker_id: str) -> int:
+		if self.free:
+			slot = self.free.pop()
+		else:
+			slot = len(self.coords) // 2
+			self.coords.extend((0.0, 0.0))
+		self.slots[marker_id] = slot
+		return slot
+
+	def _remove(self, ids: List[str]) -> array:
+		removed = array("I", (self.slots.pop(marker_id) for marker_id in ids))
+		self.free.extend(removed)
+		return removed
+
+	def _message(self, added_ids, added_slots, added_xy, moved_slots, moved_xy, removed_slots):
+		reset = self.needs_reset
+		if reset:
+			# Full frame: every current agent is "added" into an empty layer.
+			self.needs_reset = False
+			added_ids = list(self.slots)
+			added_slots = array("I", self.slots.values())
+			added_xy = array("d")
+			for slot in added_slots:
+				added_xy.extend((self.coords[2 * slot], self.coords[2 * slot + 1]))
+			moved_slots, moved_xy, removed_slots = array("I"), array("d"), array("I")
+		elif not (added_ids or moved_slots or removed_slots):
+			return None
+
+		self.seq += 1
+		content = {"type": "anymap:agents", "layer": self.name, "seq": self.seq, "reset": reset, "added": added_ids}
+		buffers = [added_slots, added_xy, moved_slots, moved_xy, removed_slots]
+		if sys.byteorder != "little":  # pragma: no cover
+			for buf in buffers:
+				buf.byteswap()
+		return content, [buf.tobytes() for buf in buffers]
+
+
+# IMPORTANT: bump this when changing the injected JS patch.
+_PATCH_ID = "marker_interpolation_v8"
+
+# Keep at most this many bytes of patched bundles (old anymap-ts / patch versions).
+_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_CACHE_INDEX = "index.json"
+
+# Per-process memo: bundle stamp -> patched path (or in-memory source).
+_PATCHED_PATHS: Dict[str, Union[Path, str]] = {}
+
+
+def _user_cache_dir() -> Path:
+	"""Per-user cache directory (override with `SIMULATED_CITY_CACHE_DIR`)."""
+	override = os.environ.get("SIMULATED_CITY_CACHE_DIR")
+	if override:
+		return Path(override).expanduser()
+	if sys.platform == "win32":
+		base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+	elif sys.platform == "darwin":
+		base = Path.home() / "Library" / "Caches"
+	else:
+		base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+	return base / "simulated-city"
+
+
+def _fallback_cache_dir() -> Optional[Path]:
+	"""Per-user cache directory in the temp dir, or None if it isn't private.
+
+	Used when the home directory is read-only. The temp dir is shared, so
+	another local user could create our directory first and plant a bundle
+	in it: only use it if we own it and nobody else can write to it.
+	"""
+	user = str(os.getuid()) if hasattr(os, "getuid") else getpass.getuser()
+	path = Path(tempfile.gettempdir()) / f"simulated-city-{user}"
+	try:
+		path.mkdir(exist_ok=True, mode=0o700)
+		if not hasattr(os, "getuid"):  # pragma: no cover - Windows temp dirs are per-user
+			return path
+		info = path.lstat()  # lstat: a planted symlink is not our directory
+	except OSError:
+		return None
+	if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+		return None
+	return path
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+	"""Write via a temp file + rename, so readers never see a partial file."""
+	fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(data)
+		os.replace(tmp, path)
+	except BaseException:
+		try:
+			os.unlink(tmp)
+		except OSError:
+			pass
+		raise
+
+
+def _read_index(cache_dir: Path) -> Dict[str, str]:
+	try:
+		return json.loads((cache_dir / _CACHE_INDEX).read_text(encoding="utf-8"))
+	except (OSError, ValueError):
+		return {}
+
+
+def _evict_old_bundles(cache_dir: Path, keep: Path, max_bytes: int) -> None:
+	"""Delete the least recently used bundles until the cache fits in `max_bytes`."""
+	entries = []
+	for path in cache_dir.glob("maplibre-*.js"):
+		try:
+			st = path.stat()
+		except OSError:
+			continue
+		entries.append((st.st_mtime, st.st_size, path))
+	total = sum(size for _mtime, size, _path in entries)
+	for _mtime, size, path in sorted(entries):
+		if total <= max_bytes:
+			break
+		if path == keep:
+			continue
+		try:
+			path.unlink()
+			total -= size
+		except OSError:
+			pass
+
+
+def _patched_bundle_path(
+	orig_path: Path,
+	cache_dir: Path,
+	*,
+	stamp: str = "",
+	max_bytes: int = _CACHE_MAX_BYTES,
+) -> Path:
+	"""Return the cached patched copy of `orig_path`, creating it if needed.
+
+	Bundles are stored as `maplibre-<patch id>-<sha256 of the original>.js`, so
+	identical bundles share one file no matter where they were installed. The
+	small index maps `stamp` (version/size/mtime) to that name, so a warm start
+	does not even have to read and hash the original bundle.
+	"""
+	index = _read_index(cache_dir)
+	name = index.get(stamp) if stamp else None
+	if name:
+		cached = cache_dir / name
+		if cached.exists():
+			try:
+				os.utime(cached)  # mark as recently used for eviction
+			except OSError:
+				pass
+			return cached
+
+	raw = orig_path.read_bytes()
+	digest = hashlib.sha256(raw).hexdigest()[:32]
+	out_path = cache_dir / f"maplibre-{_PATCH_ID}-{digest}.js"
+	if not out_path.exists():
+		content = _patch_bundle(raw.decode("utf-8"))
+		if content is None:
+			return orig_path
+		cache_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+		_atomic_write(out_path, content.encode("utf-8"))
+		_evict_old_bundles(cache_dir, out_path, max_bytes)
+
+	if stamp:
+		index = {key: value for key, value in _read_index(cache_dir).items() if (cache_dir / value).exists()}
+		index[stamp] = out_path.name
+		_atomic_write(cache_dir / _CACHE_INDEX, json.dumps(index, indent=1).encode("utf-8"))
+	return out_path
+
+
+def _patch_bundle(content: str) -> Optional[str]:
+	"""Return the patched bundle source, or None if `content` is already patched."""
+	if "__anymap_moveMarker_patched" in content or "anymap:moveMarkerAck" in content:
+		# Already patched (or upstream added an equivalent patch marker).
+		return None
+	return _inject_renderer_binding(content) + _PATCH_JS
+
+
+def _patched_maplibre_esm() -> Union[Path, str]:
+	"""Return a Path to a patched `maplibre.js` ESM file (or its source).
 
-	The patched file is generated once per anymap-ts version + source bundle stamp
-	(size/mtime) and stored in the OS temp directory.
+	The patched file lives in a per-user cache directory (see `_user_cache_dir`),
+	keyed by the hash of the original bundle and `_PATCH_ID`, so it is built once
+	and reused across kernel restarts. If no safe cache directory is writable,
+	the patched source is returned as a string instead.
 	"""
 	MapLibreMap, STATIC_DIR = _require_anymap_ts()
 	orig_path = STATIC_DIR / "maplibre.js"
-	stat = orig_path.stat()
+	st = orig_path.stat()
 	try:
 		anymap_version = importlib.metadata.version("anymap-ts")
 	except Exception:  # pragma: no cover
 		anymap_version = "unknown"
 
-	# IMPORTANT: bump this when changing the injected JS patch.
-	patch_id = "move_marker_v5_regex_export"
-
-	cache_name = (
-		f"anymap_ts_maplibre_patched_move_marker_"
-		f"{patch_id}_v{anymap_version}_s{stat.st_size}_m{stat.st_mtime_ns}.js"
-	)
-	out_path = Path(tempfile.gettempdir()) / cache_name
-	if out_path.exists():
-		return out_path
-
-	content = orig_path.read_text(encoding="utf-8")
-	if "__anymap_moveMarker_patched" in content or "anymap:moveMarkerAck" in content:
-		# Already patched (or upstream added an equivalent patch marker).
-		return orig_path
-
-	content = _inject_renderer_binding(content)
+	stamp = f"{_PATCH_ID}|{anymap_version}|{orig_path}|{st.st_size}|{st.st_mtime_ns}"
+	cached = _PATCHED_PATHS.get(stamp)
+	if cached is not None and (isinstance(cached, str) or cached.exists()):
+		return cached
 
-	patch_js = r"""
+	try:
+		esm: Union[Path, str] = _patched_bundle_path(orig_path, _user_cache_dir(), stamp=stamp)
+	except OSError:
+		fallback = _fallback_cache_dir()
+		if fallback is not None:
+			esm = _patched_bundle_path(orig_path, fallback, stamp=stamp)
+		else:
+			logger.warning("No private cache directory for the patched MapLibre bundle; patching in memory.")
+			esm = _patch_bundle(orig_path.read_text(encoding="utf-8")) or orig_path
+	_PATCHED_PATHS[stamp] = esm
+	return esm
+
+
+_PATCH_JS = r"""
 ;(()=>{
 	try{
 		const proto = (typeof MapLibreRenderer !== 'undefined' && MapLibreRenderer.prototype) ? MapLibreRenderer.prototype : null;
@@ -107,6 +382,165 @@ def _patched_maplibre_esm_path() -> Path:
 			}catch(_e){}
 		};
 
+		// Batched moves arrive as custom widget messages with a binary buffer.
+		const origSetupModelListeners = proto.setupModelListeners;
+		proto.setupModelListeners = function(){
+			origSetupModelListeners.call(this);
+			const onCustom = (msg, buffers) => {
+				if(!msg) return;
+				if(msg.type === "anymap:moveMarkers") this.handleMoveMarkers(msg, buffers);
+				else if(msg.type === "anymap:agentLayer") this.handleAgentLayer(msg);
+				else if(msg.type === "anymap:agents") this.handleAgents(msg, buffers);
+			};
+			this.model.on("msg:custom", onCustom);
+			if(Array.isArray(this.modelListeners)) this.modelListeners.push(() => this.model.off("msg:custom", onCustom));
+		};
+
+		const origProcessPendingCalls = proto.processPendingCalls;
+		proto.processPendingCalls = function(){
+			origProcessPendingCalls.call(this);
+			const pending = this.__anymap_pendingBatch;
+			this.__anymap_pendingBatch = null;
+			if(pending) this.handleMoveMarkers(pending.msg, pending.buffers);
+			if(this.__anymap_agents) for(const name of this.__anymap_agents.keys()) this.renderAgentLayer(name);
+		};
+
+		proto.sendMoveMarkerAck = function(data){
+			// Send a single ack per widget instance to avoid flooding `_js_events`.
+			if(this.__anymap_moveMarkerAckSent) return;
+			this.__anymap_moveMarkerAckSent = true;
+			try{ this.sendEvent && this.sendEvent("anymap:moveMarkerAck", data); }catch(_e){}
+		};
+
+		// Glide a marker from where it is now to (lng, lat) over `duration` ms.
+		// All animations of one map share a single requestAnimationFrame loop.
+		proto.animateMarkerTo = function(marker, lng, lat, duration){
+			if(!this.__anymap_anims) this.__anymap_anims = new Map();
+			if(!(duration > 0) || typeof requestAnimationFrame !== 'function'){
+				this.__anymap_anims.delete(marker);
+				marker.setLngLat([lng, lat]);
+				return;
+			}
+			// Start from the current (possibly mid-animation) position.
+			const from = marker.getLngLat();
+			this.__anymap_anims.set(marker, {x0: from.lng, y0: from.lat, x1: lng, y1: lat, t0: performance.now(), d: duration});
+			if(!this.__anymap_animFrame){
+				if(!this.__anymap_stepAnims) this.__anymap_stepAnims = (now) => this.stepMarkerAnimations(now);
+				this.__anymap_animFrame = requestAnimationFrame(this.__anymap_stepAnims);
+			}
+		};
+
+		proto.stepMarkerAnimations = function(now){
+			this.__anymap_animFrame = null;
+			for(const [marker, a] of this.__anymap_anims){
+				const t = Math.min(1, Math.max(0, (now - a.t0) / a.d));
+				marker.setLngLat([a.x0 + (a.x1 - a.x0) * t, a.y0 + (a.y1 - a.y0) * t]);
+				if(t >= 1) this.__anymap_anims.delete(marker);
+			}
+			if(this.__anymap_anims.size) this.__anymap_animFrame = requestAnimationFrame(this.__anymap_stepAnims);
+		};
+
+		proto.handleMoveMarkers = function(msg, buffers){
+			if(msg.ids){
+				// A new id layout: remember it for the following coordinate-only batches.
+				this.__anymap_batchLayout = msg.layout;
+				this.__anymap_batchIds = msg.ids;
+				this.__anymap_batchStyles = msg.styles || [];
+			}
+			if(!this.map || !this.isMapReady){
+				// Only the latest positions matter; apply them once the map is ready.
+				this.__anymap_pendingBatch = {msg: {layout: msg.layout, duration: msg.duration}, buffers};
+				return;
+			}
+			if(this.__anymap_batchLayout !== msg.layout){
+				try{ this.sendEvent && this.sendEvent("anymap:moveMarkersResync", {layout: msg.layout}); }catch(_e){}
+				return;
+			}
+			const buf = buffers && buffers[0];
+			if(!buf) return;
+			// DataView reads are alignment-safe; buffers may be DataView or ArrayBuffer.
+			const view = buf instanceof DataView ? buf : new DataView(buf.buffer || buf, buf.byteOffset || 0, buf.byteLength);
+			const ids = this.__anymap_batchIds;
+			const styles = this.__anymap_batchStyles;
+			const n = Math.min(ids.length, Math.floor(view.byteLength / 16));
+			for(let i = 0; i < n; i++){
+				const lng = view.getFloat64(16 * i, true);
+				const lat = view.getFloat64(16 * i + 8, true);
+				const existing = this.markersMap && this.markersMap.get(ids[i]);
+				if(existing){
+					this.animateMarkerTo(existing, lng, lat, msg.duration);
+				}else if(typeof this.handleAddMarker === 'function'){
+					const style = styles[i] || {};
+					this.handleAddMarker([lng, lat], {id: ids[i], color: style.color || undefined, popup: style.popup || undefined});
+				}
+			}
+			if(n > 0) this.sendMoveMarkerAck({id: ids[0], count: n});
+		};
+
+		// --- Agent layers: one GeoJSON source + circle layer per layer name. ---
+		// Agents live in numbered slots (assigned by Python) so diffs can refer to
+		// them with packed Uint32 indices instead of id strings.
+		const asView = (buf) => !buf ? new DataView(new ArrayBuffer(0))
+			: buf instanceof DataView ? buf : new DataView(buf.buffer || buf, buf.byteOffset || 0, buf.byteLength);
+
+		proto.handleAgentLayer = function(msg){
+			if(!this.__anymap_agents) this.__anymap_agents = new Map();
+			const st = this.__anymap_agents.get(msg.layer) || {seq: null, features: [], scheduled: false};
+			st.paint = msg.paint || {};
+			this.__anymap_agents.set(msg.layer, st);
+			if(this.map && this.map.getLayer && this.map.getLayer(msg.layer)){
+				for(const [key, value] of Object.entries(st.paint)) this.map.setPaintProperty(msg.layer, key, value);
+			}
+		};
+
+		proto.handleAgents = function(msg, buffers){
+			const st = this.__anymap_agents && this.__anymap_agents.get(msg.layer);
+			if(!st || (!msg.reset && st.seq !== msg.seq - 1)){
+				// This view missed the layer config or a diff: ask Python for a full frame.
+				if(st) st.seq = null;
+				try{ this.sendEvent && this.sendEvent("anymap:agentsResync", {layer: msg.layer}); }catch(_e){}
+				return;
+			}
+			st.seq = msg.seq;
+			if(msg.reset) st.features = [];
+			const bufs = buffers || [];
+			const addedSlots = asView(bufs[0]), addedXY = asView(bufs[1]);
+			const movedSlots = asView(bufs[2]), movedXY = asView(bufs[3]);
+			const removedSlots = asView(bufs[4]);
+			const added = msg.added || [];
+			for(let i = 0; i < added.length; i++){
+				const slot = addedSlots.getUint32(4 * i, true);
+				st.features[slot] = {type: "Feature", id: slot, properties: {id: added[i]},
+					geometry: {type: "Point", coordinates: [addedXY.getFloat64(16 * i, true), addedXY.getFloat64(16 * i + 8, true)]}};
+			}
+			for(let i = 0; i < movedSlots.byteLength / 4; i++){
+				const f = st.features[movedSlots.getUint32(4 * i, true)];
+				if(f) f.geometry.coordinates = [movedXY.getFloat64(16 * i, true), movedXY.getFloat64(16 * i + 8, true)];
+			}
+			for(let i = 0; i < removedSlots.byteLength / 4; i++){
+				st.features[removedSlots.getUint32(4 * i, true)] = null;
+			}
+			// Several diffs within one browser frame cause one setData().
+			if(!st.scheduled){
+				st.scheduled = true;
+				const raf = (typeof requestAnimationFrame === 'function') ? requestAnimationFrame : (cb) => setTimeout(cb, 16);
+				raf(() => { st.scheduled = false; this.renderAgentLayer(msg.layer); });
+			}
+		};
+
+		proto.renderAgentLayer = function(name){
+			const st = this.__anymap_agents && this.__anymap_agents.get(name);
+			if(!st || !this.map || !this.isMapReady) return;
+			const data = {type: "FeatureCollection", features: st.features.filter(Boolean)};
+			const source = this.map.getSource(name);
+			if(source){
+				source.setData(data);
+			}else{
+				this.map.addSource(name, {type: "geojson", data});
+				this.map.addLayer({id: name, type: "circle", source: name, paint: st.paint});
+			}
+		};
+
 		proto.handleMoveMarker = function(t,e){
 			if(!this.map) return;
 			let lng = null;
@@ -122,21 +556,14 @@ def _patched_maplibre_esm_path() -> Path:
 			}
 			const existing = this.markersMap && this.markersMap.get(id);
 			if(existing){
-				if(lng != null && lat != null) existing.setLngLat([lng, lat]);
-				// Send a single ack per widget instance to avoid flooding `_js_events`.
-				if(!this.__anymap_moveMarkerAckSent){
-					this.__anymap_moveMarkerAckSent = true;
-					try{ this.sendEvent && this.sendEvent("anymap:moveMarkerAck", {id, lng, lat}); }catch(_e){}
-				}
+				if(lng != null && lat != null) this.animateMarkerTo(existing, lng, lat, e.duration);
+				this.sendMoveMarkerAck({id, lng, lat});
 				return;
 			}
 			// Fall back to creating the marker using upstream logic.
 			if(typeof this.handleAddMarker === 'function'){
 				this.handleAddMarker(t, e || {id});
-				if(!this.__anymap_moveMarkerAckSent){
-					this.__anymap_moveMarkerAckSent = true;
-					try{ this.sendEvent && this.sendEvent("anymap:moveMarkerAck", {id, lng, lat}); }catch(_e){}
-				}
+				this.sendMoveMarkerAck({id, lng, lat});
 			}
 		};
 	}catch(err){
@@ -145,31 +572,172 @@ def _patched_maplibre_esm_path() -> Path:
 })();
 """
 
-	out_path.write_text(content + patch_js, encoding="utf-8")
-	return out_path
-
 
-class LiveMapLibreMap:  # populated below
-	pass
+class RenderScheduler:
+	"""Rate-limit live map updates to at most `max_fps` frames per second.
 
+	`move_marker()` only records the latest position per id (last value wins);
+	a background thread sends everything pending once per frame, as a single
+	`move_markers()` batch, or via `update_agents()` when `layer` is given.
+	Counters show how much the feed exceeds what is drawn:
 
-# Define the subclass only if anymap-ts is available.
-_MapLibreMap, _STATIC_DIR = None, None
-try:  # pragma: no cover
-	_MapLibreMap, _STATIC_DIR = _require_anymap_ts()
-except Exception:
-	_MapLibreMap = None
+	- `updates_count`: calls to `move_marker()`
+	- `coalesced_count`: updates replaced by a newer one before being sent
+	- `dropped_count`: updates rejected (after `close()`, or beyond `max_pending` ids)
+	- `frames_count` / `sent_count`: flushes that sent something / positions sent
+	"""
 
-if _MapLibreMap is not None:  # pragma: no cover
-	class LiveMapLibreMap(_MapLibreMap):
-		"""A MapLibreMap with a `move_marker()` method for incremental updates."""
+	def __init__(
+		self,
+		live_map,
+		*,
+		max_fps: Optional[float] = 30.0,
+		layer: Optional[str] = None,
+		max_pending: Optional[int] = None,
+	):
+		if max_fps is not None and max_fps <= 0:
+			raise ValueError("max_fps must be positive (or None to disable timed flushes)")
+		if max_pending is not None and max_pending < 1:
+			raise ValueError("max_pending must be at least 1")
+
+		self.map = live_map
+		self.max_fps = max_fps
+		self.layer = layer
+		self.max_pending = max_pending
+
+		# id -> (lng, lat, color, popup); insertion order = first update this frame.
+		self._pending: Dict[str, Tuple[float, float, Optional[str], Optional[str]]] = {}
+		self._lock = threading.Lock()
+		# Held across swap + send so a user flush and the timer flush can't
+		# interleave and draw an older position last.
+		self._flush_lock = threading.Lock()
+		self._closed = False
+
+		self.updates_count = 0
+		self.coalesced_count = 0
+		self.dropped_count = 0
+		self.frames_count = 0
+		self.sent_count = 0
+
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		if max_fps is not None:
+			self._thread = threading.Thread(target=self._flush_loop, name="render-scheduler", daemon=True)
+			self._thread.start()
+
+	@property
+	def pending_count(self) -> int:
+		"""Number of ids waiting for the next frame."""
+		with self._lock:
+			return len(self._pending)
+
+	def move_marker(
+		self,
+		marker_id: str,
+		lnglat: Tuple[float, float],
+		*,
+		color: Optional[str] = None,
+		popup: Optional[str] = None,
+	) -> bool:
+		"""Queue a position for the next frame. Returns False if the update was dropped."""
+		lng, lat = lnglat
+		with self._lock:
+			self.updates_count += 1
+			if self._closed:
+				self.dropped_count += 1
+				return False
+			previous = self._pending.get(marker_id)
+			if previous is not None:
+				self.coalesced_count += 1
+				# Keep a style change even if a newer plain move replaces it.
+				color = color if color is not None else previous[2]
+				popup = popup if popup is not None else previous[3]
+			elif self.max_pending is not None and len(self._pending) >= self.max_pending:
+				self.dropped_count += 1
+				return False
+			self._pending[marker_id] = (float(lng), float(lat), color, popup)
+			return True
+
+	def flush(self) -> int:
+		"""Send everything pending now. Returns the number of positions sent."""
+		with self._flush_lock:
+			with self._lock:
+				pending, self._pending = self._pending, {}
+			if not pending:
+				return 0
+
+			if self.layer is not None:
+				self.map.update_agents(
+					{marker_id: (lng, lat) for marker_id, (lng, lat, _c, _p) in pending.items()},
+					layer=self.layer,
+					remove_missing=False,
+				)
+			else:
+				batch = {}
+				for marker_id, (lng, lat, color, popup) in pending.items():
+					if color is None and popup is None:
+						batch[marker_id] = (lng, lat)
+					else:
+						# Style changes need the per-marker path.
+						self.map.move_marker(marker_id, (lng, lat), color=color, popup=popup)
+				if batch:
+					self.map.move_markers(batch)
+
+			with self._lock:
+				self.frames_count += 1
+				self.sent_count += len(pending)
+			return len(pending)
+
+	def close(self) -> None:
+		"""Stop the background thread and send anything still pending."""
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+		with self._lock:
+			self._closed = True
+		self.flush()
+
+	def __enter__(self) -> RenderScheduler:
+		return self
+
+	def __exit__(self, *exc_info) -> None:
+		self.close()
+
+	def _flush_loop(self) -> None:
+		interval = 1.0 / self.max_fps
+		while not self._stop.wait(interval):
+			try:
+				self.flush()
+			except Exception:
+				# Never let one failed frame stop the scheduler (or the simulation).
+				logger.exception("Error while flushing live map updates")
+
+
+def __getattr__(name: str):
+	# `LiveMapLibreMap` subclasses anymap-ts' MapLibreMap, so it is only defined
+	# on first access: importing this module stays cheap (and works without
+	# anymap-ts, e.g. to use `RenderScheduler` in tests).
+	if name == "LiveMapLibreMap":
+		cls = _define_live_map_class()
+		globals()[name] = cls
+		return cls
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _define_live_map_class():  # pragma: no cover
+	MapLibreMap, _static_dir = _require_anymap_ts()
+
+	class LiveMapLibreMap(MapLibreMap):
+		"""A MapLibreMap with `move_marker()` / `move_markers()` for incremental updates."""
 
 		def __init__(self, *args, **kwargs):
 			# anywidget expects `_esm` to contain JS *source*, not a filesystem path.
 			# Use FileContents so `str(self._esm)` resolves to the file contents.
 			from anywidget._file_contents import FileContents
 
-			self._esm = FileContents(_patched_maplibre_esm_path(), start_thread=False)
+			esm = _patched_maplibre_esm()
+			self._esm = FileContents(esm, start_thread=False) if isinstance(esm, Path) else esm
 			super().__init__(*args, **kwargs)
 
 			# `moveMarker` is a runtime-patched JS method; some notebook frontends or
@@ -178,12 +746,59 @@ if _MapLibreMap is not None:  # pragma: no cover
 			self._move_marker_supported: Optional[bool] = None
 			self._move_marker_ack_count: int = 0
 			self._marker_style: Dict[str, Dict[str, Optional[str]]] = {}
+			# Id order of the last batch sent by `move_markers()`; the frontend keeps
+			# it, so unchanged batches only carry coordinates.
+			self._batch_ids: Optional[List[str]] = None
+			self._batch_layout: int = 0
 
 			def _on_ack(_data):
 				self._move_marker_supported = True
 				self._move_marker_ack_count += 1
 
+			def _on_resync(_data):
+				# A (new) view missed the id list: send it with the next batch.
+				self._batch_ids = None
+
+			self._agent_layers: Dict[str, _AgentLayerState] = {}
+
+			def _on_agents_resync(data):
+				state = self._agent_layers.get((data or {}).get("layer"))
+				if state is not None:
+					state.needs_reset = True
+					self._send_agent_layer(state)
+					self._send_agent_diff(state.diff({}, remove_missing=False))
+
 			self.on_map_event("anymap:moveMarkerAck", _on_ack)
+			self.on_map_event("anymap:moveMarkersResync", _on_resync)
+			self.on_map_event("anymap:agentsResync", _on_agents_resync)
+
+		def _update_style(self, marker_id: str, color: Optional[str], popup: Optional[str]) -> Dict[str, Optional[str]]:
+			style = self._marker_style.get(marker_id, {"color": None, "popup": None})
+			if color is not None:
+				style["color"] = color
+			if popup is not None:
+				style["popup"] = popup
+			self._marker_style[marker_id] = style
+			return style
+
+		def _batch_style(self, marker_id: str, color: Optional[str]) -> Dict[str, Optional[str]]:
+			# `move_markers(color=...)` only styles markers it creates; existing ones keep theirs.
+			style = self._marker_style.get(marker_id)
+			return style if style is not None else self._update_style(marker_id, color, None)
+
+		def _fallback_move(self, marker_id: str, lng: float, lat: float, style: Dict[str, Optional[str]]) -> None:
+			try:
+				self.remove_marker(marker_id)
+				self.add_marker(
+					lng,
+					lat,
+					name=marker_id,
+					color=style.get("color") or "#3388ff",
+					popup=style.get("popup"),
+				)
+			except Exception:
+				# Never let UI updates crash a simulation loop.
+				pass
 
 		def move_marker(
 			self,
@@ -192,22 +807,23 @@ if _MapLibreMap is not None:  # pragma: no cover
 			*,
 			color: Optional[str] = None,
 			popup: Optional[str] = None,
+			duration_ms: Optional[float] = None,
 		) -> None:
-			"""Move an existing marker in-place (or create it if missing)."""
-			lng, lat = lnglat
+			"""Move an existing marker in-place (or create it if missing).
 
-			style = self._marker_style.get(marker_id, {"color": None, "popup": None})
-			if color is not None:
-				style["color"] = color
-			if popup is not None:
-				style["popup"] = popup
-			self._marker_style[marker_id] = style
+			With `duration_ms`, the browser animates the marker from its current
+			position to the new one over that many milliseconds.
+			"""
+			lng, lat = lnglat
+			style = self._update_style(marker_id, color, popup)
 
 			kwargs = {"id": marker_id}
 			if style.get("color") is not None:
 				kwargs["color"] = style["color"]
 			if style.get("popup") is not None:
 				kwargs["popup"] = style["popup"]
+			if duration_ms:
+				kwargs["duration"] = float(duration_ms)
 
 			# Try the patched in-place move first (fast/smooth).
 			self.call_js_method("moveMarker", lng, lat, **kwargs)
@@ -215,15 +831,93 @@ if _MapLibreMap is not None:  # pragma: no cover
 			# If support hasn't been confirmed yet, also do a guaranteed fallback.
 			# Once the frontend sends an ack event, we stop doing this.
 			if self._move_marker_supported is not True:
-				try:
-					self.remove_marker(marker_id)
-					self.add_marker(
-						lng,
-						lat,
-						name=marker_id,
-						color=style.get("color") or "#3388ff",
-						popup=style.get("popup"),
-					)
-				except Exception:
-					# Never let UI updates crash a simulation loop.
-					pass
+				self._fallback_move(marker_id, lng, lat, style)
+
+		def move_markers(
+			self,
+			positions: MarkerBatch,
+			*,
+			color: Optional[str] = None,
+			duration_ms: Optional[float] = None,
+		) -> None:
+			"""Move many markers in one widget message (creating missing ones).
+
+			`positions` maps marker ids to `(lng, lat)`, e.g. `{"bus-1": (12.56, 55.67)}`,
+			or is an iterable of `(marker_id, (lng, lat))` pairs. Markers not in the
+			batch stay where they are. `color` applies to markers created by this call;
+			`duration_ms` animates the moves like in `move_marker()`.
+			"""
+			ids, coords = _pack_marker_batch(positions)
+			if not ids:
+				return
+
+			content = {"type": "anymap:moveMarkers", "layout": self._batch_layout}
+			if duration_ms:
+				content["duration"] = float(duration_ms)
+			if ids != self._batch_ids:
+				self._batch_layout += 1
+				self._batch_ids = ids
+				content["layout"] = self._batch_layout
+				content["ids"] = ids
+				content["styles"] = [self._batch_style(marker_id, color) for marker_id in ids]
+			self.send(content, buffers=[coords])
+
+			# Same guaranteed fallback as `move_marker()` until the frontend acks.
+			if self._move_marker_supported is not True:
+				lnglats = array("d", coords)
+				if sys.byteorder != "little":  # pragma: no cover
+					lnglats.byteswap()
+				for i, marker_id in enumerate(ids):
+					self._fallback_move(marker_id, lnglats[2 * i], lnglats[2 * i + 1], self._batch_style(marker_id, color))
+
+		def add_agent_layer(
+			self,
+			name: str = "agents",
+			*,
+			color: str = "#3388ff",
+			radius: float = 4.0,
+			opacity: float = 0.9,
+			stroke_color: str = "#ffffff",
+			stroke_width: float = 1.0,
+		) -> None:
+			"""Add (or restyle) a GeoJSON circle layer for many agents, see `update_agents()`."""
+			paint = {
+				"circle-color": color,
+				"circle-radius": radius,
+				"circle-opacity": opacity,
+				"circle-stroke-color": stroke_color,
+				"circle-stroke-width": stroke_width,
+			}
+			state = self._agent_layers.get(name)
+			if state is None:
+				state = self._agent_layers[name] = _AgentLayerState(name, paint)
+			state.paint = paint
+			self._send_agent_layer(state)
+
+		def update_agents(self, positions: MarkerBatch, *, layer: str = "agents", remove_missing: bool = True) -> None:
+			"""Draw agents at `positions` (`{agent_id: (lng, lat)}`) on an agent layer.
+
+			Only the difference to the previous call is sent: new, moved and (with
+			`remove_missing=True`) vanished agents. The layer is created with
+			default styling if `add_agent_layer()` was not called first.
+			"""
+			if layer not in self._agent_layers:
+				self.add_agent_layer(layer)
+			self._send_agent_diff(self._agent_layers[layer].diff(positions, remove_missing=remove_missing))
+
+		def remove_agents(self, agent_ids: Iterable[str], *, layer: str = "agents") -> None:
+			"""Remove agents from an agent layer."""
+			state = self._agent_layers.get(layer)
+			if state is not None:
+				self._send_agent_diff(state.remove(agent_ids))
+
+		def _send_agent_layer(self, state: _AgentLayerState) -> None:
+			self.send({"type": "anymap:agentLayer", "layer": state.name, "paint": state.paint})
+
+		def _send_agent_diff(self, message: Optional[Tuple[dict, List[bytes]]]) -> None:
+			if message is not None:
+				content, buffers = message
+				self.send(content, buffers=buffers)
+
+	LiveMapLibreMap.__qualname__ = "LiveMapLibreMap"
+	return LiveMapLibreMap
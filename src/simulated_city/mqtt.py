@@ -3,10 +3,18 @@ from __future__ import annotations
 import logging
 import socket
 import ssl
-from typing import TYPE_CHECKING
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+import queue
+from typing import TYPE_CHECKING, Any
 import threading
+import time
 
 from .config import MqttConfig
+from .mqtt_workers import MessageWorkerPool
+from .serialization import Codec, best_json_codec, get_codec
+from .topics import TopicRouter
 
 if TYPE_CHECKING:
     import paho.mqtt.client as mqtt
@@ -18,33 +26,23 @@ class MqttConnector:
     """MQTT client with automatic reconnection."""
 
     def __init__(self, cfg: MqttConfig, *, client_id_suffix: str | None = None):
-        try:
-            import paho.mqtt.client as mqtt
-        except ModuleNotFoundError as e:
-            raise ModuleNotFoundError(
-                "paho-mqtt is required to use simulated_city.mqtt. "
-                "Install dependencies (e.g. `pip install -e .`) and try again."
-            ) from e
-
         self.cfg = cfg
         self._client_id = _make_client_id(cfg.client_id_prefix, client_id_suffix)
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=self._client_id)
+        self.client = _create_client(cfg, self._client_id)
         self.connected = threading.Event()
-
-        if cfg.username is not None:
-            self.client.username_pw_set(cfg.username, password=cfg.password)
-
-        if cfg.tls:
-            context = ssl.create_default_context()
-            self.client.tls_set_context(context)
+        self._publish_listeners: list[Callable[[int], None]] = []
+        self._connect_listeners: list[Callable[[], None]] = []
 
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
 
     def _on_connect(self, client, userdata, flags, rc, properties):
         if rc == 0:
             logger.info(f"Connected to MQTT broker at {self.cfg.host}:{self.cfg.port}")
             self.connected.set()
+            for listener in list(self._connect_listeners):
+                listener()
         else:
             logger.error(f"Failed to connect to MQTT broker, return code {rc}")
 
@@ -52,6 +50,18 @@ class MqttConnector:
         logger.warning(f"Disconnected from MQTT broker (reason={reason}). Reconnecting...")
         self.connected.clear()
 
+    def _on_publish(self, client, userdata, mid, reason_code, properties):
+        for listener in list(self._publish_listeners):
+            listener(mid)
+
+    def add_publish_listener(self, listener: Callable[[int], None]) -> None:
+        """Call `listener(mid)` when a published message is acknowledged (or sent, for QoS 0)."""
+        self._publish_listeners.append(listener)
+
+    def add_connect_listener(self, listener: Callable[[], None]) -> None:
+        """Call `listener()` after every successful (re)connect, e.g. to (re)subscribe."""
+        self._connect_listeners.append(listener)
+
     def connect(self):
         """Connect the client and start the network loop."""
         try:
@@ -75,11 +85,20 @@ class MqttConnector:
 class MqttPublisher:
     """A simple MQTT publisher."""
 
-    def __init__(self, connector: MqttConnector):
+    def __init__(self, connector: MqttConnector, *, codec: str | Codec | None = None):
         self.client = connector.client
+        # Used by `publish()`; defaults to the fastest available JSON codec.
+        self.codec = best_json_codec() if codec is None else get_codec(codec)
+
+    def publish_json(self, topic: str, payload: Any, qos: int = 0, retain: bool = False):
+        """Publish a JSON string (or a JSON-serializable object) to a topic."""
+        return self._publish(topic, _to_json_payload(payload), qos, retain)
 
-    def publish_json(self, topic: str, payload: str, qos: int = 0, retain: bool = False):
-        """Publish a JSON string to a topic."""
+    def publish(self, topic: str, obj: Any, qos: int = 0, retain: bool = False):
+        """Encode `obj` with this publisher's codec and publish it."""
+        return self._publish(topic, self.codec.encode(obj), qos, retain)
+
+    def _publish(self, topic: str, payload: str | bytes, qos: int, retain: bool):
         if not self.client.is_connected():
              logger.warning("MQTT client not connected. Message may not be published.")
         result = self.client.publish(topic, payload=payload, qos=qos, retain=retain)
@@ -90,6 +109,646 @@ class MqttPublisher:
         return result
 
 
+class BatchingMqttPublisher:
+    """An MQTT publisher that queues messages and sends them in bursts.
+
+    Updates to the same topic within one flush window are coalesced: only the
+    latest payload is sent (last value wins). The queue is flushed when it
+    holds `max_batch` topics, every `flush_interval_s` seconds from a background
+    thread, or when you call :meth:`flush`.
+
+    QoS 1/2 acknowledgements are tracked in the background instead of blocking
+    on every message; use :meth:`wait_for_acks` at a step boundary if you need them.
+    """
+
+    def __init__(
+        self,
+        connector: MqttConnector,
+        *,
+        flush_interval_s: float | None = 0.1,
+        max_batch: int = 1000,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        if flush_interval_s is not None and flush_interval_s <= 0:
+            raise ValueError("flush_interval_s must be positive (or None to disable timed flushes)")
+
+        self.client = connector.client
+        self.flush_interval_s = flush_interval_s
+        self.max_batch = max_batch
+
+        # topic -> (payload, qos, retain). dicts keep insertion order, so topics
+        # are sent in the order they were first queued in this window.
+        self._pending: dict[str, tuple[Any, int, bool]] = {}
+        self._unacked: list[mqtt.MQTTMessageInfo] = []
+        self._lock = threading.Lock()
+        # Held across swap + publish so two flushes (timer thread and a
+        # size-triggered one) can't interleave and send an older payload last.
+        self._flush_lock = threading.Lock()
+
+        self.published_count = 0
+        self.coalesced_count = 0
+        self.failed_count = 0
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        if flush_interval_s is not None:
+            self._thread = threading.Thread(target=self._flush_loop, name="mqtt-batch-flush", daemon=True)
+            self._thread.start()
+
+    def publish_json(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> None:
+        """Queue a JSON string or object for `topic` (replacing any queued payload for it).
+
+        Objects are serialized at flush time, so coalesced updates cost nothing.
+        """
+        with self._lock:
+            if topic in self._pending:
+                self.coalesced_count += 1
+            self._pending[topic] = (payload, qos, retain)
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Send all queued messages now. Returns the number of messages sent."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            if not self.client.is_connected():
+                logger.warning("MQTT client not connected. Batched messages may not be published.")
+
+            unacked = []
+            failed = 0
+            for topic, (payload, qos, retain) in batch.items():
+                result = self.client.publish(topic, payload=_to_json_payload(payload), qos=qos, retain=retain)
+                # paho queues QoS 1/2 messages while disconnected (MQTT_ERR_NO_CONN)
+                # and sends them after reconnecting, so those are not failures.
+                if result.rc != 0 and (qos == 0 or result.rc != _MQTT_ERR_NO_CONN):
+                    failed += 1
+                elif qos > 0:
+                    unacked.append(result)
+
+            with self._lock:
+                self.published_count += len(batch) - failed
+                self.failed_count += failed
+                self._unacked = [info for info in self._unacked if not _is_published(info)] + unacked
+            return len(batch)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of topics queued for the next flush."""
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def unacked_count(self) -> int:
+        """Number of sent QoS 1/2 messages still waiting for the broker's ack."""
+        with self._lock:
+            self._unacked = [info for info in self._unacked if not _is_published(info)]
+            return len(self._unacked)
+
+    def wait_for_acks(self, timeout: float | None = None) -> bool:
+        """Block until all sent QoS 1/2 messages are acknowledged (or timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.unacked_count:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self) -> None:
+        """Stop the background flush thread and send anything still queued."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def __enter__(self) -> BatchingMqttPublisher:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval_s):
+            try:
+                self.flush()
+            except Exception:
+                # Keep flushing on the next tick; a failed burst should not kill the thread.
+                logger.exception("Error while flushing batched MQTT messages")
+
+
+class PipelinedMqttPublisher:
+    """A non-blocking publisher for QoS 1/2 messages.
+
+    `publish_json()` returns a `concurrent.futures.Future` right away instead of
+    waiting for the broker's ack. At most `max_inflight` QoS 1/2 messages may be
+    unacknowledged at a time; when the window is full, `publish_json()` waits
+    for a free slot (backpressure) rather than buffering without limit.
+
+    Call :meth:`flush` at a step boundary to wait for all outstanding acks.
+    """
+
+    def __init__(self, connector: MqttConnector, *, max_inflight: int = 100):
+        if max_inflight < 1:
+            raise ValueError("max_inflight must be at least 1")
+
+        self.client = connector.client
+        self.max_inflight = max_inflight
+        # paho holds back messages beyond its own in-flight limit (default 20);
+        # raise it so our window is the one that applies.
+        self.client.max_inflight_messages_set(max_inflight)
+
+        # mid -> (future, MQTTMessageInfo) for unacknowledged QoS 1/2 messages.
+        self._inflight: dict[int, tuple[Future, Any]] = {}
+        self._cond = threading.Condition()
+        connector.add_publish_listener(self._on_publish)
+
+    def publish_json(
+        self,
+        topic: str,
+        payload: Any,
+        qos: int = 1,
+        retain: bool = False,
+        timeout: float | None = None,
+    ) -> Future:
+        """Publish a JSON string (or object) and return a Future that resolves to the message id.
+
+        For QoS 1/2 the Future completes when the broker acknowledges the message.
+        Raises `TimeoutError` if no in-flight slot frees up within `timeout` seconds.
+        """
+        if qos > 0:
+            self._wait_for_slot(timeout)
+
+        future: Future = Future()
+        result = self.client.publish(topic, payload=_to_json_payload(payload), qos=qos, retain=retain)
+        # paho returns MQTT_ERR_NO_CONN for QoS 1/2 but still queues the message
+        # and sends it after reconnecting, so only treat QoS 0 errors as failures.
+        if result.rc != 0 and (qos == 0 or result.rc != _MQTT_ERR_NO_CONN):
+            future.set_exception(RuntimeError(f"Publishing to {topic!r} failed (rc={result.rc})"))
+            return future
+        if qos == 0:
+            future.set_result(result.mid)
+            return future
+
+        with self._cond:
+            self._inflight[result.mid] = (future, result)
+        # The ack may have arrived before we registered the message id.
+        self._sweep()
+        return future
+
+    @property
+    def inflight_count(self) -> int:
+        """Number of QoS 1/2 messages still waiting for an ack."""
+        self._sweep()
+        with self._cond:
+            return len(self._inflight)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every in-flight message is acknowledged. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._sweep()
+            with self._cond:
+                if not self._inflight:
+                    return True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Wake up periodically to re-check message state (see _sweep).
+                self._cond.wait(_SWEEP_INTERVAL_S if remaining is None else min(remaining, _SWEEP_INTERVAL_S))
+
+    def _wait_for_slot(self, timeout: float | None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._sweep()
+            with self._cond:
+                if len(self._inflight) < self.max_inflight:
+                    return
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"MQTT in-flight window ({self.max_inflight}) still full after {timeout}s")
+                self._cond.wait(_SWEEP_INTERVAL_S if remaining is None else min(remaining, _SWEEP_INTERVAL_S))
+
+    def _on_publish(self, mid: int) -> None:
+        with self._cond:
+            entry = self._inflight.pop(mid, None)
+            if entry is not None:
+                self._cond.notify_all()
+        # Resolve outside the lock: done-callbacks may take their own locks.
+        if entry is not None:
+            entry[0].set_result(mid)
+
+    def _sweep(self) -> None:
+        # paho marks a message as published right *after* calling on_publish, so an
+        # ack that lands between `client.publish()` returning and us registering
+        # the mid is only visible through the message info. Checking it here
+        # makes sure such futures still complete.
+        with self._cond:
+            done = [mid for mid, (_, info) in self._inflight.items() if _is_published(info)]
+            futures = [(mid, self._inflight.pop(mid)[0]) for mid in done]
+            if futures:
+                self._cond.notify_all()
+        for mid, future in futures:
+            future.set_result(mid)
+
+
+# Default for `MqttSubscriber.subscribe(codec=...)`: use the subscriber's codec.
+_SUBSCRIBER_CODEC = object()
+
+
+class MqttSubscriber:
+    """Route incoming messages to handlers registered per topic filter.
+
+    Filters may use the `+` and `#` wildcards. Matching goes through a
+    :class:`~simulated_city.topics.TopicRouter` (a trie), so the cost per
+    message does not grow with the number of subscriptions. When several
+    handlers match a message, its payload is decoded only once per codec.
+
+    Handlers are called as `handler(topic, data)`, where `data` is the decoded
+    payload (or the raw bytes when the codec is None). Subscriptions are
+    renewed automatically after a reconnect.
+
+    By default handlers run on paho's network thread. Pass `workers=N` to run
+    them on a :class:`~simulated_city.mqtt_workers.MessageWorkerPool` instead
+    (per-topic ordering, bounded queues, `overflow` policy), so slow handlers
+    never stall the connection.
+    """
+
+    def __init__(
+        self,
+        connector: MqttConnector,
+        *,
+        codec: str | Codec | None = "json",
+        workers: int = 0,
+        queue_size: int = 1000,
+        overflow: str = "block",
+    ):
+        self.client = connector.client
+        self.codec = None if codec is None else get_codec(codec)
+        self.pool: MessageWorkerPool | None = None
+        if workers > 0:
+            self.pool = MessageWorkerPool(self.dispatch, workers=workers, queue_size=queue_size, overflow=overflow)
+        self._router = TopicRouter()
+        # topic filter -> QoS, for re-subscribing after a reconnect.
+        self._filters: dict[str, int] = {}
+        self.client.on_message = self._on_message
+        connector.add_connect_listener(self._resubscribe)
+
+    def subscribe(
+        self,
+        topic_filter: str,
+        handler: Callable[[str, Any], None],
+        qos: int = 0,
+        *,
+        codec: Any = _SUBSCRIBER_CODEC,
+    ) -> None:
+        """Call `handler(topic, data)` for every message matching `topic_filter`.
+
+        `codec` overrides the subscriber's codec for this handler (None = raw bytes).
+        """
+        if codec is _SUBSCRIBER_CODEC:
+            sub_codec = self.codec
+        else:
+            sub_codec = None if codec is None else get_codec(codec)
+        self._router.add(topic_filter, _Subscription(handler, sub_codec))
+        if self._filters.get(topic_filter, -1) < qos:
+            self._filters[topic_filter] = qos
+            if self.client.is_connected():
+                self.client.subscribe(topic_filter, qos=qos)
+
+    def unsubscribe(self, topic_filter: str, handler: Callable[[str, Any], None] | None = None) -> None:
+        """Remove one handler (or all handlers) for `topic_filter`."""
+        if handler is None:
+            self._router.remove(topic_filter)
+        else:
+            for sub in self._router.values(topic_filter):
+                if sub.handler == handler:
+                    self._router.remove(topic_filter, sub)
+        if not self._router.values(topic_filter) and self._filters.pop(topic_filter, None) is not None:
+            if self.client.is_connected():
+                self.client.unsubscribe(topic_filter)
+
+    def dispatch(self, topic: str, payload: bytes) -> int:
+        """Deliver one message to all matching handlers. Returns how many were called."""
+        subscriptions = self._router.match(topic)
+        decoded: dict[int, Any] = {}
+        for sub in subscriptions:
+            key = id(sub.codec)
+            try:
+                if key not in decoded:
+                    decoded[key] = payload if sub.codec is None else sub.codec.decode(payload)
+                sub.handler(topic, decoded[key])
+            except Exception:
+                # A bad message or a buggy handler must not kill the network loop.
+                logger.exception(f"Error handling MQTT message on {topic}")
+        return len(subscriptions)
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Stop the worker pool (if any) after handling queued messages."""
+        if self.pool is not None:
+            self.pool.close(timeout)
+
+    def _on_message(self, client, userdata, msg):
+        if self.pool is not None:
+            self.pool.submit(msg.topic, msg.payload)
+        else:
+            self.dispatch(msg.topic, msg.payload)
+
+    def _resubscribe(self) -> None:
+        if self._filters:
+            self.client.subscribe([(topic_filter, qos) for topic_filter, qos in self._filters.items()])
+
+
+@dataclass(frozen=True, slots=True)
+class _Subscription:
+    handler: Callable[[str, Any], None]
+    codec: Codec | None
+
+
+class MultiBrokerConnector:
+    """Connect to every active MQTT profile at once.
+
+    Creates one :class:`MqttConnector` per entry in `AppConfig.mqtt_configs`
+    (the profiles listed in `mqtt.active_profiles`). Each connector has its own
+    network thread, so brokers never wait for each other.
+    """
+
+    def __init__(self, mqtt_configs: dict[str, MqttConfig], *, client_id_suffix: str | None = None):
+        if not mqtt_configs:
+            raise ValueError("mqtt_configs is empty; define at least one active MQTT profile")
+        self.connectors: dict[str, MqttConnector] = {
+            name: MqttConnector(cfg, client_id_suffix=client_id_suffix) for name, cfg in mqtt_configs.items()
+        }
+
+    def connect(self) -> None:
+        """Start connecting to every broker.
+
+        A broker that cannot be reached is logged and skipped (paho keeps retrying);
+        an error is raised only if *no* broker could be contacted.
+        """
+        errors: dict[str, Exception] = {}
+        for name, connector in self.connectors.items():
+            try:
+                connector.connect()
+            except (OSError, socket.gaierror, ssl.SSLError) as e:
+                logger.error(f"Could not connect to MQTT profile '{name}': {e}")
+                errors[name] = e
+        if len(errors) == len(self.connectors):
+            raise next(iter(errors.values()))
+
+    def disconnect(self) -> None:
+        """Disconnect from every broker."""
+        for connector in self.connectors.values():
+            connector.disconnect()
+
+    def wait_for_connection(self, timeout: float = 10.0) -> dict[str, bool]:
+        """Wait (up to `timeout` in total) for all brokers. Returns {profile: connected}."""
+        deadline = time.monotonic() + timeout
+        return {
+            name: connector.wait_for_connection(max(0.0, deadline - time.monotonic()))
+            for name, connector in self.connectors.items()
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class BrokerStats:
+    """Snapshot of one broker's delivery statistics in a :class:`MultiBrokerPublisher`."""
+
+    published: int
+    failed: int
+    dropped: int
+    queue_depth: int
+    inflight: int
+    avg_latency_s: float | None
+    max_latency_s: float | None
+
+
+class MultiBrokerPublisher:
+    """Publish every message to all brokers of a :class:`MultiBrokerConnector`.
+
+    Each broker gets its own bounded queue and worker thread, so a slow broker
+    (e.g. a TLS cloud broker far away) never delays delivery to a fast local one.
+    If a broker's queue is full the message is dropped *for that broker only*
+    and counted in its stats.
+
+    Latency is measured from `publish_json()` to the broker's ack (QoS 1/2)
+    or to handing the message to paho (QoS 0).
+    """
+
+    def __init__(self, connector: MultiBrokerConnector, *, max_queue: int = 10_000, max_inflight: int = 100):
+        self._lanes = {
+            name: _BrokerLane(name, c, max_queue=max_queue, max_inflight=max_inflight)
+            for name, c in connector.connectors.items()
+        }
+
+    def publish_json(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> None:
+        """Queue a JSON string (or object) for every broker. Returns immediately."""
+        # Serialize once here rather than once per broker.
+        payload = _to_json_payload(payload)
+        enqueued_at = time.monotonic()
+        for lane in self._lanes.values():
+            lane.put((topic, payload, qos, retain, enqueued_at))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every broker has sent (and, for QoS 1/2, acked) its queue."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ok = True
+        for lane in self._lanes.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ok = lane.flush(remaining) and ok
+        return ok
+
+    def stats(self) -> dict[str, BrokerStats]:
+        """Return per-broker statistics, keyed by profile name."""
+        return {name: lane.stats() for name, lane in self._lanes.items()}
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Flush (up to `timeout`) and stop the worker threads.
+
+        Always returns: messages still queued for a broker that doesn't ack
+        in time are dropped and counted in its stats.
+        """
+        self.flush(timeout)
+        for lane in self._lanes.values():
+            lane.stop()
+
+    def __enter__(self) -> MultiBrokerPublisher:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _BrokerLane:
+    """Queue + worker thread + stats for one broker of a MultiBrokerPublisher."""
+
+    def __init__(self, name: str, connector: MqttConnector, *, max_queue: int, max_inflight: int):
+        self.name = name
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._publisher = PipelinedMqttPublisher(connector, max_inflight=max_inflight)
+        self._lock = threading.Lock()
+        self._published = 0
+        self._failed = 0
+        self._dropped = 0
+        self._latency_total = 0.0
+        self._latency_max: float | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"mqtt-fanout-{name}", daemon=True)
+        self._thread.start()
+
+    def put(self, item: tuple) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._record_drop()
+
+    def flush(self, timeout: float | None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return self._publisher.flush(remaining)
+
+    def stop(self) -> None:
+        self._stop.set()
+        # Wake the worker if it is waiting for work; a full queue means it is
+        # busy and will see the stop event within _LANE_SLOT_WAIT_S.
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=1.0)
+
+    def stats(self) -> BrokerStats:
+        inflight = self._publisher.inflight_count
+        with self._lock:
+            done = self._published
+            return BrokerStats(
+                published=done,
+                failed=self._failed,
+                dropped=self._dropped,
+                queue_depth=self._queue.qsize(),
+                inflight=inflight,
+                avg_latency_s=self._latency_total / done if done else None,
+                max_latency_s=self._latency_max,
+            )
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                topic, payload, qos, retain, enqueued_at = item
+                try:
+                    future = self._publish(topic, payload, qos, retain)
+                except Exception:
+                    logger.exception(f"Publishing to MQTT profile '{self.name}' failed")
+                    self._record_failure()
+                    continue
+                if future is None:
+                    self._record_drop()  # stopped while waiting for an in-flight slot
+                    continue
+                future.add_done_callback(lambda f, t0=enqueued_at: self._record(f, t0))
+            finally:
+                self._queue.task_done()
+        self._drain()
+
+    def _publish(self, topic: str, payload: Any, qos: int, retain: bool) -> Future | None:
+        # Wait for an in-flight slot in short slices so a broker that never
+        # acks can't keep the worker (and stop()) waiting forever.
+        while True:
+            try:
+                return self._publisher.publish_json(topic, payload, qos=qos, retain=retain, timeout=_LANE_SLOT_WAIT_S)
+            except TimeoutError:
+                if self._stop.is_set():
+                    return None
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                self._record_drop()
+            self._queue.task_done()
+
+    def _record(self, future: Future, enqueued_at: float) -> None:
+        if future.cancelled() or future.exception() is not None:
+            self._record_failure()
+            return
+        latency = time.monotonic() - enqueued_at
+        with self._lock:
+            self._published += 1
+            self._latency_total += latency
+            if self._latency_max is None or latency > self._latency_max:
+                self._latency_max = latency
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._failed += 1
+
+    def _record_drop(self) -> None:
+        with self._lock:
+            self._dropped += 1
+
+
+# paho.mqtt.client.MQTT_ERR_NO_CONN (kept here so importing this module doesn't need paho).
+_MQTT_ERR_NO_CONN = 4
+# How long a broker lane waits for an in-flight slot before re-checking for stop().
+_LANE_SLOT_WAIT_S = 0.1
+_SWEEP_INTERVAL_S = 0.05
+
+
+def _to_json_payload(payload: Any) -> str | bytes | bytearray:
+    """Pass strings/bytes through unchanged; serialize anything else as JSON."""
+    if isinstance(payload, (str, bytes, bytearray)):
+        return payload
+    return best_json_codec().encode(payload)
+
+
+def _is_published(info: Any) -> bool:
+    """Like `MQTTMessageInfo.is_published()`, but False instead of raising.
+
+    paho raises for messages queued while disconnected; those are still sent
+    after reconnecting, so for us they are simply "not published yet".
+    """
+    try:
+        return info.is_published()
+    except (RuntimeError, ValueError):
+        return False
+
+
+def _create_client(cfg: MqttConfig, client_id: str) -> mqtt.Client:
+    """Create a paho client with credentials and TLS applied from `cfg`."""
+    try:
+        import paho.mqtt.client as mqtt
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(
+            "paho-mqtt is required to use simulated_city.mqtt. "
+            "Install dependencies (e.g. `pip install -e .`) and try again."
+        ) from e
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+
+    if cfg.username is not None:
+        client.username_pw_set(cfg.username, password=cfg.password)
+
+    if cfg.tls:
+        context = ssl.create_default_context()
+        client.tls_set_context(context)
+
+    return client
+
+
 def _make_client_id(prefix: str, suffix: str | None) -> str:
     """Create a client ID from a prefix and an optional suffix."""
     safe_prefix = prefix.strip() or "simcity"
@@ -0,0 +1,222 @@
+"""asyncio-native MQTT helpers.
+
+`simulated_city.mqtt.MqttConnector` runs paho's network loop in a background
+thread. That is simple, but one thread per connector does not scale to hundreds
+of agents in one process, and callbacks arrive on a thread that asyncio code
+cannot safely touch.
+
+This module drives the paho client from the asyncio event loop instead:
+the loop watches the client's socket and calls `loop_read()` / `loop_write()`
+when it is ready, plus `loop_misc()` about once a second for keepalives.
+Everything (callbacks included) then runs on the event loop thread.
+
+Example:
+
+    async with AsyncMqttConnector(cfg.mqtt, client_id_suffix="agent-1") as connector:
+        await connector.subscribe(f"{cfg.mqtt.base_topic}/#")
+        publisher = AsyncMqttPublisher(connector)
+        await publisher.publish_json(f"{cfg.mqtt.base_topic}/hello", '{"hi": 1}', qos=1)
+        async for msg in connector.messages():
+            print(msg.topic, msg.payload)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+import logging
+import socket
+import ssl
+from typing import TYPE_CHECKING, Any
+
+from .config import MqttConfig
+from .mqtt import _create_client, _is_published, _make_client_id, _to_json_payload
+
+if TYPE_CHECKING:
+    import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+# How often to run paho's housekeeping (keepalive pings, retries).
+_MISC_INTERVAL_S = 1.0
+# Delay between reconnect attempts after the connection drops.
+_RECONNECT_DELAY_S = 2.0
+
+
+class AsyncMqttConnector:
+    """MQTT client driven by the asyncio event loop (no network thread)."""
+
+    def __init__(self, cfg: MqttConfig, *, client_id_suffix: str | None = None, max_queued_messages: int = 0):
+        self.cfg = cfg
+        self._client_id = _make_client_id(cfg.client_id_prefix, client_id_suffix)
+        self.client = _create_client(cfg, self._client_id)
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connected: asyncio.Event | None = None
+        self._misc_task: asyncio.Task | None = None
+        self._closing = False
+        # 0 means unbounded, like asyncio.Queue.
+        self._max_queued_messages = max_queued_messages
+        self._messages: asyncio.Queue | None = None
+        self._acks: dict[int, asyncio.Future] = {}
+
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_message = self._on_message
+        self.client.on_publish = self._on_publish
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    # --- Public API -----------------------------------------------------------
+
+    async def connect(self, timeout: float = 10.0) -> None:
+        """Connect to the broker and wait until the broker accepts the session."""
+        self._bind_loop()
+        self._closing = False
+        try:
+            # Note: the TCP (and TLS) handshake itself is a short blocking call.
+            self.client.connect(self.cfg.host, self.cfg.port, keepalive=self.cfg.keepalive_s)
+        except (OSError, socket.gaierror, ssl.SSLError) as e:
+            logger.error(f"Error connecting to MQTT broker: {e}")
+            raise
+
+        if self._misc_task is None:
+            self._misc_task = self._loop.create_task(self._misc_loop())
+
+        if not await self.wait_for_connection(timeout):
+            raise TimeoutError(f"No CONNACK from MQTT broker at {self.cfg.host}:{self.cfg.port} within {timeout}s")
+
+    async def disconnect(self) -> None:
+        """Disconnect from the broker and stop housekeeping."""
+        self._closing = True
+        self.client.disconnect()
+        if self._misc_task is not None:
+            self._misc_task.cancel()
+            try:
+                await self._misc_task
+            except asyncio.CancelledError:
+                pass
+            self._misc_task = None
+        for future in self._acks.values():
+            if not future.done():
+                future.cancel()
+        self._acks.clear()
+        logger.info("Disconnected from MQTT broker.")
+
+    async def wait_for_connection(self, timeout: float = 10.0) -> bool:
+        """Wait for the client to connect. Returns False on timeout."""
+        self._bind_loop()
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def subscribe(self, topic: str, qos: int = 0) -> None:
+        """Subscribe to a topic filter (wildcards `+` and `#` are allowed)."""
+        rc, _mid = self.client.subscribe(topic, qos=qos)
+        if rc != 0:
+            raise RuntimeError(f"Subscribing to {topic!r} failed (rc={rc})")
+
+    async def messages(self) -> AsyncIterator[mqtt.MQTTMessage]:
+        """Yield incoming messages forever: `async for msg in connector.messages(): ...`."""
+        self._bind_loop()
+        while True:
+            yield await self._messages.get()
+
+    async def __aenter__(self) -> AsyncMqttConnector:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.disconnect()
+
+    # --- Internal helpers -----------------------------------------------------
+
+    def _bind_loop(self) -> None:
+        # asyncio primitives must be created inside the running loop.
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._connected = asyncio.Event()
+            self._messages = asyncio.Queue(self._max_queued_messages)
+
+    def _wait_for_ack(self, info: Any) -> asyncio.Future:
+        future = self._loop.create_future()
+        if _is_published(info):
+            future.set_result(info.mid)
+        else:
+            self._acks[info.mid] = future
+        return future
+
+    async def _misc_loop(self) -> None:
+        while not self._closing:
+            rc = self.client.loop_misc()
+            if rc != 0 and not self._closing:
+                await asyncio.sleep(_RECONNECT_DELAY_S)
+                try:
+                    logger.info("Reconnecting to MQTT broker...")
+                    self.client.reconnect()
+                except (OSError, socket.gaierror, ssl.SSLError) as e:
+                    logger.warning(f"Reconnect failed: {e}")
+                continue
+            await asyncio.sleep(_MISC_INTERVAL_S)
+
+    # --- paho callbacks (all run on the event loop thread) --------------------
+
+    def _on_connect(self, client, userdata, flags, rc, properties):
+        if rc == 0:
+            logger.info(f"Connected to MQTT broker at {self.cfg.host}:{self.cfg.port}")
+            self._connected.set()
+        else:
+            logger.error(f"Failed to connect to MQTT broker, return code {rc}")
+
+    def _on_disconnect(self, client, userdata, flags, reason, properties):
+        if not self._closing:
+            logger.warning(f"Disconnected from MQTT broker (reason={reason}). Reconnecting...")
+        self._connected.clear()
+
+    def _on_message(self, client, userdata, msg):
+        try:
+            self._messages.put_nowait(msg)
+        except asyncio.QueueFull:
+            logger.warning(f"Incoming MQTT queue full; dropping message on {msg.topic}")
+
+    def _on_publish(self, client, userdata, mid, reason_code, properties):
+        future = self._acks.pop(mid, None)
+        if future is not None and not future.done():
+            future.set_result(mid)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._loop.add_reader(sock, client.loop_read)
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._loop.remove_reader(sock)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._loop.remove_writer(sock)
+
+
+class AsyncMqttPublisher:
+    """Publish from coroutines using an :class:`AsyncMqttConnector`."""
+
+    def __init__(self, connector: AsyncMqttConnector):
+        self._connector = connector
+        self.client = connector.client
+
+    async def publish_json(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> int:
+        """Publish a JSON string (or object) and return the message id.
+
+        For QoS 1/2 this waits (without blocking the event loop) for the
+        broker's acknowledgement. Other coroutines keep running meanwhile.
+        """
+        if not self.client.is_connected():
+            logger.warning("MQTT client not connected. Message may not be published.")
+        result = self.client.publish(topic, payload=_to_json_payload(payload), qos=qos, retain=retain)
+        if qos > 0:
+            await self._connector._wait_for_ack(result)
+        return result.mid
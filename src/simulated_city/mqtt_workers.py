@@ -0,0 +1,235 @@
+"""Process MQTT messages off the network thread.
+
+paho calls `on_message` on its network thread. A slow handler there stalls
+keepalives and the reception of every other message, and under bursty load the
+broker may eventually drop the connection.
+
+:class:`MessageWorkerPool` hands each message to a bounded queue served by
+worker threads instead, and returns to paho immediately:
+
+- **Per-topic ordering:** every topic always goes to the same worker, so the
+  messages of one topic are handled in the order they arrived.
+- **Bounded queues:** each worker has its own queue of `queue_size` messages.
+  When it is full, the `overflow` policy decides what happens:
+  `"block"` (wait for space), `"drop_oldest"` or `"drop_newest"`.
+- **Processes for CPU-heavy work:** with `processes=True` the handler runs in a
+  process pool (it must then be a picklable, module-level function).
+
+Counters for submitted, processed, dropped and failed messages and the current
+queue depth are available through :meth:`MessageWorkerPool.stats`.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import Any
+import zlib
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+_OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerPoolStats:
+    """Snapshot of a :class:`MessageWorkerPool`'s counters."""
+
+    submitted: int
+    processed: int
+    dropped: int
+    errors: int
+    queue_depth: int
+    max_queue_depth: int
+
+
+class MessageWorkerPool:
+    """Run `handler(topic, payload)` for each message on a bounded pool of workers."""
+
+    def __init__(
+        self,
+        handler: Callable[[str, bytes], Any],
+        *,
+        workers: int = 4,
+        queue_size: int = 1000,
+        overflow: str = OVERFLOW_BLOCK,
+        processes: bool = False,
+        on_result: Callable[[str, Any], None] | None = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        if overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}. Use one of: {', '.join(_OVERFLOW_POLICIES)}")
+
+        self.handler = handler
+        self.overflow = overflow
+        # Called in the worker thread with the handler's return value (handy with
+        # processes=True, e.g. to publish results).
+        self.on_result = on_result
+        self._executor = None
+        if processes:
+            # Imported here: multiprocessing is slow to import and rarely needed.
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._lanes = [_Lane(queue_size) for _ in range(workers)]
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._processed = 0
+        self._dropped = 0
+        self._errors = 0
+        self._max_depth = 0
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, args=(lane,), name=f"mqtt-worker-{i}", daemon=True)
+            for i, lane in enumerate(self._lanes)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, topic: str, payload: bytes) -> bool:
+        """Queue one message. Returns False if it (or an older message) was dropped."""
+        if self._closed:
+            raise RuntimeError("MessageWorkerPool is closed")
+        # crc32 rather than hash(): stable across processes and Python runs.
+        lane = self._lanes[zlib.crc32(topic.encode("utf-8")) % len(self._lanes)]
+        accepted, dropped = lane.put((topic, payload), self.overflow)
+        with self._lock:
+            self._submitted += 1
+            self._dropped += dropped
+            self._max_depth = max(self._max_depth, lane.depth)
+        return accepted and not dropped
+
+    def attach(self, connector: Any) -> MessageWorkerPool:
+        """Feed every message received by `connector` (an MqttConnector) into this pool."""
+        connector.client.on_message = lambda client, userdata, msg: self.submit(msg.topic, msg.payload)
+        return self
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until every queued message has been handled. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for lane in self._lanes:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not lane.join(remaining):
+                return False
+        return True
+
+    def stats(self) -> WorkerPoolStats:
+        """Return the current counters."""
+        depth = sum(lane.depth for lane in self._lanes)
+        with self._lock:
+            return WorkerPoolStats(
+                submitted=self._submitted,
+                processed=self._processed,
+                dropped=self._dropped,
+                errors=self._errors,
+                queue_depth=depth,
+                max_queue_depth=self._max_depth,
+            )
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Handle what is queued (up to `timeout`), then stop the workers."""
+        self.join(timeout)
+        self._closed = True
+        for lane in self._lanes:
+            lane.stop()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> MessageWorkerPool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self, lane: _Lane) -> None:
+        while True:
+            item = lane.get()
+            if item is None:
+                return
+            topic, payload = item
+            try:
+                if self._executor is not None:
+                    # Waiting for the result keeps per-topic ordering in process mode too.
+                    result = self._executor.submit(self.handler, topic, payload).result()
+                else:
+                    result = self.handler(topic, payload)
+                if self.on_result is not None:
+                    self.on_result(topic, result)
+                with self._lock:
+                    self._processed += 1
+            except Exception:
+                logger.exception(f"Error handling MQTT message on {topic}")
+                with self._lock:
+                    self._errors += 1
+            finally:
+                lane.task_done()
+
+
+class _Lane:
+    """A bounded FIFO for one worker, with the three overflow policies."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: deque = deque()
+        self._unfinished = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any, overflow: str) -> tuple[bool, int]:
+        """Add `item`. Returns (accepted, number of messages dropped)."""
+        with self._cond:
+            dropped = 0
+            if len(self._items) >= self.capacity:
+                if overflow == OVERFLOW_DROP_NEWEST:
+                    return False, 1
+                if overflow == OVERFLOW_DROP_OLDEST:
+                    self._items.popleft()
+                    self._unfinished -= 1
+                    dropped = 1
+                else:
+                    while len(self._items) >= self.capacity and not self._stopped:
+                        self._cond.wait()
+            self._items.append(item)
+            self._unfinished += 1
+            self._cond.notify_all()
+            return True, dropped
+
+    def get(self) -> Any:
+        with self._cond:
+            while not self._items and not self._stopped:
+                self._cond.wait()
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def task_done(self) -> None:
+        with self._cond:
+            self._unfinished -= 1
+            self._cond.notify_all()
+
+    def join(self, timeout: float | None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._unfinished <= 0, timeout)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
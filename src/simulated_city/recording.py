@@ -0,0 +1,307 @@
+"""Record simulation runs to disk as memory-mapped columns.
+
+Publishing to MQTT is great for live dashboards, but analysing a year-long
+run by re-parsing millions of JSON messages is slow. :class:`TrajectoryRecorder`
+appends every record to a set of preallocated, memory-mapped NumPy column
+files instead, and :func:`open_trajectory` maps them back without copying or
+parsing anything.
+
+A recording is a directory:
+
+    run/
+      meta.json     # record count, column dtypes, clock, CRS
+      ids.json      # id table: record column `index` i means ids[i]
+      index.bin     # uint32   location / agent index
+      time.bin      # int64    timestamp, seconds since the Unix epoch (UTC)
+      x.bin, y.bin  # float64  position (EPSG:25832 metres for bins)
+      fill.bin      # int16    fill level in percent
+      status.bin    # uint8    STATUS_OK, STATUS_FULL or STATUS_OVERFLOW
+
+Example:
+
+    sim = BinSimulation(cfg.simulation)
+    with TrajectoryRecorder.for_simulation("runs/year", sim) as recorder:
+        FastForwardRunner(sim, on_batch=recorder.record_batch).run(365 * 96)
+
+    run = open_trajectory("runs/year")
+    rows = run.rows_for("bin-17")
+    print(run.time[rows].astype("datetime64[s]"), run.fill[rows])
+
+Requires NumPy (`pip install -e ".[sim]"`).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import json
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .geo import BACKEND_BUILTIN, EPSG_4326, EPSG_25832, transform_arrays
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .simulation import BinSimulation, EventBatch, StepEvents
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = 0
+STATUS_FULL = 1
+STATUS_OVERFLOW = 2  # a bag was rejected
+
+FORMAT_VERSION = 1
+COLUMNS = {
+    "index": "<u4",
+    "time": "<i8",
+    "x": "<f8",
+    "y": "<f8",
+    "fill": "<i2",
+    "status": "u1",
+}
+_FULL_PCT = 100
+
+
+class TrajectoryRecorder:
+    """Append records to memory-mapped column files in `path`.
+
+    Space for `capacity` records is allocated up front; when it runs out, the
+    files are doubled in size. The record count is saved by :meth:`flush` and
+    :meth:`close` (records after the last flush are lost if the process dies).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        ids: Sequence[str],
+        *,
+        positions: tuple[Any, Any] | None = None,
+        start_time: datetime | None = None,
+        timestep: timedelta | None = None,
+        crs: str = EPSG_25832,
+        capacity: int = 1 << 20,
+        overwrite: bool = False,
+    ):
+        """Create a recording in the directory `path`.
+
+        - ids: one id per index (e.g. `sim.location_ids`)
+        - positions: optional static `(x, y)` arrays per index, used by the
+          `record_*` helpers (bins don't move)
+        - start_time, timestep: the simulation clock, needed by :meth:`record_batch`
+        """
+        np = _require_numpy()
+        self._np = np
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.path = Path(path)
+        if (self.path / "meta.json").exists() and not overwrite:
+            raise FileExistsError(f"{self.path} already contains a recording (pass overwrite=True to replace it)")
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.ids = tuple(ids)
+        self.start_time = start_time
+        self.timestep = timestep
+        self.crs = crs
+        if positions is None:
+            self._x = self._y = np.full(len(self.ids), np.nan)
+        else:
+            self._x = np.asarray(positions[0], dtype=np.float64)
+            self._y = np.asarray(positions[1], dtype=np.float64)
+            if self._x.shape != (len(self.ids),) or self._y.shape != (len(self.ids),):
+                raise ValueError(f"positions must be two arrays with {len(self.ids)} entries")
+
+        (self.path / "ids.json").write_text(json.dumps(list(self.ids)), encoding="utf-8")
+        self.count = 0
+        self.capacity = 0
+        self._columns: dict[str, np.memmap] = {}
+        self._closed = False
+        self._resize(capacity)
+        self._write_meta()
+
+    @classmethod
+    def for_simulation(
+        cls,
+        path: str | Path,
+        sim: BinSimulation,
+        *,
+        backend: str = BACKEND_BUILTIN,
+        **kwargs: Any,
+    ) -> TrajectoryRecorder:
+        """Recorder for a `BinSimulation`: ids, positions (EPSG:25832) and clock from `sim`."""
+        lnglat = sim.lnglat()
+        x, y = transform_arrays(lnglat[:, 0], lnglat[:, 1], from_crs=EPSG_4326, to_crs=EPSG_25832, backend=backend)
+        return cls(path, sim.location_ids, positions=(x, y), start_time=sim.start_time, timestep=sim.timestep, **kwargs)
+
+    def append(self, index: Any, time_s: Any, x: Any, y: Any, fill: Any, status: Any) -> None:
+        """Append records. Every argument is an array (or a number, repeated for all records)."""
+        np = self._np
+        if self._closed:
+            raise RuntimeError("TrajectoryRecorder is closed")
+        index = np.atleast_1d(np.asarray(index))
+        n = len(index)
+        if n == 0:
+            return
+        if self.count + n > self.capacity:
+            self._resize(max(2 * self.capacity, self.count + n))
+        lo, hi = self.count, self.count + n
+        for name, values in zip(COLUMNS, (index, time_s, x, y, fill, status)):
+            # Broadcasting assignment: scalars fill the whole slice.
+            self._columns[name][lo:hi] = values
+        self.count = hi
+
+    def record_step(self, events: StepEvents) -> None:
+        """Record the events (and overflows) of one `BinSimulation.step()`."""
+        t = int(events.time.timestamp())
+        self._record(events.indices, t, events.fill_pct)
+        if len(events.overflow):
+            self.append(events.overflow, t, self._x[events.overflow], self._y[events.overflow], _FULL_PCT, STATUS_OVERFLOW)
+
+    def record_batch(self, batch: EventBatch) -> None:
+        """Record the events of an `EventBatch` (use as `FastForwardRunner(on_batch=...)`).
+
+        Batches only count overflows, so no overflow records are written.
+        """
+        if self.start_time is None or self.timestep is None:
+            raise RuntimeError("record_batch needs start_time and timestep (use TrajectoryRecorder.for_simulation)")
+        start = int(self.start_time.timestamp())
+        step_s = int(self.timestep.total_seconds())
+        self._record(batch.indices, start + batch.steps * step_s, batch.fill_pct)
+
+    def record_snapshot(self, sim: BinSimulation) -> None:
+        """Record the state of *every* bin at the current simulation time.
+
+        That is `n_bins` records per call: 10,000 bins every 15 minutes for a
+        year is 350 million records (about 11 GB), so snapshot sparingly.
+        """
+        np = self._np
+        self._record(np.arange(sim.n_bins), int(sim.time.timestamp()), sim.fill_pct)
+
+    def flush(self) -> None:
+        """Write the data to disk and save the record count."""
+        for column in self._columns.values():
+            column.flush()
+        self._write_meta()
+
+    def close(self) -> None:
+        """Flush, trim the files to the records written and release them."""
+        if self._closed:
+            return
+        self.flush()
+        self._columns.clear()
+        for name, dtype in COLUMNS.items():
+            with open(self.path / f"{name}.bin", "r+b") as f:
+                f.truncate(self.count * self._np.dtype(dtype).itemsize)
+        self.capacity = self.count
+        self._write_meta()
+        self._closed = True
+
+    def __enter__(self) -> TrajectoryRecorder:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _record(self, indices: np.ndarray, time_s: Any, fill: np.ndarray) -> None:
+        np = self._np
+        status = np.where(fill >= _FULL_PCT, STATUS_FULL, STATUS_OK).astype(np.uint8)
+        self.append(indices, time_s, self._x[indices], self._y[indices], fill, status)
+
+    def _resize(self, capacity: int) -> None:
+        np = self._np
+        if self.capacity:
+            logger.debug(f"Growing recording {self.path} from {self.capacity} to {capacity} records")
+        for column in self._columns.values():
+            column.flush()
+        self._columns.clear()
+        for name, dtype in COLUMNS.items():
+            file = self.path / f"{name}.bin"
+            mode = "r+b" if self.capacity else "w+b"
+            with open(file, mode) as f:
+                f.truncate(capacity * np.dtype(dtype).itemsize)
+            self._columns[name] = np.memmap(file, dtype=dtype, mode="r+", shape=(capacity,))
+        self.capacity = capacity
+
+    def _write_meta(self) -> None:
+        meta = {
+            "version": FORMAT_VERSION,
+            "count": self.count,
+            "capacity": self.capacity,
+            "columns": COLUMNS,
+            "crs": self.crs,
+            "start_time": self.start_time.isoformat() if self.start_time else None,
+            "timestep_s": self.timestep.total_seconds() if self.timestep else None,
+        }
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        tmp.replace(self.path / "meta.json")
+
+
+@dataclass(frozen=True, slots=True)
+class Trajectory:
+    """A recording opened with :func:`open_trajectory`. Columns are read-only memory maps."""
+
+    path: Path
+    ids: tuple[str, ...]
+    index: np.ndarray
+    time: np.ndarray  # seconds since the epoch; `.astype("datetime64[s]")` for dates
+    x: np.ndarray
+    y: np.ndarray
+    fill: np.ndarray
+    status: np.ndarray
+    crs: str
+    start_time: datetime | None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def index_of(self, location_id: str) -> int:
+        """Index of `location_id` in the id table (ValueError if unknown)."""
+        return self.ids.index(location_id)
+
+    def rows_for(self, location_id: str) -> np.ndarray:
+        """Record rows of one id, in recording order."""
+        np = _require_numpy()
+        return np.flatnonzero(self.index == self.index_of(location_id))
+
+
+def open_trajectory(path: str | Path) -> Trajectory:
+    """Open a recording for reading, without loading it into memory."""
+    np = _require_numpy()
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported recording version {meta.get('version')!r} in {path}")
+    ids = tuple(json.loads((path / "ids.json").read_text(encoding="utf-8")))
+    count = meta["count"]
+
+    columns = {}
+    for name, dtype in meta["columns"].items():
+        if count:
+            # Mapping the first `count` records ignores preallocated space after them.
+            columns[name] = np.memmap(path / f"{name}.bin", dtype=dtype, mode="r", shape=(count,))
+        else:
+            columns[name] = np.zeros(0, dtype=dtype)
+    start_time = meta.get("start_time")
+    return Trajectory(
+        path=path,
+        ids=ids,
+        crs=meta.get("crs", EPSG_25832),
+        start_time=datetime.fromisoformat(start_time) if start_time else None,
+        **columns,
+    )
+
+
+def _require_numpy():
+    """Import NumPy lazily with a friendly error message."""
+
+    try:
+        import numpy as np  # type: ignore[import-not-found]
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(
+            "numpy is required for simulated_city.recording. "
+            "Install it with `pip install -e \".[sim]\"` (or `pip install numpy`)."
+        ) from e
+    return np
@@ -0,0 +1,602 @@
+"""Reference engine for the rubbish-bin simulation (`SimulationConfig`).
+
+The model, per timestep and per bin (one bin per `SimulationConfig.locations`
+entry):
+
+1. With probability `arrival_prob` a citizen arrives with a bag.
+2. If the bin is not full, the fill level rises by `bag_fill_delta_pct`
+   (capped at 100%). If it is full, the bag is rejected (an *overflow*).
+3. An event is emitted for the bin when its fill level crosses a multiple of
+   `status_boundary_pct` (or for every accepted bag, if
+   `publish_every_deposit` is true).
+
+All state lives in NumPy arrays with one row per bin, and each step draws the
+arrivals for every bin with a single call on a seeded `numpy.random.Generator`.
+That makes a step over 100k bins take about a millisecond, and a run is
+bit-for-bit reproducible given `seed` and `start_time`.
+
+:class:`EventDrivenSimulation` produces the same events from a heap of
+next-event steps, so its cost scales with the number of events instead.
+
+NumPy is optional for the package; install it with `pip install -e ".[sim]"`.
+
+Example:
+
+    cfg = load_config()
+    sim = BinSimulation(cfg.simulation)
+    for events in sim.run(96):  # one day of 15-minute steps
+        for i, fill in zip(events.indices, events.fill_pct):
+            publisher.publish_json(f"{cfg.mqtt.base_topic}/bins/{sim.location_ids[i]}", {"fill": int(fill)})
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import heapq
+import time as _time
+from typing import TYPE_CHECKING, Any
+
+from .config import SimulationConfig
+
+if TYPE_CHECKING:
+    import numpy as np
+
+FULL_PCT = 100
+
+# advance() works on (bins with events) x (steps) matrices; keep them below
+# this many cells (~32 MB of float64) by splitting long leaps into chunks.
+_LEAP_CELLS = 4_000_000
+
+# "No event scheduled" for EventDrivenSimulation (full bins, arrival_prob 0).
+_NEVER = 2**63 - 1
+
+
+@dataclass(frozen=True, slots=True)
+class StepEvents:
+    """What happened in one timestep. Arrays are indexed by event, not by bin."""
+
+    step: int
+    time: datetime
+    indices: np.ndarray  # bin rows with a status event (int64, ascending)
+    fill_pct: np.ndarray  # fill level of those bins after the step
+    overflow: np.ndarray  # bin rows whose bag was rejected because the bin was full
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
+@dataclass(frozen=True, slots=True)
+class EventBatch:
+    """Events of `n_steps` consecutive steps, ordered by (step, bin row)."""
+
+    start_step: int
+    n_steps: int
+    steps: np.ndarray  # absolute step index per event
+    indices: np.ndarray  # bin row per event
+    fill_pct: np.ndarray  # fill level right after the event
+    overflow_count: int  # rejected bags in these steps
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
+class BinSimulation:
+    """Vectorized rubbish-bin simulation driven by a `SimulationConfig`."""
+
+    def __init__(
+        self,
+        config: SimulationConfig,
+        *,
+        n_bins: int | None = None,
+        rng: Any = None,
+    ):
+        """Create the engine.
+
+        `n_bins` sets the number of bins when `config.locations` is empty (e.g.
+        for benchmarks). `rng` overrides the generator created from `config.seed`.
+        """
+        np = _require_numpy()
+        self._np = np
+        self.config = config
+
+        if config.locations:
+            if n_bins is not None and n_bins != len(config.locations):
+                raise ValueError(f"n_bins={n_bins} does not match the {len(config.locations)} configured locations")
+            n_bins = len(config.locations)
+        if n_bins is None or n_bins < 1:
+            raise ValueError("SimulationConfig has no locations; pass n_bins to simulate anonymous bins")
+        if not 0.0 <= config.arrival_prob <= 1.0:
+            raise ValueError("arrival_prob must be between 0 and 1")
+        if config.status_boundary_pct < 1:
+            raise ValueError("status_boundary_pct must be at least 1")
+        if config.bag_fill_delta_pct < 1:
+            raise ValueError("bag_fill_delta_pct must be at least 1")
+
+        self.location_ids: tuple[str, ...] = tuple(loc.location_id for loc in config.locations) or tuple(
+            f"bin-{i}" for i in range(n_bins)
+        )
+        self.rng = rng if rng is not None else np.random.default_rng(config.seed)
+        self.start_time = config.start_time or datetime.now(timezone.utc)
+        self.timestep = timedelta(minutes=config.timestep_minutes)
+
+        self.fill_pct = np.zeros(n_bins, dtype=np.int16)
+        self.step_index = 0
+        # Running totals, handy for dashboards and tests.
+        self.deposits = np.zeros(n_bins, dtype=np.int64)
+        self.overflows = np.zeros(n_bins, dtype=np.int64)
+
+    @property
+    def n_bins(self) -> int:
+        return len(self.fill_pct)
+
+    @property
+    def time(self) -> datetime:
+        """Simulation time of the next step."""
+        return self.time_at(self.step_index)
+
+    def time_at(self, step: int) -> datetime:
+        """Simulation time of step number `step`."""
+        return self.start_time + int(step) * self.timestep
+
+    def lnglat(self) -> np.ndarray:
+        """(n_bins, 2) array of `(lon, lat)` per bin (NaN for anonymous bins)."""
+        np = self._np
+        if not self.config.locations:
+            return np.full((self.n_bins, 2), np.nan)
+        return np.array([(loc.lon, loc.lat) for loc in self.config.locations], dtype=np.float64)
+
+    def step(self) -> StepEvents:
+        """Advance one timestep and return its events."""
+        np = self._np
+        cfg = self.config
+        time = self.time
+
+        # One draw per bin per step, always in the same order: this is what
+        # makes runs reproducible (and independent of how results are used).
+        arrivals = self.rng.random(self.n_bins) < cfg.arrival_prob
+
+        old = self.fill_pct
+        accepted = arrivals & (old < FULL_PCT)
+        # Integer arithmetic in int16 with in-place clipping: no temporary
+        # float arrays and no np.where, which roughly halves the step time.
+        new = accepted.astype(np.int16)
+        new *= cfg.bag_fill_delta_pct
+        new += old
+        np.minimum(new, FULL_PCT, out=new)
+
+        if cfg.publish_every_deposit:
+            changed = accepted
+        else:
+            boundary = cfg.status_boundary_pct
+            changed = (new // boundary) > (old // boundary)
+
+        overflow = arrivals & ~accepted
+        self.fill_pct = new
+        self.deposits += accepted
+        self.overflows += overflow
+        self.step_index += 1
+
+        indices = np.flatnonzero(changed)
+        return StepEvents(
+            step=self.step_index - 1,
+            time=time,
+            indices=indices,
+            fill_pct=new[indices],
+            overflow=np.flatnonzero(overflow),
+        )
+
+    def advance(self, steps: int) -> EventBatch:
+        """Advance `steps` timesteps at once and return all their events.
+
+        Produces the same events, statistically, as calling `step()` `steps`
+        times, but costs about one step plus the events: per bin it draws the
+        *number* of arrivals in the whole window (binomial), and only for bins
+        whose fill level crosses a boundary does it place those arrivals on
+        individual steps (a uniformly random subset of the window). Quiet steps
+        are skipped for free.
+
+        Reproducible from `seed`, but it consumes random numbers differently
+        than `step()`, so the two modes give different (equally valid) runs.
+        Per-step overflow rows are not tracked; see `overflow_count` and
+        `overflows`.
+        """
+        np = self._np
+        if steps < 1:
+            raise ValueError("steps must be at least 1")
+        chunk = max(1, min(steps, _LEAP_CELLS // self.n_bins))
+        start = self.step_index
+        parts = []
+        overflow_count = 0
+        done = 0
+        while done < steps:
+            window = min(chunk, steps - done)
+            part, overflowed = self._leap(window)
+            parts.append(part)
+            overflow_count += overflowed
+            done += window
+
+        ev_steps = np.concatenate([p[0] for p in parts])
+        ev_idx = np.concatenate([p[1] for p in parts])
+        ev_fill = np.concatenate([p[2] for p in parts])
+        return EventBatch(start, steps, ev_steps, ev_idx, ev_fill, overflow_count)
+
+    def _leap(self, window: int) -> tuple[tuple[np.ndarray, np.ndarray, np.ndarray], int]:
+        np = self._np
+        cfg = self.config
+        delta = cfg.bag_fill_delta_pct
+        boundary = cfg.status_boundary_pct
+
+        old = self.fill_pct.astype(np.int64)
+        arrivals = self.rng.binomial(window, cfg.arrival_prob, size=self.n_bins)
+        room = -(-(FULL_PCT - old) // delta)  # bags until full (ceil)
+        accepted = np.minimum(arrivals, room)
+        final = np.minimum(old + accepted * delta, FULL_PCT)
+        if cfg.publish_every_deposit:
+            eventful = np.flatnonzero(accepted)
+        else:
+            eventful = np.flatnonzero(final // boundary > old // boundary)
+
+        # Place the arrivals of eventful bins on steps: the positions of the m
+        # smallest of `window` random keys are a uniform m-subset of the window.
+        m = arrivals[eventful][:, None]
+        col = np.arange(window)
+        order = np.argsort(self.rng.random((len(eventful), window)), axis=1)
+        arrival_steps = np.sort(np.where(col < m, order, window), axis=1)
+
+        before = np.minimum(old[eventful][:, None] + col * delta, FULL_PCT)
+        after = np.minimum(before + delta, FULL_PCT)
+        ok = (col < m) & (before < FULL_PCT)
+        if not cfg.publish_every_deposit:
+            ok &= after // boundary > before // boundary
+        rows, cols = np.nonzero(ok)
+
+        ev_steps = arrival_steps[rows, cols] + self.step_index
+        ev_idx = eventful[rows]
+        ev_fill = after[rows, cols].astype(np.int16)
+        by_step = np.lexsort((ev_idx, ev_steps))
+
+        self.fill_pct = final.astype(np.int16)
+        self.deposits += accepted
+        overflowed = arrivals - accepted
+        self.overflows += overflowed
+        self.step_index += window
+        return (ev_steps[by_step], ev_idx[by_step], ev_fill[by_step]), int(overflowed.sum())
+
+    def run(self, steps: int) -> Iterator[StepEvents]:
+        """Yield the events of the next `steps` timesteps."""
+        for _ in range(steps):
+            yield self.step()
+
+    def empty(self, indices: Any = None) -> None:
+        """Empty the given bins (all bins if None), e.g. after a collection round."""
+        if indices is None:
+            self.fill_pct[:] = 0
+        else:
+            self.fill_pct[self._np.asarray(indices)] = 0
+
+
+class EventDrivenSimulation(BinSimulation):
+    """Discrete-event version of :class:`BinSimulation`: the cost is per event, not per bin and step.
+
+    Every bin has one entry in a heap: the step of its next status event.
+    From the fill level we know how many bags `k` that event needs, so its
+    step is drawn directly (the sum of `k` geometric gaps between arrivals, a
+    negative binomial). Bins and steps without events cost nothing.
+
+    The events have the same distribution as those of the timestep model. The
+    bags that arrive *between* events are filled in on demand: reading
+    `fill_pct`, `deposits` or `overflows`, or calling `empty()`, draws how many
+    of a bin's pending bags have arrived so far (hypergeometric, given the step
+    of the k-th). It is a drop-in replacement for `BinSimulation` (works with
+    `FastForwardRunner`).
+    """
+
+    def __init__(
+        self,
+        config: SimulationConfig,
+        *,
+        n_bins: int | None = None,
+        rng: Any = None,
+    ):
+        super().__init__(config, n_bins=n_bins, rng=rng)
+        np = self._np
+        n = self.n_bins
+        # Per bin: bags from step `_since` onwards are not in `_fill` yet; the
+        # `_need`-th of them arrives at step `_next` (the next event).
+        self._since = np.zeros(n, dtype=np.int64)
+        self._next = np.full(n, _NEVER, dtype=np.int64)
+        self._need = np.zeros(n, dtype=np.int64)
+        # Bumped when a bin is rescheduled; heap entries with an old version are skipped.
+        self._version = np.zeros(n, dtype=np.int64)
+        self._heap: list[tuple[int, int, int]] = []
+        self._schedule(np.arange(n), 0)
+
+    # BinSimulation.__init__ assigns these; the getters first bring them up to date.
+    @property
+    def fill_pct(self) -> np.ndarray:
+        self._sync()
+        return self._fill
+
+    @fill_pct.setter
+    def fill_pct(self, value: np.ndarray) -> None:
+        self._fill = value
+
+    @property
+    def deposits(self) -> np.ndarray:
+        self._sync()
+        return self._deposits
+
+    @deposits.setter
+    def deposits(self, value: np.ndarray) -> None:
+        self._deposits = value
+
+    @property
+    def overflows(self) -> np.ndarray:
+        self._sync()
+        return self._overflows
+
+    @overflows.setter
+    def overflows(self, value: np.ndarray) -> None:
+        self._overflows = value
+
+    @property
+    def n_bins(self) -> int:
+        return len(self._fill)
+
+    @property
+    def next_event_step(self) -> int | None:
+        """Step of the next scheduled event (None if no bin can emit one)."""
+        while self._heap:
+            step, i, version = self._heap[0]
+            if version == self._version[i]:
+                return step
+            heapq.heappop(self._heap)
+        return None
+
+    def step(self) -> StepEvents:
+        """Advance one timestep and return its events."""
+        time = self.time
+        ev_steps, ev_idx, ev_fill, overflow = self._run_until(self.step_index + 1, overflow_rows=True)
+        return StepEvents(step=self.step_index - 1, time=time, indices=ev_idx, fill_pct=ev_fill, overflow=overflow)
+
+    def advance(self, steps: int) -> EventBatch:
+        """Advance `steps` timesteps, popping only the events that fall inside them."""
+        if steps < 1:
+            raise ValueError("steps must be at least 1")
+        start = self.step_index
+        ev_steps, ev_idx, ev_fill, overflow_count = self._run_until(start + steps)
+        return EventBatch(start, steps, ev_steps, ev_idx, ev_fill, overflow_count)
+
+    def empty(self, indices: Any = None) -> None:
+        """Empty the given bins (all bins if None) and reschedule their next event."""
+        np = self._np
+        self._sync()
+        rows = np.arange(self.n_bins) if indices is None else np.atleast_1d(np.asarray(indices))
+        self._fill[rows] = 0
+        self._schedule(rows, self.step_index)
+
+    def _run_until(self, end: int, *, overflow_rows: bool = False) -> tuple[np.ndarray, np.ndarray, np.ndarray, Any]:
+        np = self._np
+        heap = self._heap
+        version = self._version
+        parts = []
+        while heap and heap[0][0] < end:
+            step = heap[0][0]
+            rows = []
+            while heap and heap[0][0] == step:
+                _, i, v = heapq.heappop(heap)
+                if v == version[i]:
+                    rows.append(i)
+            if rows:
+                parts.append(self._fire(np.array(sorted(rows), dtype=np.int64), step))
+        self.step_index = end
+        overflow = self._settle_full(end, rows=overflow_rows)
+
+        if not parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.int16), overflow
+        ev_steps = np.concatenate([p[0] for p in parts])
+        ev_idx = np.concatenate([p[1] for p in parts])
+        ev_fill = np.concatenate([p[2] for p in parts])
+        return ev_steps, ev_idx, ev_fill, overflow
+
+    def _fire(self, rows: np.ndarray, step: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The scheduled bag of `rows` arrives at `step`: update them, emit events, reschedule."""
+        np = self._np
+        cfg = self.config
+        old = self._fill[rows].astype(np.int64)
+        need = self._need[rows]
+        new = np.minimum(old + need * cfg.bag_fill_delta_pct, FULL_PCT)
+        self._fill[rows] = new
+        self._deposits[rows] += need
+        if cfg.publish_every_deposit:
+            emit = np.ones(len(rows), dtype=bool)
+        else:
+            emit = new // cfg.status_boundary_pct > old // cfg.status_boundary_pct
+        self._schedule(rows, step + 1)
+        return np.full(int(emit.sum()), step, dtype=np.int64), rows[emit], new[emit].astype(np.int16)
+
+    def _schedule(self, rows: np.ndarray, start: int) -> None:
+        """Draw the next event of `rows`, counting bags from step `start`."""
+        np = self._np
+        cfg = self.config
+        fill = self._fill[rows].astype(np.int64)
+        if cfg.publish_every_deposit:
+            need = np.ones(len(rows), dtype=np.int64)
+        else:
+            # Bags until the next boundary; past the last boundary, bags until
+            # full (a silent event, after which the bin starts to overflow).
+            boundary = cfg.status_boundary_pct
+            target = np.minimum((fill // boundary + 1) * boundary, FULL_PCT)
+            need = -(-(target - fill) // cfg.bag_fill_delta_pct)
+
+        nxt = np.full(len(rows), _NEVER, dtype=np.int64)
+        pending = fill < FULL_PCT
+        if cfg.arrival_prob > 0:
+            k = need[pending]
+            # The k-th arrival: k steps with a bag plus the empty steps before them.
+            nxt[pending] = start + k - 1 + self.rng.negative_binomial(k, cfg.arrival_prob)
+        self._since[rows] = start
+        self._need[rows] = need
+        self._next[rows] = nxt
+        self._version[rows] += 1
+
+        live = nxt < _NEVER
+        entries = list(zip(nxt[live].tolist(), rows[live].tolist(), self._version[rows[live]].tolist()))
+        if self._heap:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapify(entries)
+            self._heap = entries
+
+    def _settle_full(self, now: int, *, rows: bool = False) -> Any:
+        """Draw the rejected bags of full bins up to `now`; return their count (or rows)."""
+        np = self._np
+        full = np.flatnonzero(self._fill >= FULL_PCT)
+        drawn = self.rng.binomial(now - self._since[full], self.config.arrival_prob)
+        self._overflows[full] += drawn
+        self._since[full] = now
+        return full[drawn > 0] if rows else int(drawn.sum())
+
+    def _sync(self) -> None:
+        """Bring `_fill`, `_deposits` and `_overflows` up to `step_index`."""
+        np = self._np
+        now = self.step_index
+        self._settle_full(now)
+        # Of a bin's first need-1 bags, those before `now` are a uniformly random
+        # subset of the steps since `_since`: a hypergeometric draw.
+        rows = np.flatnonzero((self._since < now) & (self._next < _NEVER))
+        if len(rows):
+            since = self._since[rows]
+            arrived = self.rng.hypergeometric(now - since, self._next[rows] - now, self._need[rows] - 1)
+            self._fill[rows] += (arrived * self.config.bag_fill_delta_pct).astype(np.int16)
+            self._deposits[rows] += arrived
+            self._need[rows] -= arrived
+        self._since[self._since < now] = now
+
+
+def _require_numpy():
+    """Import NumPy lazily with a friendly error message."""
+
+    try:
+        import numpy as np  # type: ignore[import-not-found]
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(
+            "numpy is required for simulated_city.simulation. "
+            "Install it with `pip install -e \".[sim]\"` (or `pip install numpy`)."
+        ) from e
+    return np
+
+
+@dataclass(frozen=True, slots=True)
+class RunSummary:
+    """Totals of a :class:`FastForwardRunner` run."""
+
+    steps: int
+    events: int
+    overflows: int
+    batches: int
+    start_time: datetime
+    end_time: datetime
+    wall_time_s: float
+
+    @property
+    def speedup(self) -> float:
+        """Simulated seconds per wall-clock second."""
+        return (self.end_time - self.start_time).total_seconds() / max(self.wall_time_s, 1e-9)
+
+
+class FastForwardRunner:
+    """Run a :class:`BinSimulation` as fast as possible, publishing events in batches.
+
+    Wall-clock delays (`step_delay_s`) are ignored. Simulated time advances
+    in windows of `batch_steps` timesteps; with `skip_idle=True` each window is
+    one `advance()` call (quiet steps cost nothing), otherwise `step()` is
+    called for every timestep. After each window its events are published as
+    *one* MQTT message on `topic`:
+
+        {"start_step": 0, "start": "2026-01-01T00:00:00+00:00", "timestep_minutes": 15,
+         "steps": [...], "ids": [...], "fill": [...], "overflows": 3}
+    """
+
+    def __init__(
+        self,
+        sim: BinSimulation,
+        *,
+        publisher: Any = None,
+        topic: str = "simulated-city/bins/events",
+        batch_steps: int = 96,
+        skip_idle: bool = True,
+        qos: int = 0,
+        on_batch: Callable[[EventBatch], None] | None = None,
+    ):
+        if batch_steps < 1:
+            raise ValueError("batch_steps must be at least 1")
+        self.sim = sim
+        self.publisher = publisher
+        self.topic = topic
+        self.batch_steps = batch_steps
+        self.skip_idle = skip_idle
+        self.qos = qos
+        self.on_batch = on_batch
+
+    def run(self, steps: int) -> RunSummary:
+        """Simulate `steps` timesteps (e.g. 35_040 for a year of 15-minute steps)."""
+        sim = self.sim
+        start_time = sim.time
+        started = _time.perf_counter()
+        events = overflows = batches = 0
+        done = 0
+        while done < steps:
+            n = min(self.batch_steps, steps - done)
+            batch = sim.advance(n) if self.skip_idle else self._step_batch(n)
+            done += n
+            batches += 1
+            events += len(batch)
+            overflows += batch.overflow_count
+            if self.on_batch is not None:
+                self.on_batch(batch)
+            if self.publisher is not None:
+                self._publish(batch)
+        return RunSummary(
+            steps=steps,
+            events=events,
+            overflows=overflows,
+            batches=batches,
+            start_time=start_time,
+            end_time=sim.time,
+            wall_time_s=_time.perf_counter() - started,
+        )
+
+    def _step_batch(self, n: int) -> EventBatch:
+        np = self.sim._np
+        start = self.sim.step_index
+        results = [self.sim.step() for _ in range(n)]
+        return EventBatch(
+            start_step=start,
+            n_steps=n,
+            steps=np.concatenate([np.full(len(r), r.step, dtype=np.int64) for r in results]),
+            indices=np.concatenate([r.indices for r in results]),
+            fill_pct=np.concatenate([r.fill_pct for r in results]),
+            overflow_count=sum(len(r.overflow) for r in results),
+        )
+
+    def _publish(self, batch: EventBatch) -> None:
+        ids = self.sim.location_ids
+        payload = {
+            "start_step": batch.start_step,
+            "start": self.sim.time_at(batch.start_step).isoformat(),
+            "timestep_minutes": self.sim.config.timestep_minutes,
+            "steps": batch.steps.tolist(),
+            "ids": [ids[i] for i in batch.indices.tolist()],
+            "fill": batch.fill_pct.tolist(),
+            "overflows": batch.overflow_count,
+        }
+        self.publisher.publish_json(self.topic, payload, qos=self.qos)
+        # Batching publishers coalesce per topic: send each window right away.
+        flush = getattr(self.publisher, "flush", None)
+        if flush is not None:
+            flush()
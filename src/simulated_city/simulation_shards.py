@@ -0,0 +1,247 @@
+"""Run the rubbish-bin simulation in several processes (shards).
+
+One process is limited to one core. :class:`ShardedRunner` splits
+`SimulationConfig.locations` into shards and runs each shard in its own
+process, with its own :class:`~simulated_city.simulation.FastForwardRunner`,
+its own random stream and (optionally) its own `MqttConnector`. Per-step
+statistics are merged centrally.
+
+- **Stable partitioning:** by a hash of the location id (`partition="hash"`)
+  or by spatial tile (`partition="tile"`, keeps neighbouring bins together).
+  The same ids always land in the same shard.
+- **Reproducible streams:** shard k uses child k of
+  `numpy.random.SeedSequence(seed)`, so results do not depend on process
+  scheduling.
+- **Synchronisation:** with `sync=True` all shards wait for each other after
+  every batch of `batch_steps` steps, so their simulated clocks stay aligned
+  (useful when a dashboard consumes all shards live).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+import math
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+from typing import TYPE_CHECKING, Any
+import zlib
+
+from .config import MqttConfig, SimulationConfig, SimulationLocationConfig
+from .simulation import BinSimulation, FastForwardRunner, RunSummary, _require_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+PARTITION_HASH = "hash"
+PARTITION_TILE = "tile"
+
+# How long the coordinator waits for a message before checking that shards are alive.
+_POLL_S = 0.5
+
+
+def partition_locations(
+    locations: tuple[SimulationLocationConfig, ...],
+    n_shards: int,
+    *,
+    by: str = PARTITION_HASH,
+    tile_size_deg: float = 0.01,
+) -> list[list[int]]:
+    """Split location rows into `n_shards` lists (stable across runs and machines).
+
+    `by="hash"` spreads locations evenly by a CRC32 of their id.
+    `by="tile"` hashes the `tile_size_deg` lat/lon grid cell instead, so
+    nearby bins share a shard (shard sizes are then less even).
+    """
+    if n_shards < 1:
+        raise ValueError("n_shards must be at least 1")
+    if by not in (PARTITION_HASH, PARTITION_TILE):
+        raise ValueError(f"Unknown partition {by!r}. Use '{PARTITION_HASH}' or '{PARTITION_TILE}'")
+
+    shards: list[list[int]] = [[] for _ in range(n_shards)]
+    for row, loc in enumerate(locations):
+        if by == PARTITION_HASH:
+            key = loc.location_id
+        else:
+            key = f"{math.floor(loc.lat / tile_size_deg)}:{math.floor(loc.lon / tile_size_deg)}"
+        # crc32 rather than hash(): stable across processes and Python runs.
+        shards[zlib.crc32(key.encode("utf-8")) % n_shards].append(row)
+    return shards
+
+
+@dataclass(frozen=True, slots=True)
+class ShardedRunResult:
+    """Merged results of a :class:`ShardedRunner` run."""
+
+    steps: int
+    events_per_step: np.ndarray  # events per timestep, summed over shards
+    fill_pct: np.ndarray  # final fill level per location (original row order)
+    summaries: tuple[RunSummary, ...]  # one per shard
+    wall_time_s: float
+
+    @property
+    def events(self) -> int:
+        return int(self.events_per_step.sum())
+
+    @property
+    def overflows(self) -> int:
+        return sum(s.overflows for s in self.summaries)
+
+
+class ShardedRunner:
+    """Run a `SimulationConfig` across `n_shards` worker processes."""
+
+    def __init__(
+        self,
+        config: SimulationConfig,
+        *,
+        n_shards: int | None = None,
+        partition: str = PARTITION_HASH,
+        tile_size_deg: float = 0.01,
+        batch_steps: int = 96,
+        skip_idle: bool = True,
+        sync: bool = False,
+        mqtt_config: MqttConfig | None = None,
+        topic: str = "simulated-city/bins/events/{shard}",
+        start_method: str = "spawn",
+    ):
+        if not config.locations:
+            raise ValueError("ShardedRunner needs SimulationConfig.locations to partition")
+        np = _require_numpy()
+        # Every shard must share one clock and one root seed.
+        self.config = replace(config, start_time=config.start_time or datetime.now(timezone.utc))
+        self.seed_sequence = np.random.SeedSequence(config.seed)
+        self.n_shards = n_shards or os.cpu_count() or 1
+        self.shards = partition_locations(config.locations, self.n_shards, by=partition, tile_size_deg=tile_size_deg)
+        self.batch_steps = batch_steps
+        self.skip_idle = skip_idle
+        self.sync = sync
+        self.mqtt_config = mqtt_config
+        self.topic = topic
+        # "spawn" is the safe default: forking a process that runs MQTT threads can deadlock.
+        self._ctx = mp.get_context(start_method)
+
+    def run(self, steps: int) -> ShardedRunResult:
+        """Simulate `steps` timesteps in all shards and merge the results."""
+        np = _require_numpy()
+        started = time.perf_counter()
+        results = self._ctx.Queue()
+        active = [k for k, rows in enumerate(self.shards) if rows]
+        barrier = self._ctx.Barrier(len(active)) if self.sync and active else None
+        child_seeds = self.seed_sequence.spawn(self.n_shards)
+
+        processes = []
+        for k in active:
+            # Shards only need ids: pickling thousands of location dataclasses is slow.
+            ids = [self.config.locations[i].location_id for i in self.shards[k]]
+            args = (
+                k,
+                replace(self.config, locations=()),
+                ids,
+                child_seeds[k],
+                steps,
+                self.batch_steps,
+                self.skip_idle,
+                self.mqtt_config,
+                self.topic.format(shard=k),
+                results,
+                barrier,
+            )
+            process = self._ctx.Process(target=_run_shard, args=args, name=f"sim-shard-{k}", daemon=True)
+            process.start()
+            processes.append(process)
+
+        events_per_step = np.zeros(steps, dtype=np.int64)
+        fill_pct = np.zeros(len(self.config.locations), dtype=np.int16)
+        summaries: dict[int, RunSummary] = {}
+        try:
+            while len(summaries) < len(active):
+                try:
+                    kind, k, payload = results.get(timeout=_POLL_S)
+                except queue.Empty:
+                    dead = [p.name for p in processes if not p.is_alive() and p.exitcode not in (0, None)]
+                    if dead:
+                        raise RuntimeError(f"Simulation shard process(es) died: {', '.join(dead)}") from None
+                    continue
+                if kind == "batch":
+                    start_step, counts = payload
+                    events_per_step[start_step : start_step + len(counts)] += counts
+                elif kind == "done":
+                    summary, final_fill = payload
+                    summaries[k] = summary
+                    fill_pct[self.shards[k]] = final_fill
+                else:
+                    raise RuntimeError(f"Simulation shard {k} failed:\n{payload}")
+        except BaseException:
+            if barrier is not None:
+                barrier.abort()
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+
+        return ShardedRunResult(
+            steps=steps,
+            events_per_step=events_per_step,
+            fill_pct=fill_pct,
+            summaries=tuple(summaries[k] for k in sorted(summaries)),
+            wall_time_s=time.perf_counter() - started,
+        )
+
+
+def _run_shard(
+    shard: int,
+    config: SimulationConfig,
+    location_ids: list[str],
+    seed: Any,
+    steps: int,
+    batch_steps: int,
+    skip_idle: bool,
+    mqtt_config: MqttConfig | None,
+    topic: str,
+    results: Any,
+    barrier: Any,
+) -> None:
+    """Process entry point: run one shard and report batches and the final state."""
+    connector = None
+    try:
+        np = _require_numpy()
+        sim = BinSimulation(config, n_bins=len(location_ids), rng=np.random.Generator(np.random.PCG64(seed)))
+        sim.location_ids = tuple(location_ids)
+
+        publisher = None
+        if mqtt_config is not None:
+            from .mqtt import MqttConnector, MqttPublisher
+
+            connector = MqttConnector(mqtt_config, client_id_suffix=f"shard-{shard}")
+            connector.connect()
+            if not connector.wait_for_connection(timeout=10):
+                raise RuntimeError(f"Shard {shard} could not connect to {mqtt_config.host}:{mqtt_config.port}")
+            publisher = MqttPublisher(connector)
+
+        def on_batch(batch):
+            counts = np.bincount(batch.steps - batch.start_step, minlength=batch.n_steps)
+            results.put(("batch", shard, (batch.start_step, counts)))
+            if barrier is not None:
+                barrier.wait()
+
+        runner = FastForwardRunner(
+            sim,
+            publisher=publisher,
+            topic=topic,
+            batch_steps=batch_steps,
+            skip_idle=skip_idle,
+            on_batch=on_batch,
+        )
+        summary = runner.run(steps)
+        results.put(("done", shard, (summary, sim.fill_pct)))
+    except Exception:
+        results.put(("error", shard, traceback.format_exc()))
+    finally:
+        if connector is not None:
+            connector.disconnect()
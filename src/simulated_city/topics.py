@@ -0,0 +1,148 @@
+"""MQTT topic filter matching.
+
+MQTT topic filters may contain two wildcards:
+
+- `+` matches exactly one topic level: `city/+/status` matches `city/bins/status`
+- `#` matches any number of levels (must be last): `city/#` matches `city`,
+  `city/bins` and `city/bins/b1/status`
+
+:class:`TopicRouter` stores filters in a trie (one node per topic level), so
+finding every filter that matches an incoming topic costs about one dict lookup
+per level, no matter how many filters are registered. This replaces chains of
+`if "transport" in msg.topic: ...` checks in `on_message` callbacks.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+class _Node:
+    __slots__ = ("children", "values")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.values: list[Any] = []
+
+
+class TopicRouter:
+    """Map MQTT topic filters to values (usually handlers) and match topics against them."""
+
+    # Cache matches per topic; dashboards see the same topics over and over.
+    max_cache_size = 10_000
+
+    def __init__(self):
+        self._root = _Node()
+        self._cache: dict[str, list[Any]] = {}
+
+    def add(self, topic_filter: str, value: Any) -> None:
+        """Register `value` for `topic_filter`."""
+        _validate_filter(topic_filter)
+        node = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.setdefault(level, _Node())
+        node.values.append(value)
+        self._cache.clear()
+
+    def remove(self, topic_filter: str, value: Any = None) -> None:
+        """Remove `value` (or every value, if None) registered for `topic_filter`."""
+        path = [self._root]
+        for level in topic_filter.split("/"):
+            node = path[-1].children.get(level)
+            if node is None:
+                return
+            path.append(node)
+
+        node = path[-1]
+        if value is None:
+            node.values.clear()
+        else:
+            node.values = [v for v in node.values if v is not value and v != value]
+
+        # Prune empty branches so the trie doesn't grow forever.
+        levels = topic_filter.split("/")
+        for depth in range(len(levels), 0, -1):
+            child = path[depth]
+            if child.values or child.children:
+                break
+            del path[depth - 1].children[levels[depth - 1]]
+        self._cache.clear()
+
+    def values(self, topic_filter: str) -> list[Any]:
+        """Return the values registered for exactly `topic_filter` (no wildcard matching)."""
+        node = self._root
+        for level in topic_filter.split("/"):
+            node = node.children.get(level)
+            if node is None:
+                return []
+        return list(node.values)
+
+    def match(self, topic: str) -> list[Any]:
+        """Return every value whose filter matches `topic` (each value at most once)."""
+        cached = self._cache.get(topic)
+        if cached is not None:
+            return cached
+
+        levels = topic.split("/")
+        found: list[Any] = []
+        # Per the MQTT spec, filters starting with a wildcard don't match `$SYS/...` topics.
+        system_topic = topic.startswith("$")
+        stack = [(self._root, 0)]
+        while stack:
+            node, i = stack.pop()
+            hash_node = node.children.get("#")
+            if hash_node is not None and not (system_topic and i == 0):
+                found.extend(hash_node.values)
+            if i == len(levels):
+                found.extend(node.values)
+                continue
+            exact = node.children.get(levels[i])
+            if exact is not None:
+                stack.append((exact, i + 1))
+            plus = node.children.get("+")
+            if plus is not None and not (system_topic and i == 0):
+                stack.append((plus, i + 1))
+
+        result = _unique(found)
+        if len(self._cache) >= self.max_cache_size:
+            self._cache.clear()
+        self._cache[topic] = result
+        return result
+
+    def __len__(self) -> int:
+        count = 0
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            count += len(node.values)
+            stack.extend(node.children.values())
+        return count
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """Return True if `topic` matches `topic_filter` (handy for one-off checks)."""
+
+    router = TopicRouter()
+    router.add(topic_filter, True)
+    return bool(router.match(topic))
+
+
+def _validate_filter(topic_filter: str) -> None:
+    if not topic_filter:
+        raise ValueError("Topic filter must not be empty")
+    levels = topic_filter.split("/")
+    for i, level in enumerate(levels):
+        if "#" in level and (level != "#" or i != len(levels) - 1):
+            raise ValueError(f"Invalid topic filter {topic_filter!r}: '#' must be a whole, final level")
+        if "+" in level and level != "+":
+            raise ValueError(f"Invalid topic filter {topic_filter!r}: '+' must be a whole level")
+
+
+def _unique(values: list[Any]) -> list[Any]:
+    seen: set[int] = set()
+    out = []
+    for v in values:
+        if id(v) not in seen:
+            seen.add(id(v))
+            out.append(v)
+    return out
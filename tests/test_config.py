@@ -1,4 +1,7 @@
-from simulated_city.config import load_config
+import os
+import time
+
+from simulated_city.config import load_config, reload_config, watch_config
 
 
 def test_load_config_defaults_when_missing(tmp_path) -> None:
@@ -118,10 +121,69 @@ def test_load_config_single_broker_with_active_profiles(tmp_path) -> None:
     )
 
     cfg = load_config(p)
-    
+
     # Primary broker
     assert cfg.mqtt.host == "localhost"
-    
+
     # Only local broker in configs
     assert "local" in cfg.mqtt_configs
-    assert len(cfg.mqtt_configs) == 1
\ No newline at end of file
+    assert len(cfg.mqtt_configs) == 1
+
+
+def _write_config(path, host: str, username_env: str = "TEST_SIMCITY_USER") -> None:
+    path.write_text(
+        f"""
+        mqtt:
+          active_profiles: [default]
+          username_env: {username_env}
+          profiles:
+            default:
+              host: {host}
+        """.strip(),
+        encoding="utf-8",
+    )
+
+
+def test_load_config_is_cached_until_file_or_env_changes(tmp_path, monkeypatch) -> None:
+    p = tmp_path / "config.yaml"
+    _write_config(p, "one.example.com")
+
+    cfg = load_config(p)
+    again = load_config(p)
+    assert again == cfg and again.mqtt is cfg.mqtt  # served from the cache
+    # Each caller gets its own mqtt_configs dict: changes don't leak to others.
+    again.mqtt_configs["extra"] = again.mqtt
+    assert "extra" not in load_config(p).mqtt_configs
+
+    # Credentials named in the YAML are part of the cache key.
+    monkeypatch.setenv("TEST_SIMCITY_USER", "alice")
+    assert load_config(p).mqtt.username == "alice"
+
+    _write_config(p, "two.example.com")
+    os.utime(p, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    assert load_config(p).mqtt.host == "two.example.com"
+
+    assert reload_config(p) is not load_config(p, cache=False)
+
+
+def test_watch_config_swaps_in_new_config(tmp_path) -> None:
+    p = tmp_path / "config.yaml"
+    _write_config(p, "before.example.com")
+    changes = []
+
+    with watch_config(p, interval_s=60, on_change=changes.append) as watcher:
+        assert watcher.config.mqtt.host == "before.example.com"
+        assert not watcher.check()
+
+        _write_config(p, "after.example.com")
+        os.utime(p, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+        assert watcher.check()
+        assert watcher.config.mqtt.host == "after.example.com"
+
+        # A broken edit keeps the previous config.
+        p.write_text("mqtt: [unclosed", encoding="utf-8")
+        os.utime(p, ns=(time.time_ns(), time.time_ns() + 2_000_000_000))
+        assert not watcher.check()
+        assert watcher.config.mqtt.host == "after.example.com"
+
+    assert [c.mqtt.host for c in changes] == ["after.example.com"]
@@ -37,3 +37,186 @@ def test_wgs2utm_utm2wgs_roundtrip_copenhagen_city_hall() -> None:
     # Round-trip should be very close.
     assert lat1 == pytest.approx(lat0, abs=1e-6)
     assert lon1 == pytest.approx(lon0, abs=1e-6)
+
+
+def test_transform_many_matches_transform_xy() -> None:
+    pyproj = pytest.importorskip("pyproj")
+    assert pyproj  # keep linters happy
+
+    from simulated_city.geo import EPSG_25832, EPSG_4326, transform_many, transform_xy
+
+    lons = [12.56, 12.57, 12.58]
+    lats = [55.67, 55.68, 55.69]
+
+    xs, ys = transform_many(lons, lats, from_crs=EPSG_4326, to_crs=EPSG_25832)
+
+    assert isinstance(xs, list) and isinstance(xs[0], float)
+    for lon, lat, x, y in zip(lons, lats, xs, ys):
+        ex, ey = transform_xy(lon, lat, from_crs=EPSG_4326, to_crs=EPSG_25832)
+        assert x == pytest.approx(ex, abs=1e-9)
+        assert y == pytest.approx(ey, abs=1e-9)
+
+
+def test_transform_arrays_writes_into_output_buffers() -> None:
+    pytest.importorskip("pyproj")
+    np = pytest.importorskip("numpy")
+
+    from array import array
+
+    from simulated_city.geo import EPSG_25832, EPSG_4326, transform_arrays, transform_many
+
+    lons = array("d", [12.56, 12.57, 12.58])
+    lats = array("d", [55.67, 55.68, 55.69])
+    out_x = np.empty(3)
+    out_y = np.empty(3)
+
+    xs, ys = transform_arrays(lons, lats, from_crs=EPSG_4326, to_crs=EPSG_25832, out_x=out_x, out_y=out_y)
+
+    assert xs is out_x or np.shares_memory(xs, out_x)
+    ref_x, ref_y = transform_many(lons, lats, from_crs=EPSG_4326, to_crs=EPSG_25832)
+    assert out_x.tolist() == pytest.approx(ref_x, abs=1e-9)
+    assert out_y.tolist() == pytest.approx(ref_y, abs=1e-9)
+    # Inputs are left untouched.
+    assert list(lons) == [12.56, 12.57, 12.58]
+
+
+def test_builtin_backend_matches_pyproj_submillimetre() -> None:
+    pytest.importorskip("pyproj")
+    np = pytest.importorskip("numpy")
+
+    from simulated_city.geo import EPSG_25832, EPSG_3857, EPSG_4326, transform_arrays
+
+    # Random points covering Denmark and the rest of UTM zone 32.
+    rng = np.random.default_rng(42)
+    lons = rng.uniform(6.0, 15.0, 2_000)
+    lats = rng.uniform(53.0, 60.0, 2_000)
+
+    for dst in (EPSG_25832, EPSG_3857):
+        ref_x, ref_y = transform_arrays(lons, lats, from_crs=EPSG_4326, to_crs=dst)
+        got_x, got_y = transform_arrays(lons, lats, from_crs=EPSG_4326, to_crs=dst, backend="builtin")
+        assert np.abs(got_x - ref_x).max() < 1e-4
+        assert np.abs(got_y - ref_y).max() < 1e-4
+
+        # Inverse: 1e-9 degrees is roughly 0.1 mm on the ground.
+        back_lon, back_lat = transform_arrays(ref_x, ref_y, from_crs=dst, to_crs=EPSG_4326, backend="builtin")
+        assert np.abs(back_lon - lons).max() < 1e-9
+        assert np.abs(back_lat - lats).max() < 1e-9
+
+    ref_x, ref_y = transform_arrays(lons, lats, from_crs=EPSG_4326, to_crs=EPSG_3857)
+    utm_ref = transform_arrays(ref_x, ref_y, from_crs=EPSG_3857, to_crs=EPSG_25832)
+    utm_got = transform_arrays(ref_x, ref_y, from_crs=EPSG_3857, to_crs=EPSG_25832, backend="builtin")
+    assert np.abs(utm_got[0] - utm_ref[0]).max() < 1e-4
+    assert np.abs(utm_got[1] - utm_ref[1]).max() < 1e-4
+
+
+def test_builtin_backend_scalars_without_pyproj() -> None:
+    from simulated_city.geo import transform_xy, utm2wgs, wgs2utm
+
+    lat0, lon0 = 55.67597, 12.56984
+    e, n = wgs2utm(lat0, lon0, backend="builtin")
+    assert isinstance(e, float)
+    # Reference values from pyproj (EPSG:4326 -> EPSG:25832).
+    assert e == pytest.approx(724449.4532, abs=1e-3)
+    assert n == pytest.approx(6175794.5497, abs=1e-3)
+
+    lat1, lon1 = utm2wgs(e, n, backend="builtin")
+    assert lat1 == pytest.approx(lat0, abs=1e-10)
+    assert lon1 == pytest.approx(lon0, abs=1e-10)
+
+    with pytest.raises(ValueError):
+        transform_xy(1.0, 2.0, from_crs="EPSG:2154", to_crs="EPSG:4326", backend="builtin")
+    with pytest.raises(ValueError):
+        transform_xy(1.0, 2.0, backend="fast")
+
+
+def test_missing_pyproj_gives_install_hint(monkeypatch) -> None:
+    import sys
+
+    from simulated_city import geo
+
+    monkeypatch.setitem(sys.modules, "pyproj", None)  # import pyproj -> ModuleNotFoundError
+    geo._get_crs.cache_clear()
+    try:
+        with pytest.raises(ModuleNotFoundError, match=r"\.\[geo\]"):
+            geo._get_transformer("EPSG:3035", "EPSG:4258")  # not cached for this thread
+    finally:
+        geo._get_crs.cache_clear()
+
+
+def test_transform_cache_counts_hits_and_evicts_lru() -> None:
+    from simulated_city.geo import TransformCache, wgs2utm
+
+    cache = TransformCache(max_size=2)
+    first = wgs2utm(55.6761, 12.5683, backend="builtin", cache=cache)
+    assert first == wgs2utm(55.6761, 12.5683, backend="builtin")
+    # Within the quantum (1e-7 degrees) counts as the same point.
+    assert wgs2utm(55.67610001, 12.5683, backend="builtin", cache=cache) == first
+    assert cache.stats().hits == 1 and cache.stats().misses == 1
+
+    wgs2utm(55.70, 12.50, backend="builtin", cache=cache)
+    wgs2utm(55.71, 12.50, backend="builtin", cache=cache)  # evicts the oldest entry
+    wgs2utm(55.6761, 12.5683, backend="builtin", cache=cache)
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (1, 4, 2, 2)
+
+
+def test_transform_cache_pin_keeps_static_points() -> None:
+    from simulated_city.geo import EPSG_4326, TransformCache, transform_many
+
+    lons, lats = [12.56, 12.57, 12.58], [55.67, 55.68, 55.69]
+    cache = TransformCache(max_size=1)
+    xs, ys = cache.pin(lons, lats, from_crs=EPSG_4326, backend="builtin")
+    assert (xs, ys) == transform_many(lons, lats, from_crs=EPSG_4326, backend="builtin")
+
+    cache.utm2wgs(720000.0, 6170000.0, backend="builtin")
+    cache.utm2wgs(721000.0, 6170000.0, backend="builtin")
+    for lon, lat, x, y in zip(lons, lats, xs, ys):
+        assert cache.wgs2utm(lat, lon, backend="builtin") == (x, y)
+    stats = cache.stats()
+    assert (stats.hits, stats.pinned, stats.size) == (3, 3, 1)
+
+    cache.clear(pinned=True)
+    assert cache.stats() == type(stats)(hits=0, misses=0, evictions=0, size=0, pinned=0)
+
+
+def test_transform_arrays_workers_split_across_threads() -> None:
+    np = pytest.importorskip("numpy")
+
+    from simulated_city.geo import EPSG_4326, transform_arrays
+
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(8, 15, 100_000), rng.uniform(54, 58, 100_000)
+    backends = ["builtin"]
+    try:
+        import pyproj  # noqa: F401
+
+        backends.append("pyproj")
+    except ModuleNotFoundError:
+        pass
+
+    for backend in backends:
+        single = transform_arrays(lon, lat, from_crs=EPSG_4326, backend=backend)
+        split = transform_arrays(lon, lat, from_crs=EPSG_4326, backend=backend, workers=4)
+        assert np.array_equal(single[0], split[0]) and np.array_equal(single[1], split[1])
+
+
+def test_transformers_are_per_thread() -> None:
+    pytest.importorskip("pyproj")
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+
+    from simulated_city.geo import _get_transformer, wgs2utm
+
+    expected = wgs2utm(55.6761, 12.5683)
+    seen = {}
+
+    def work(_):
+        transformer = _get_transformer("EPSG:4326", "EPSG:25832")
+        assert transformer is _get_transformer("EPSG:4326", "EPSG:25832")
+        seen[threading.get_ident()] = transformer
+        return [wgs2utm(55.6761, 12.5683) for _ in range(200)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(work, range(8)))
+    assert all(r == expected for batch in results for r in batch)
+    assert len({id(t) for t in seen.values()}) == len(seen)
@@ -0,0 +1,47 @@
+"""Import-time checks: `import simulated_city` must stay cheap."""
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# Regression budgets in microseconds (cumulative, from `python -X importtime`).
+# Generous on purpose: they catch an accidental eager import, not machine noise.
+PACKAGE_BUDGET_US = 50_000
+LOAD_CONFIG_BUDGET_US = 300_000
+
+HEAVY_MODULES = ("yaml", "dotenv", "paho", "numpy", "pyproj", "anymap_ts", "multiprocessing")
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC), os.environ.get("PYTHONPATH", "")]))
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, env=env, check=True)
+
+
+def _cumulative_us(importtime_stderr: str, module: str) -> int:
+    for line in importtime_stderr.splitlines():
+        parts = [p.strip() for p in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_package_import_is_lazy() -> None:
+    out = _run(
+        "import sys, simulated_city\n"
+        f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+        "from simulated_city import load_config\n"
+        "print('simulated_city.mqtt' in sys.modules, 'simulated_city.geo' in sys.modules)\n"
+    ).stdout.splitlines()
+    assert out == ["[]", "False False"]
+
+
+def test_import_time_budget() -> None:
+    package = _run("import simulated_city", "-X", "importtime").stderr
+    assert _cumulative_us(package, "simulated_city") < PACKAGE_BUDGET_US
+
+    # What a worker that only needs `load_config` pays (PyYAML + python-dotenv).
+    config = _run("import simulated_city.config", "-X", "importtime").stderr
+    assert _cumulative_us(config, "simulated_city.config") < LOAD_CONFIG_BUDGET_US
@@ -1,4 +1,23 @@
-from simulated_city.maplibre_live import _inject_renderer_binding
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import pytest
+
+from simulated_city import maplibre_live
+from simulated_city.maplibre_live import (
+    _PATCH_JS,
+    _AgentLayerState,
+    RenderScheduler,
+    _fallback_cache_dir,
+    _inject_renderer_binding,
+    _patched_bundle_path,
+    _pack_marker_batch,
+)
 
 
 def test_inject_renderer_binding_minified_export() -> None:
@@ -19,3 +38,258 @@ def test_inject_renderer_binding_parses_alt_export() -> None:
     out = _inject_renderer_binding(content)
     assert "const MapLibreRenderer=A$1;" in out
     assert "export{A$1 as MapLibreRenderer" in out
+
+
+def test_pack_marker_batch_interleaves_little_endian_float64() -> None:
+    ids, coords = _pack_marker_batch({"a": (12.5, 55.5), "b": (12.25, 55.75)})
+    assert ids == ["a", "b"]
+    assert struct.unpack("<4d", coords) == (12.5, 55.5, 12.25, 55.75)
+
+    ids, coords = _pack_marker_batch([("c", (1, 2))])
+    assert ids == ["c"] and len(coords) == 16
+
+
+class FakeMapLibreMap:
+    """Stands in for anymap-ts' MapLibreMap and records what the widget sends."""
+
+    def __init__(self, *args, **kwargs):
+        self.sent = []
+        self.js_calls = []
+        self.fallback_moves = []
+        self.handlers = {}
+
+    def on_map_event(self, name, handler):
+        self.handlers[name] = handler
+
+    def send(self, content, buffers=None):
+        self.sent.append((content, buffers))
+
+    def call_js_method(self, method, *args, **kwargs):
+        self.js_calls.append((method, args, kwargs))
+
+    def remove_marker(self, marker_id):
+        pass
+
+    def add_marker(self, lng, lat, **kwargs):
+        self.fallback_moves.append((kwargs["name"], lng, lat))
+
+
+@pytest.fixture
+def live_map(tmp_path, monkeypatch):
+    """A LiveMapLibreMap built on FakeMapLibreMap (no anymap-ts or browser needed)."""
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    (static_dir / "maplibre.js").write_text("var a=1;export{oDt as MapLibreRenderer};", encoding="utf-8")
+
+    anymap_maplibre = types.ModuleType("anymap_ts.maplibre")
+    anymap_maplibre.MapLibreMap = FakeMapLibreMap
+    anymap_maplibre.STATIC_DIR = static_dir
+    file_contents = types.ModuleType("anywidget._file_contents")
+    file_contents.FileContents = lambda path, start_thread=False: path
+    for name, module in {
+        "anymap_ts": types.ModuleType("anymap_ts"),
+        "anymap_ts.maplibre": anymap_maplibre,
+        "anywidget": types.ModuleType("anywidget"),
+        "anywidget._file_contents": file_contents,
+    }.items():
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.setenv("SIMULATED_CITY_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(maplibre_live, "_PATCHED_PATHS", {})
+    return maplibre_live._define_live_map_class()()
+
+
+def test_patch_handles_batched_moves(live_map) -> None:
+    assert '"anymap:moveMarkers"' in _PATCH_JS
+    assert "getFloat64" in _PATCH_JS
+
+    # First batch: one custom message with the ids, a layout number and packed coords.
+    live_map.move_markers({"a": (12.5, 55.5), "b": (12.25, 55.75)}, color="red")
+    (content, buffers), = live_map.sent
+    assert content == {
+        "type": "anymap:moveMarkers",
+        "layout": 1,
+        "ids": ["a", "b"],
+        "styles": [{"color": "red", "popup": None}, {"color": "red", "popup": None}],
+    }
+    assert buffers == [struct.pack("<4d", 12.5, 55.5, 12.25, 55.75)]
+
+    # Same ids again: only the layout number and the coordinates travel.
+    live_map.move_markers([("a", (1, 2)), ("b", (3, 4))])
+    assert live_map.sent[-1] == ({"type": "anymap:moveMarkers", "layout": 1}, [struct.pack("<4d", 1, 2, 3, 4)])
+
+    # New ids (or a resync request from the browser) re-send the id list.
+    live_map.move_markers({"c": (5, 6)})
+    assert live_map.sent[-1][0]["layout"] == 2 and live_map.sent[-1][0]["ids"] == ["c"]
+    live_map.handlers["anymap:moveMarkersResync"]({})
+    live_map.move_markers({"c": (7, 8)})
+    assert live_map.sent[-1][0]["layout"] == 3 and live_map.sent[-1][0]["ids"] == ["c"]
+
+    # Remove+add fallback runs until the browser acks the patched method.
+    assert live_map.fallback_moves[:2] == [("a", 12.5, 55.5), ("b", 12.25, 55.75)]
+    live_map.handlers["anymap:moveMarkerAck"]({})
+    moves = len(live_map.fallback_moves)
+    live_map.move_markers({"c": (9, 10)})
+    assert len(live_map.fallback_moves) == moves
+
+
+def test_move_markers_color_only_styles_new_markers(live_map) -> None:
+    live_map.move_marker("a", (1, 2), color="blue")
+    live_map.move_markers({"a": (3, 4), "b": (5, 6)}, color="red")
+
+    content, _buffers = live_map.sent[-1]
+    assert content["styles"] == [{"color": "blue", "popup": None}, {"color": "red", "popup": None}]
+    assert live_map._marker_style["a"]["color"] == "blue"
+
+
+def test_patch_interpolates_marker_moves(live_map) -> None:
+    assert "animateMarkerTo" in _PATCH_JS
+    assert "requestAnimationFrame" in _PATCH_JS
+
+    # The duration travels with the message; without it, moves are instant.
+    live_map.move_marker("a", (12.5, 55.5), duration_ms=250)
+    live_map.move_marker("a", (12.6, 55.6))
+    assert live_map.js_calls == [
+        ("moveMarker", (12.5, 55.5), {"id": "a", "duration": 250.0}),
+        ("moveMarker", (12.6, 55.6), {"id": "a"}),
+    ]
+
+    live_map.move_markers({"a": (1, 2)}, duration_ms=400)
+    live_map.move_markers({"a": (3, 4)})
+    assert live_map.sent[0][0]["duration"] == 400.0
+    assert "duration" not in live_map.sent[1][0]
+
+
+def test_agent_layer_sends_only_diffs() -> None:
+    state = _AgentLayerState("agents", {})
+
+    content, buffers = state.diff({"a": (1, 2), "b": (3, 4), "c": (5, 6)})
+    assert content["reset"] and content["added"] == ["a", "b", "c"]
+
+    # "a" is unchanged, "b" moves, "c" vanishes.
+    content, buffers = state.diff({"a": (1, 2), "b": (7, 8)})
+    assert content["added"] == [] and content["seq"] == 2
+    added_slots, added_xy, moved_slots, moved_xy, removed_slots = buffers
+    assert struct.unpack("<I", moved_slots) == (state.slots["b"],)
+    assert struct.unpack("<2d", moved_xy) == (7.0, 8.0)
+    assert len(removed_slots) == 4
+
+    assert state.diff({"a": (1, 2), "b": (7, 8)}) is None
+
+    # A resync sends a full frame.
+    state.needs_reset = True
+    content, buffers = state.diff({}, remove_missing=False)
+    assert content["reset"] and sorted(content["added"]) == ["a", "b"]
+
+
+class RecordingMap:
+    def __init__(self):
+        self.batches = []
+        self.single = []
+        self.agents = []
+
+    def move_markers(self, positions):
+        self.batches.append(dict(positions))
+
+    def move_marker(self, marker_id, lnglat, *, color=None, popup=None):
+        self.single.append((marker_id, lnglat, color))
+
+    def update_agents(self, positions, *, layer, remove_missing):
+        self.agents.append((layer, dict(positions), remove_missing))
+
+
+def test_render_scheduler_coalesces_and_counts() -> None:
+    live_map = RecordingMap()
+    scheduler = RenderScheduler(live_map, max_fps=None, max_pending=2)
+    for i in range(10):
+        scheduler.move_marker("bus-1", (12.0 + i, 55.0))
+    scheduler.move_marker("bus-2", (12.5, 55.5), color="#ff0000")
+    assert not scheduler.move_marker("bus-3", (1.0, 2.0))
+
+    assert scheduler.flush() == 2
+    assert live_map.batches == [{"bus-1": (21.0, 55.0)}]
+    assert live_map.single == [("bus-2", (12.5, 55.5), "#ff0000")]
+    assert (scheduler.updates_count, scheduler.coalesced_count, scheduler.dropped_count) == (12, 9, 1)
+    assert scheduler.flush() == 0 and scheduler.frames_count == 1
+
+    scheduler.close()
+    assert not scheduler.move_marker("bus-1", (0.0, 0.0))
+
+
+def test_render_scheduler_concurrent_flushes_keep_order() -> None:
+    live_map = RecordingMap()
+    scheduler = RenderScheduler(live_map, max_fps=None)
+    release = threading.Event()
+    move_markers = live_map.move_markers
+    calls = []
+
+    def slow_move_markers(positions):
+        calls.append(positions)
+        if len(calls) == 1:
+            release.wait(1)  # the first frame is slow to send
+        move_markers(positions)
+
+    live_map.move_markers = slow_move_markers
+    scheduler.move_marker("bus-1", (1.0, 1.0))
+    first = threading.Thread(target=scheduler.flush)
+    first.start()
+    time.sleep(0.02)
+    scheduler.move_marker("bus-1", (2.0, 2.0))
+    second = threading.Thread(target=scheduler.flush)
+    second.start()
+    time.sleep(0.02)
+    release.set()
+    first.join()
+    second.join()
+    assert live_map.batches == [{"bus-1": (1.0, 1.0)}, {"bus-1": (2.0, 2.0)}]
+
+
+def test_render_scheduler_flushes_agent_layer_in_background() -> None:
+    live_map = RecordingMap()
+    with RenderScheduler(live_map, max_fps=200, layer="agents") as scheduler:
+        scheduler.move_marker("a", (1.0, 2.0))
+        deadline = time.monotonic() + 2
+        while not live_map.agents and time.monotonic() < deadline:
+            time.sleep(0.005)
+    assert live_map.agents[0] == ("agents", {"a": (1.0, 2.0)}, False)
+
+
+def test_patched_bundle_cache_is_content_addressed_and_evicts(tmp_path) -> None:
+    bundle = tmp_path / "maplibre.js"
+    bundle.write_text("var a=1;export{oDt as MapLibreRenderer};", encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+
+    first = _patched_bundle_path(bundle, cache_dir, stamp="v1")
+    assert first.parent == cache_dir
+    assert first.read_text(encoding="utf-8").endswith(_PATCH_JS)
+    assert not list(cache_dir.glob(".tmp-*"))
+
+    # Warm start: served from the index without reading the bundle.
+    bundle.unlink()
+    assert _patched_bundle_path(bundle, cache_dir, stamp="v1") == first
+
+    # A new bundle version evicts the old one when the cache is over budget.
+    bundle.write_text("var b=2;export{oDt as MapLibreRenderer};", encoding="utf-8")
+    os.utime(first, (0, 0))
+    second = _patched_bundle_path(bundle, cache_dir, stamp="v2", max_bytes=1)
+    assert second != first
+    assert second.exists() and not first.exists()
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership checks")
+def test_fallback_cache_dir_must_be_private(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path))
+    path = tmp_path / f"simulated-city-{os.getuid()}"
+
+    assert _fallback_cache_dir() == path
+    assert path.stat().st_mode & 0o777 == 0o700
+
+    # Writable by others: someone else could plant a bundle.
+    path.chmod(0o777)
+    assert _fallback_cache_dir() is None
+
+    # A symlink to someone else's directory is not ours either.
+    path.rmdir()
+    other = tmp_path / "other"
+    other.mkdir(mode=0o700)
+    path.symlink_to(other)
+    assert _fallback_cache_dir() is None
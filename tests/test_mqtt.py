@@ -0,0 +1,306 @@
+"""Offline tests for the MQTT publisher helpers (no broker needed)."""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from simulated_city.mqtt import (
+    BatchingMqttPublisher,
+    MqttPublisher,
+    MqttSubscriber,
+    MultiBrokerPublisher,
+    PipelinedMqttPublisher,
+)
+
+
+class FakeMessageInfo:
+    def __init__(self, mid: int, rc: int = 0):
+        self.mid = mid
+        self.rc = rc
+        self.published = False
+
+    def is_published(self) -> bool:
+        return self.published
+
+
+class FakeClient:
+    """Records publishes instead of talking to a broker."""
+
+    def __init__(self):
+        self.published = []
+        self.infos = []
+        self.subscriptions = []
+
+    def is_connected(self) -> bool:
+        return True
+
+    def subscribe(self, topic, qos=0):
+        self.subscriptions.append((topic, qos))
+        return 0, 1
+
+    def max_inflight_messages_set(self, inflight):
+        self.max_inflight = inflight
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload, qos, retain))
+        info = FakeMessageInfo(len(self.published))
+        self.infos.append(info)
+        return info
+
+
+class FakeConnector:
+    def __init__(self):
+        self.client = FakeClient()
+        self.listeners = []
+        self.connect_listeners = []
+
+    def add_connect_listener(self, listener):
+        self.connect_listeners.append(listener)
+
+    def add_publish_listener(self, listener):
+        self.listeners.append(listener)
+
+    def ack(self, mid):
+        self.listeners[0](mid)
+        self.client.infos[mid - 1].published = True
+
+
+def make_connector():
+    return FakeConnector()
+
+
+def test_publisher_accepts_python_objects() -> None:
+    connector = make_connector()
+    publisher = MqttPublisher(connector, codec="position")
+
+    publisher.publish_json("city/bins/a", {"fill": 10})
+    publisher.publish("city/positions", [(0, 12.5, 55.6)])
+
+    (_, json_payload, _, _), (_, binary_payload, _, _) = connector.client.published
+    assert json.loads(json_payload) == {"fill": 10}
+    assert len(binary_payload) == 20
+
+
+def test_batching_publisher_coalesces_last_value_wins() -> None:
+    connector = make_connector()
+    publisher = BatchingMqttPublisher(connector, flush_interval_s=None)
+
+    publisher.publish_json("city/bins/a", '{"fill": 10}')
+    publisher.publish_json("city/bins/b", '{"fill": 20}')
+    publisher.publish_json("city/bins/a", '{"fill": 30}')
+    assert connector.client.published == []
+    assert publisher.pending_count == 2
+
+    assert publisher.flush() == 2
+    assert connector.client.published == [
+        ("city/bins/a", '{"fill": 30}', 0, False),
+        ("city/bins/b", '{"fill": 20}', 0, False),
+    ]
+    assert publisher.coalesced_count == 1
+    assert publisher.published_count == 2
+
+
+def test_batching_publisher_flushes_on_size_and_tracks_acks() -> None:
+    connector = make_connector()
+    publisher = BatchingMqttPublisher(connector, flush_interval_s=None, max_batch=3)
+
+    for i in range(3):
+        publisher.publish_json(f"city/bins/{i}", "{}", qos=1)
+
+    # Reaching max_batch flushes without waiting for acks.
+    assert len(connector.client.published) == 3
+    assert publisher.unacked_count == 3
+    assert publisher.wait_for_acks(timeout=0.01) is False
+
+    for info in connector.client.infos:
+        info.published = True
+    assert publisher.unacked_count == 0
+    assert publisher.wait_for_acks(timeout=0.01) is True
+
+
+def test_batching_publisher_timed_flush() -> None:
+    connector = make_connector()
+    with BatchingMqttPublisher(connector, flush_interval_s=0.01) as publisher:
+        publisher.publish_json("city/bins/a", "{}")
+        for _ in range(100):
+            if connector.client.published:
+                break
+            time.sleep(0.01)
+    assert connector.client.published == [("city/bins/a", "{}", 0, False)]
+
+
+def test_batching_publisher_concurrent_flushes_keep_order() -> None:
+    connector = make_connector()
+    publisher = BatchingMqttPublisher(connector, flush_interval_s=None)
+    client = connector.client
+    release = threading.Event()
+    publish = client.publish
+    calls = []
+
+    def slow_publish(topic, payload=None, qos=0, retain=False):
+        calls.append(topic)
+        if len(calls) == 1:
+            release.wait(1)  # the first flush is slow to send
+        return publish(topic, payload=payload, qos=qos, retain=retain)
+
+    client.publish = slow_publish
+    publisher.publish_json("city/bins/a", '{"fill": 10}')
+    first = threading.Thread(target=publisher.flush)
+    first.start()
+    time.sleep(0.02)
+    publisher.publish_json("city/bins/a", '{"fill": 20}')
+    second = threading.Thread(target=publisher.flush)
+    second.start()
+    time.sleep(0.02)
+    release.set()
+    first.join()
+    second.join()
+    assert [payload for _, payload, _, _ in client.published] == ['{"fill": 10}', '{"fill": 20}']
+
+
+def test_batching_publisher_counts_no_conn_as_queued_for_qos1() -> None:
+    connector = make_connector()
+    publisher = BatchingMqttPublisher(connector, flush_interval_s=None)
+    publish = connector.client.publish
+
+    def disconnected_publish(topic, payload=None, qos=0, retain=False):
+        info = publish(topic, payload=payload, qos=qos, retain=retain)
+        info.rc = 4  # MQTT_ERR_NO_CONN: paho still queues QoS 1/2 messages
+        return info
+
+    connector.client.publish = disconnected_publish
+    publisher.publish_json("city/bins/a", "{}", qos=1)
+    publisher.publish_json("city/bins/b", "{}", qos=0)
+    publisher.flush()
+    assert publisher.failed_count == 1
+    assert publisher.published_count == 1
+    assert publisher.unacked_count == 1
+
+
+def test_pipelined_publisher_returns_futures_resolved_by_acks() -> None:
+    connector = make_connector()
+    publisher = PipelinedMqttPublisher(connector, max_inflight=10)
+
+    futures = [publisher.publish_json(f"city/bins/{i}", "{}", qos=1) for i in range(3)]
+    assert not any(f.done() for f in futures)
+    assert publisher.inflight_count == 3
+    assert publisher.flush(timeout=0.01) is False
+
+    for mid in (1, 2, 3):
+        connector.ack(mid)
+    assert [f.result(timeout=0) for f in futures] == [1, 2, 3]
+    assert publisher.flush(timeout=0.01) is True
+
+    # QoS 0 has no ack; its future completes immediately.
+    assert publisher.publish_json("city/bins/x", "{}", qos=0).done()
+
+
+def test_pipelined_publisher_applies_backpressure() -> None:
+    connector = make_connector()
+    publisher = PipelinedMqttPublisher(connector, max_inflight=2)
+
+    publisher.publish_json("a", "{}", qos=1)
+    publisher.publish_json("b", "{}", qos=1)
+    with pytest.raises(TimeoutError):
+        publisher.publish_json("c", "{}", qos=1, timeout=0.02)
+    assert len(connector.client.published) == 2
+
+    connector.ack(1)
+    publisher.publish_json("c", "{}", qos=1, timeout=0.02)
+    assert len(connector.client.published) == 3
+
+
+def test_multi_broker_publisher_slow_broker_does_not_block_fast_one() -> None:
+    fast = make_connector()
+    slow = make_connector()
+    multi = SimpleNamespace(connectors={"local": fast, "cloud": slow})
+
+    publisher = MultiBrokerPublisher(multi, max_queue=2, max_inflight=1)
+    try:
+        for i in range(5):
+            publisher.publish_json(f"city/bins/{i}", "{}", qos=1)
+            # The local broker acks immediately; the cloud broker never does.
+            for _ in range(100):
+                if len(fast.client.published) > i:
+                    break
+                time.sleep(0.005)
+            fast.ack(i + 1)
+
+        assert publisher.flush(timeout=0.05) is False
+        stats = publisher.stats()
+        assert stats["local"].published == 5
+        assert stats["local"].avg_latency_s is not None
+        assert stats["cloud"].published == 0
+        assert stats["cloud"].inflight == 1
+        # One message in flight, one stuck in the worker, two queued: the rest are dropped.
+        assert stats["cloud"].dropped >= 1
+    finally:
+        publisher.close(timeout=0.05)
+
+
+def test_multi_broker_publisher_close_returns_when_broker_never_acks() -> None:
+    dead = make_connector()
+    multi = SimpleNamespace(connectors={"cloud": dead})
+    publisher = MultiBrokerPublisher(multi, max_queue=2, max_inflight=1)
+    for i in range(10):
+        publisher.publish_json(f"city/bins/{i}", "{}", qos=1)
+
+    closer = threading.Thread(target=publisher.close, kwargs={"timeout": 0.05})
+    closer.start()
+    closer.join(timeout=3)
+    assert not closer.is_alive()
+
+    stats = publisher.stats()["cloud"]
+    assert stats.published == 0
+    assert stats.inflight == 1
+    assert stats.queue_depth == 0
+    assert stats.dropped == 9  # everything except the one message in flight
+
+
+def test_subscriber_routes_and_decodes_once() -> None:
+    connector = make_connector()
+    subscriber = MqttSubscriber(connector)
+    calls = []
+    decodes = []
+
+    class CountingCodec:
+        name = "counting"
+
+        def decode(self, payload):
+            decodes.append(payload)
+            return json.loads(payload)
+
+    subscriber.codec = CountingCodec()
+    subscriber.subscribe("city/#", lambda topic, data: calls.append(("all", topic, data)))
+    subscriber.subscribe("city/+/status", lambda topic, data: calls.append(("status", topic, data)))
+    subscriber.subscribe("city/transport/status", lambda topic, data: calls.append(("raw", topic, data)), codec=None)
+
+    assert subscriber.dispatch("city/transport/status", b'{"vehicles": 3}') == 3
+    assert sorted(c[0] for c in calls) == ["all", "raw", "status"]
+    assert len(decodes) == 1
+    assert ("raw", "city/transport/status", b'{"vehicles": 3}') in calls
+
+    # Subscriptions are renewed after a reconnect.
+    connector.connect_listeners[0]()
+    filters, _ = connector.client.subscriptions[-1]
+    assert sorted(t for t, _ in filters) == [
+        "city/#",
+        "city/+/status",
+        "city/transport/status",
+    ]
+
+
+def test_subscriber_with_workers_handles_messages_off_the_network_thread() -> None:
+    connector = make_connector()
+    subscriber = MqttSubscriber(connector, workers=2)
+    threads = []
+    subscriber.subscribe("city/#", lambda topic, data: threads.append(threading.current_thread()))
+
+    subscriber._on_message(connector.client, None, SimpleNamespace(topic="city/bins", payload=b"{}"))
+    assert subscriber.pool.join(timeout=5)
+    subscriber.close()
+
+    assert threads and threads[0] is not threading.current_thread()
@@ -0,0 +1,67 @@
+import asyncio
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from simulated_city.config import load_config
+from simulated_city.mqtt_async import AsyncMqttConnector, AsyncMqttPublisher
+
+
+def is_broker_available(host, port):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(1)
+    try:
+        s.connect((host, port))
+        s.close()
+        return True
+    except (socket.timeout, socket.error):
+        return False
+
+
+default_config = load_config()
+broker_available = is_broker_available(default_config.mqtt.host, default_config.mqtt.port)
+
+
+def test_async_connector_queues_messages_and_resolves_acks_offline() -> None:
+    """Callbacks feed the async iterator and ack futures without a broker."""
+
+    async def scenario():
+        connector = AsyncMqttConnector(default_config.mqtt, client_id_suffix="test-async-offline")
+        connector._bind_loop()
+
+        msg = SimpleNamespace(topic="simulated-city/test/async", payload=b"{}")
+        connector._on_message(connector.client, None, msg)
+        received = await asyncio.wait_for(connector.messages().__anext__(), 1)
+        assert received is msg
+
+        info = SimpleNamespace(mid=7, is_published=lambda: False)
+        ack = connector._wait_for_ack(info)
+        assert not ack.done()
+        connector._on_publish(connector.client, None, 7, None, None)
+        assert await asyncio.wait_for(ack, 1) == 7
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.skipif(not broker_available, reason=f"MQTT broker not available at {default_config.mqtt.host}:{default_config.mqtt.port}")
+def test_async_publish_and_receive_roundtrip() -> None:
+    """Publish QoS 1 messages from coroutines and receive them via `messages()`."""
+
+    async def scenario():
+        topic = "simulated-city/test/async-roundtrip"
+        async with AsyncMqttConnector(default_config.mqtt, client_id_suffix="test-async") as connector:
+            await connector.subscribe(topic, qos=1)
+            await asyncio.sleep(0.2)
+
+            publisher = AsyncMqttPublisher(connector)
+            await asyncio.gather(*(publisher.publish_json(topic, f'{{"i": {i}}}', qos=1) for i in range(20)))
+
+            received = []
+            async for msg in connector.messages():
+                received.append(msg.payload)
+                if len(received) == 20:
+                    break
+        assert len(received) == 20
+
+    asyncio.run(asyncio.wait_for(scenario(), 15))
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from simulated_city.mqtt_workers import MessageWorkerPool
+
+
+def test_worker_pool_keeps_per_topic_order() -> None:
+    seen: dict[str, list[int]] = {}
+    lock = threading.Lock()
+
+    def handler(topic, payload):
+        time.sleep(0.0005)
+        with lock:
+            seen.setdefault(topic, []).append(int(payload))
+
+    with MessageWorkerPool(handler, workers=4, queue_size=100) as pool:
+        for i in range(50):
+            for topic in ("a", "b", "c"):
+                pool.submit(topic, str(i).encode())
+        assert pool.join(timeout=5)
+        stats = pool.stats()
+
+    assert all(values == list(range(50)) for values in seen.values())
+    assert stats.processed == 150
+    assert stats.dropped == 0
+
+
+@pytest.mark.parametrize(
+    ("overflow", "expected"),
+    [("drop_newest", [b"0", b"1"]), ("drop_oldest", [b"3", b"4"])],
+)
+def test_worker_pool_overflow_policies(overflow, expected) -> None:
+    release = threading.Event()
+    handled = []
+
+    def handler(topic, payload):
+        if payload == b"blocker":
+            release.wait(5)
+        else:
+            handled.append(payload)
+
+    pool = MessageWorkerPool(handler, workers=1, queue_size=2, overflow=overflow)
+    pool.submit("t", b"blocker")
+    while pool.stats().queue_depth:  # wait until the worker is busy with the blocker
+        time.sleep(0.001)
+    for i in range(5):
+        pool.submit("t", str(i).encode())
+
+    assert pool.stats().dropped == 3
+    assert pool.stats().queue_depth == 2
+    release.set()
+    pool.close(timeout=5)
+    assert handled == expected
+
+
+def test_worker_pool_counts_handler_errors() -> None:
+    def handler(topic, payload):
+        raise ValueError("bad message")
+
+    with MessageWorkerPool(handler, workers=1) as pool:
+        pool.submit("t", b"{}")
+        pool.join(timeout=5)
+        assert pool.stats().errors == 1
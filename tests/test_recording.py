@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from simulated_city.config import SimulationConfig, SimulationLocationConfig
+from simulated_city.recording import STATUS_FULL, STATUS_OVERFLOW, TrajectoryRecorder, open_trajectory
+from simulated_city.simulation import BinSimulation, FastForwardRunner
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+LOCATIONS = tuple(SimulationLocationConfig(f"bin-{i}", 55.67 + i * 0.001, 12.56) for i in range(20))
+
+
+def _sim() -> BinSimulation:
+    return BinSimulation(SimulationConfig(seed=5, start_time=START, arrival_prob=0.4, locations=LOCATIONS))
+
+
+def test_recorder_round_trips_batches_through_memory_maps(tmp_path) -> None:
+    sim = _sim()
+    batches = []
+
+    def record(batch) -> None:
+        batches.append(batch)
+        recorder.record_batch(batch)
+
+    # A tiny capacity forces the files to grow several times.
+    with TrajectoryRecorder.for_simulation(tmp_path / "run", sim, capacity=8) as recorder:
+        FastForwardRunner(sim, batch_steps=24, on_batch=record).run(200)
+
+    run = open_trajectory(tmp_path / "run")
+    steps = np.concatenate([b.steps for b in batches])
+    assert len(run) == len(steps) > 8
+    assert isinstance(run.fill, np.memmap) and not run.fill.flags.writeable
+    assert np.array_equal(run.index, np.concatenate([b.indices for b in batches]))
+    assert np.array_equal(run.fill, np.concatenate([b.fill_pct for b in batches]))
+    assert np.array_equal(run.time, int(START.timestamp()) + steps * 900)
+    assert np.array_equal(run.status == STATUS_FULL, run.fill >= 100)
+    assert run.start_time == START and run.ids == sim.location_ids
+
+    rows = run.rows_for("bin-3")
+    assert np.all(run.index[rows] == 3)
+    assert np.allclose(run.x[rows], run.x[rows][0]) and 300_000 < run.x[rows][0] < 800_000
+
+
+def test_recorder_records_steps_with_overflows(tmp_path) -> None:
+    sim = _sim()
+    recorder = TrajectoryRecorder.for_simulation(tmp_path / "run", sim)
+    overflows = 0
+    for events in sim.run(300):
+        recorder.record_step(events)
+        overflows += len(events.overflow)
+    recorder.flush()
+
+    # Flushed records are readable while the recorder is still open.
+    run = open_trajectory(tmp_path / "run")
+    assert overflows > 0
+    assert np.count_nonzero(run.status == STATUS_OVERFLOW) == overflows
+    recorder.close()
+
+    with pytest.raises(RuntimeError):
+        recorder.append(0, 0, 0.0, 0.0, 0, 0)
+    with pytest.raises(FileExistsError):
+        TrajectoryRecorder(tmp_path / "run", sim.location_ids)
+    TrajectoryRecorder(tmp_path / "run", sim.location_ids, overwrite=True).close()
+    assert len(open_trajectory(tmp_path / "run")) == 0
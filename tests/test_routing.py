@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from simulated_city.config import SimulationLocationConfig
+from simulated_city.routing import distance_matrix, plan_collection, solve_cvrp
+
+
+def _length(dist, routes) -> float:
+    return sum(float(dist[np.r_[0, r], np.r_[r, 0]].sum()) for r in routes)
+
+
+def test_solve_cvrp_routes_are_valid_and_improved() -> None:
+    rng = np.random.default_rng(3)
+    x, y = rng.uniform(0, 8000, 401), rng.uniform(0, 8000, 401)
+    dist = distance_matrix(x, y)
+    demand = np.concatenate([[0.0], rng.uniform(0.5, 1.0, 400)])
+
+    routes = solve_cvrp(dist, demand, 25)
+    assert sorted(stop for route in routes for stop in route) == list(range(1, 401))
+    assert all(demand[route].sum() <= 25 + 1e-9 for route in routes)
+    assert _length(dist, routes) < 0.97 * _length(dist, solve_cvrp(dist, demand, 25, improve=False))
+
+    with pytest.raises(ValueError):
+        solve_cvrp(dist, demand, 0.8)
+
+
+def test_solve_cvrp_removes_crossings() -> None:
+    # Depot at the origin and the corners of a square: the best tour is its perimeter.
+    x = np.array([0.0, 0.0, 1000.0, 1000.0, 0.0])
+    y = np.array([0.0, 1000.0, 0.0, 1000.0, 500.0])
+    dist = distance_matrix(x, y)
+    (route,) = solve_cvrp(dist, np.ones(5), 10)
+    assert _length(dist, [route]) == pytest.approx(4000.0)
+
+
+def test_plan_collection_picks_full_bins() -> None:
+    locations = tuple(SimulationLocationConfig(f"b{i}", 55.67 + 0.002 * (i % 5), 12.56 + 0.003 * (i // 5)) for i in range(25))
+    fill = np.array([90 if i % 2 else 20 for i in range(25)])
+
+    plan = plan_collection(locations, fill, depot=(55.675, 12.57), threshold_pct=70, capacity=3.0)
+    assert sorted(plan.rows) == [i for i in range(25) if i % 2]
+    assert all(route.load <= 3.0 for route in plan.routes)
+    assert [route.ids for route in plan.routes] == [tuple(f"b{i}" for i in route.rows) for route in plan.routes]
+    assert plan.distance_m == pytest.approx(sum(route.distance_m for route in plan.routes)) and plan.distance_m > 0
@@ -0,0 +1,61 @@
+import pytest
+
+from simulated_city.serialization import (
+    JsonCodec,
+    PositionCodec,
+    best_json_codec,
+    decode,
+    encode,
+    get_codec,
+)
+
+
+def test_json_codec_is_compact_and_roundtrips() -> None:
+    obj = {"id": "bin-1", "fill": 42, "pos": [12.5, 55.6], "name": "Rådhuspladsen"}
+    payload = encode(obj, "json")
+
+    assert isinstance(payload, bytes)
+    assert b" " not in payload.replace("Rådhuspladsen".encode(), b"")
+    assert decode(payload, "json") == obj
+    # Other JSON codecs decode the same bytes.
+    assert best_json_codec().decode(payload) == obj
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgpack"])
+def test_optional_codecs_roundtrip(name: str) -> None:
+    pytest.importorskip(name)
+
+    obj = {"id": "bin-1", "fill": 42, "pos": [12.5, 55.6]}
+    assert decode(encode(obj, name), name) == obj
+
+
+def test_json_codecs_agree_on_non_str_keys_and_nan() -> None:
+    pytest.importorskip("orjson")
+
+    obj = {1: "a", None: [float("nan"), float("inf"), 1.5], "x": {2.5: -float("inf")}}
+    payload = encode(obj, "json")
+    assert payload == encode(obj, "orjson")
+    assert decode(payload, "json") == {"1": "a", "null": [None, None, 1.5], "x": {"2.5": None}}
+
+
+def test_best_json_codec_is_resolved_once() -> None:
+    assert best_json_codec() is best_json_codec()
+
+
+def test_position_codec_fixed_size_records() -> None:
+    rows = [(0, 12.5683, 55.6761), (41, 12.57, 55.68)]
+    codec = get_codec("position")
+
+    payload = codec.encode(rows)
+    assert len(payload) == 2 * PositionCodec.record.size == 40
+    assert codec.decode(payload) == rows
+
+    with pytest.raises(ValueError):
+        codec.decode(payload[:-1])
+
+
+def test_get_codec_accepts_instances_and_rejects_unknown_names() -> None:
+    codec = JsonCodec()
+    assert get_codec(codec) is codec
+    with pytest.raises(ValueError):
+        get_codec("yaml")
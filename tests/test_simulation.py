@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from simulated_city.config import SimulationConfig, SimulationLocationConfig
+from simulated_city.simulation import BinSimulation, EventDrivenSimulation, FastForwardRunner
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _config(**overrides) -> SimulationConfig:
+    return SimulationConfig(**{"seed": 7, "start_time": START, **overrides})
+
+
+def test_simulation_is_reproducible_from_seed() -> None:
+    a = BinSimulation(_config(), n_bins=1000)
+    b = BinSimulation(_config(), n_bins=1000)
+    for ea, eb in zip(a.run(50), b.run(50)):
+        assert ea.time == eb.time
+        assert np.array_equal(ea.indices, eb.indices)
+        assert np.array_equal(ea.fill_pct, eb.fill_pct)
+    assert np.array_equal(a.fill_pct, b.fill_pct)
+    assert a.time == START + a.timestep * 50
+
+
+def test_simulation_boundary_events_and_overflow() -> None:
+    cfg = _config(
+        arrival_prob=1.0,
+        bag_fill_delta_pct=30,
+        status_boundary_pct=50,
+        locations=(SimulationLocationConfig("b1", 55.67, 12.56), SimulationLocationConfig("b2", 55.68, 12.57)),
+    )
+    sim = BinSimulation(cfg)
+    fills, event_counts = [], []
+    for events in sim.run(5):
+        fills.append(int(sim.fill_pct[0]))
+        event_counts.append(len(events))
+    # 30, 60 (crosses 50), 90, 100 (crosses 100), full -> overflow
+    assert fills == [30, 60, 90, 100, 100]
+    assert event_counts == [0, 2, 0, 2, 0]
+    assert events.overflow.tolist() == [0, 1]
+    assert sim.location_ids == ("b1", "b2")
+
+    sim.empty([0])
+    assert sim.fill_pct.tolist() == [0, 100]
+
+
+def test_simulation_publish_every_deposit() -> None:
+    sim = BinSimulation(_config(arrival_prob=0.5, publish_every_deposit=True), n_bins=500)
+    events = sim.step()
+    assert np.array_equal(events.indices, np.flatnonzero(sim.deposits))
+
+
+def test_advance_matches_step_by_step() -> None:
+    # With certain arrivals both modes are deterministic and must agree exactly.
+    cfg = _config(arrival_prob=1.0, bag_fill_delta_pct=3)
+    stepped, leaped = BinSimulation(cfg, n_bins=20), BinSimulation(cfg, n_bins=20)
+    expected = [(e.step, i, f) for e in stepped.run(40) for i, f in zip(e.indices.tolist(), e.fill_pct.tolist())]
+    batch = leaped.advance(40)
+    assert list(zip(batch.steps.tolist(), batch.indices.tolist(), batch.fill_pct.tolist())) == expected
+    assert batch.overflow_count == int(stepped.overflows.sum())
+    assert leaped.time == stepped.time
+
+    # With random arrivals they agree in distribution.
+    cfg = _config(arrival_prob=0.05)
+    stepped, leaped = BinSimulation(cfg, n_bins=5000), BinSimulation(cfg, n_bins=5000)
+    stepped_events = sum(len(e) for e in stepped.run(200))
+    leaped_events = len(leaped.advance(200))
+    assert leaped_events == pytest.approx(stepped_events, rel=0.05)
+    assert leaped.fill_pct.mean() == pytest.approx(stepped.fill_pct.mean(), rel=0.02)
+
+
+def test_event_driven_matches_timestep_model_exactly_for_certain_arrivals() -> None:
+    for overrides in ({"bag_fill_delta_pct": 7, "status_boundary_pct": 30}, {"publish_every_deposit": True}):
+        cfg = _config(arrival_prob=1.0, **overrides)
+        stepped, evented = BinSimulation(cfg, n_bins=5), EventDrivenSimulation(cfg, n_bins=5)
+        for _ in range(60):
+            a, b = stepped.step(), evented.step()
+            assert (a.step, a.indices.tolist(), a.fill_pct.tolist()) == (b.step, b.indices.tolist(), b.fill_pct.tolist())
+            assert a.overflow.tolist() == b.overflow.tolist()
+        assert np.array_equal(stepped.fill_pct, evented.fill_pct)
+        assert np.array_equal(stepped.overflows, evented.overflows)
+
+
+def test_event_driven_is_statistically_equivalent() -> None:
+    cfg = _config(arrival_prob=0.3, bag_fill_delta_pct=5)
+    stepped, evented = BinSimulation(cfg, n_bins=4000), EventDrivenSimulation(cfg, n_bins=4000)
+    stepped_events = sum(len(e) for e in stepped.run(50))
+    evented_events = len(evented.advance(50))
+    # Mid-run state is filled in on demand, so emptying must behave the same.
+    assert evented.fill_pct.mean() == pytest.approx(stepped.fill_pct.mean(), rel=0.02)
+    stepped.empty(np.arange(0, 4000, 2))
+    evented.empty(np.arange(0, 4000, 2))
+    stepped_events += sum(len(e) for e in stepped.run(50))
+    evented_events += len(evented.advance(50))
+
+    assert evented_events == pytest.approx(stepped_events, rel=0.03)
+    assert evented.fill_pct.mean() == pytest.approx(stepped.fill_pct.mean(), rel=0.02)
+    assert evented.fill_pct.std() == pytest.approx(stepped.fill_pct.std(), rel=0.05)
+    assert evented.deposits.sum() == pytest.approx(stepped.deposits.sum(), rel=0.02)
+    assert evented.overflows.sum() == pytest.approx(stepped.overflows.sum(), rel=0.05)
+    assert evented.time == stepped.time
+
+
+def test_fast_forward_runner_publishes_one_message_per_batch() -> None:
+    class Recorder:
+        def __init__(self):
+            self.messages = []
+            self.flushes = 0
+
+        def publish_json(self, topic, payload, qos=0):
+            self.messages.append((topic, payload))
+
+        def flush(self):
+            self.flushes += 1
+
+    publisher = Recorder()
+    sim = BinSimulation(_config(arrival_prob=0.1), n_bins=100)
+    summary = FastForwardRunner(sim, publisher=publisher, batch_steps=96, topic="t/events").run(96 * 7 + 10)
+
+    assert summary.batches == 8 == len(publisher.messages) == publisher.flushes
+    assert summary.end_time == START + sim.timestep * (96 * 7 + 10)
+    assert summary.events == sum(len(m["ids"]) for _, m in publisher.messages)
+    first = publisher.messages[0][1]
+    assert first["start"] == START.isoformat() and all(0 <= s < 96 for s in first["steps"])
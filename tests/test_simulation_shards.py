@@ -0,0 +1,62 @@
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from simulated_city.config import SimulationConfig, SimulationLocationConfig
+from simulated_city.simulation import BinSimulation
+from simulated_city.simulation_shards import ShardedRunner, partition_locations
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+LOCATIONS = tuple(
+    SimulationLocationConfig(f"bin-{i}", 55.60 + (i % 10) * 0.01, 12.50 + (i // 10) * 0.01) for i in range(60)
+)
+
+
+def _config(**overrides) -> SimulationConfig:
+    return SimulationConfig(**{"seed": 11, "start_time": START, "arrival_prob": 0.3, "locations": LOCATIONS, **overrides})
+
+
+def test_partition_locations_is_stable_and_complete() -> None:
+    for by in ("hash", "tile"):
+        shards = partition_locations(LOCATIONS, 4, by=by)
+        assert shards == partition_locations(LOCATIONS, 4, by=by)
+        assert sorted(i for rows in shards for i in rows) == list(range(len(LOCATIONS)))
+
+    # Tile partitioning keeps bins of one grid cell together.
+    shards = partition_locations(LOCATIONS, 4, by="tile", tile_size_deg=0.05)
+    cell = {i: (int((LOCATIONS[i].lat - 55.6) // 0.05), int((LOCATIONS[i].lon - 12.5) // 0.05)) for i in range(60)}
+    for rows in shards:
+        for other in shards:
+            if other is not rows:
+                assert not {cell[i] for i in rows} & {cell[i] for i in other}
+
+    with pytest.raises(ValueError):
+        partition_locations(LOCATIONS, 2, by="zip")
+
+
+def test_sharded_run_is_reproducible_and_merges_shards() -> None:
+    runner = ShardedRunner(_config(), n_shards=3, batch_steps=10)
+    first = runner.run(40)
+    second = ShardedRunner(_config(), n_shards=3, batch_steps=10, sync=True).run(40)
+
+    assert np.array_equal(first.fill_pct, second.fill_pct)
+    assert np.array_equal(first.events_per_step, second.events_per_step)
+    assert len(first.summaries) == 3
+    assert first.events == sum(s.events for s in first.summaries) > 0
+
+    # Each shard matches a single-process run of its locations with its child seed.
+    children = np.random.SeedSequence(11).spawn(3)
+    for k, rows in enumerate(runner.shards):
+        cfg = replace(_config(), locations=tuple(LOCATIONS[i] for i in rows))
+        sim = BinSimulation(cfg, rng=np.random.Generator(np.random.PCG64(children[k])))
+        for _ in range(4):
+            sim.advance(10)  # same windows as batch_steps
+        assert np.array_equal(first.fill_pct[rows], sim.fill_pct)
+
+
+def test_sharded_run_reports_shard_errors() -> None:
+    with pytest.raises(RuntimeError, match="arrival_prob"):
+        ShardedRunner(_config(arrival_prob=2.0), n_shards=2).run(5)
@@ -0,0 +1,68 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from simulated_city.config import SimulationLocationConfig
+from simulated_city.geo import wgs2utm
+from simulated_city.spatial import SpatialIndex
+
+
+def _points(n: int = 2000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 5000, n), rng.uniform(0, 3000, n), rng
+
+
+def _pairs(q, p) -> set[tuple[int, int]]:
+    return set(zip(np.asarray(q).tolist(), np.asarray(p).tolist()))
+
+
+def test_knn_matches_brute_force() -> None:
+    x, y, rng = _points()
+    index = SpatialIndex(x, y, cell_size=150)
+    # Include queries outside the indexed area.
+    qx, qy = rng.uniform(-1000, 6000, 300), rng.uniform(-1000, 4000, 300)
+    brute = np.hypot(qx[:, None] - x[None], qy[:, None] - y[None])
+
+    for k in (1, 7):
+        dist, rows = index.query_knn(qx, qy, k=k)
+        assert np.allclose(dist, np.sort(brute, axis=1)[:, :k])
+        assert np.allclose(brute[np.arange(300)[:, None], rows], dist)
+
+    dist, rows = index.query_knn(qx, qy, k=3, max_distance=100)
+    expected = np.sort(brute, axis=1)[:, :3]
+    expected[expected > 100] = np.inf
+    assert np.allclose(dist, expected)
+    assert np.array_equal(rows == -1, np.isinf(dist))
+
+
+def test_radius_and_bbox_match_brute_force() -> None:
+    x, y, rng = _points()
+    index = SpatialIndex(x, y)
+    qx, qy = rng.uniform(-500, 5500, 300), rng.uniform(-500, 3500, 300)
+    brute = np.hypot(qx[:, None] - x[None], qy[:, None] - y[None])
+
+    radius = rng.uniform(0, 600, 300)
+    q, p, d = index.query_radius(qx, qy, radius)
+    assert _pairs(q, p) == _pairs(*np.nonzero(brute <= radius[:, None]))
+    assert np.all(np.diff(q) >= 0) and np.allclose(d, brute[q, p])
+
+    x0, y0 = rng.uniform(-500, 5000, 40), rng.uniform(-500, 3000, 40)
+    x1, y1 = x0 + rng.uniform(0, 2000, 40), y0 + rng.uniform(0, 1000, 40)
+    q, p = index.query_bbox(x0, y0, x1, y1)
+    inside = (x >= x0[:, None]) & (x <= x1[:, None]) & (y >= y0[:, None]) & (y <= y1[:, None])
+    assert _pairs(q, p) == _pairs(*np.nonzero(inside))
+
+
+def test_index_from_locations_projects_to_utm() -> None:
+    locations = (
+        SimulationLocationConfig("town-hall", 55.6761, 12.5683),
+        SimulationLocationConfig("harbour", 55.6930, 12.5990),
+        SimulationLocationConfig("airport", 55.6180, 12.6508),
+    )
+    index = SpatialIndex.from_locations(locations)
+    assert index.ids == ("town-hall", "harbour", "airport")
+    assert index.x[0] == pytest.approx(wgs2utm(55.6761, 12.5683, backend="builtin")[0])
+
+    x, y = index.project([12.5700, 12.6400], [55.6770, 55.6200])
+    _, rows = index.query_knn(x, y)
+    assert [index.ids[i] for i in rows[:, 0]] == ["town-hall", "airport"]
@@ -0,0 +1,41 @@
+import pytest
+
+from simulated_city.topics import TopicRouter, topic_matches
+
+
+def test_topic_router_wildcards() -> None:
+    router = TopicRouter()
+    router.add("city/#", "all")
+    router.add("city/+/status", "status")
+    router.add("city/transport/status", "transport")
+    router.add("city/transport/+", "transport-any")
+
+    assert sorted(router.match("city/transport/status")) == ["all", "status", "transport", "transport-any"]
+    assert sorted(router.match("city/bins/status")) == ["all", "status"]
+    # `#` also matches the parent level itself.
+    assert router.match("city") == ["all"]
+    assert router.match("other/transport/status") == []
+
+
+def test_topic_router_remove_and_system_topics() -> None:
+    router = TopicRouter()
+    handler = object()
+    router.add("#", "everything")
+    router.add("$SYS/broker/load", handler)
+
+    # Wildcard filters at the first level don't match `$` topics (MQTT spec).
+    assert router.match("$SYS/broker/load") == [handler]
+
+    router.remove("$SYS/broker/load", handler)
+    assert router.match("$SYS/broker/load") == []
+    assert len(router) == 1
+
+
+def test_topic_matches_and_invalid_filters() -> None:
+    assert topic_matches("a/+/c", "a/b/c")
+    assert not topic_matches("a/+/c", "a/b/d/c")
+
+    with pytest.raises(ValueError):
+        TopicRouter().add("a/#/c", "x")
+    with pytest.raises(ValueError):
+        TopicRouter().add("a/b+", "x")